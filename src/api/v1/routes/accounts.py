@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from typing import List
-from src.api.deps import get_current_user, get_services
+from src.api.deps import get_current_user, get_read_services
 from src.api.v1.schemas.account import AccountInDB
 from src.api.v1.schemas.user import UserInDB
 from src.application.services.account import AccountService
@@ -8,7 +8,7 @@ from src.application.services.account import AccountService
 router = APIRouter()
 
 
-def get_account_service(services=Depends(get_services)) -> AccountService:
+def get_account_service(services=Depends(get_read_services)) -> AccountService:
     return services.get_account_service()
 
 
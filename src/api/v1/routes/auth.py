@@ -4,6 +4,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from src.config.config import settings
 from src.api.deps import get_auth_service, raise_credentials_exception
 from src.application.services.auth import AuthService
+from src.application.services.principal import get_principal_resolver
 
 router = APIRouter()
 
@@ -35,7 +36,9 @@ async def login_for_access_token(
         raise raise_credentials_exception()
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Утверждения в токене позволяют не загружать пользователя на каждый запрос
     access_token = auth_service.create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
+        data=await get_principal_resolver().claims(user),
+        expires_delta=access_token_expires,
     )
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,33 +1,178 @@
-from fastapi import APIRouter, Depends, HTTPException
-from src.api.deps import get_current_user, get_payment_service
-from src.api.v1.schemas.payment import WebhookPayload, PaymentInDB
+from datetime import datetime
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import Field
+from src.api.deps import (
+    get_current_admin,
+    get_current_user,
+    get_payment_export_service,
+    get_payment_service,
+    get_read_payment_service,
+    get_webhook_queue,
+)
+from src.api.v1.schemas.pagination import Page
+from src.api.v1.schemas.payment import (
+    ExportFormat,
+    WebhookPayload,
+    PaymentInDB,
+    PaymentSummary,
+    WebhookAccepted,
+    WebhookResult,
+)
 from src.application.services.payment import PaymentService
+from src.application.services.payment_export import MEDIA_TYPES, PaymentExportService
+from src.application.services.seen_transactions import get_seen_transaction_filter
+from src.config.config import settings
 from src.core.logger import log
+from src.infrastructure.queue import WebhookQueue
 
 router = APIRouter()
 
 
-@router.post("/webhook", response_model=PaymentInDB)
+@router.post(
+    "/webhook",
+    response_model=PaymentInDB,
+    responses={
+        status.HTTP_202_ACCEPTED: {
+            "description": "Accepted for processing (WEBHOOK_ASYNC_MODE)",
+            "model": WebhookAccepted,
+        }
+    },
+)
 async def process_payment_webhook(
     payload: WebhookPayload,
+    request: Request,
     payment_service: PaymentService = Depends(get_payment_service),
 ):
-    log.info(f"Received webhook for transaction_id: {payload.transaction_id}")
+    """
+    Process a payment webhook. With WEBHOOK_ASYNC_MODE on the verified payload
+    is queued and answered with 202, background consumers store it.
+    """
+    log.info(
+        "Received webhook for transaction_id: {transaction_id}",
+        transaction_id=payload.transaction_id,
+    )
+    if settings.WEBHOOK_ASYNC_MODE:
+        return await enqueue_payment_webhook(payload, get_webhook_queue(request))
     try:
         result = await payment_service.process_payment(payload)
         log.info(
-            f"Webhook processed successfully for transaction_id: {payload.transaction_id}"
+            "Webhook processed successfully for transaction_id: {transaction_id}",
+            transaction_id=payload.transaction_id,
         )
         return result
     except ValueError as e:
-        log.error(f"Webhook processing failed: {str(e)}")
+        log.error("Webhook processing failed: {}", e)
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/my")
+async def enqueue_payment_webhook(
+    payload: WebhookPayload, webhook_queue: WebhookQueue
+) -> JSONResponse:
+    if not PaymentService.verify_signature(payload):
+        log.error(
+            "Invalid signature for transaction_id: {transaction_id}",
+            transaction_id=payload.transaction_id,
+        )
+        raise HTTPException(status_code=400, detail="Invalid signature")
+    await webhook_queue.put(payload.model_dump_json())
+    log.info(
+        "Webhook queued for transaction_id: {transaction_id}",
+        transaction_id=payload.transaction_id,
+    )
+    accepted = WebhookAccepted(transaction_id=payload.transaction_id)
+    return JSONResponse(
+        accepted.model_dump(mode="json"), status_code=status.HTTP_202_ACCEPTED
+    )
+
+
+@router.post("/webhook/batch", response_model=List[WebhookResult])
+async def process_payment_webhook_batch(
+    payloads: Annotated[
+        List[WebhookPayload], Field(max_length=settings.WEBHOOK_BATCH_MAX_SIZE)
+    ],
+    payment_service: PaymentService = Depends(get_payment_service),
+):
+    log.info("Received webhook batch of {} items", len(payloads))
+    return await payment_service.process_payments_batch(payloads)
+
+
+@router.get("/my", response_model=Page[PaymentInDB])
 async def get_user_payments(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
     current_user=Depends(get_current_user),
-    payment_service: PaymentService = Depends(get_payment_service),
+    payment_service: PaymentService = Depends(get_read_payment_service),
 ):
-    log.info(f"Fetching payments for user_id: {current_user.id}")
-    return await payment_service.get_payments_by_user_id(current_user.id)
+    log.info("Fetching payments for user_id: {user_id}", user_id=current_user.id)
+    try:
+        return await payment_service.get_payments_page(current_user.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/my/summary", response_model=PaymentSummary)
+async def get_user_payment_summary(
+    current_user=Depends(get_current_user),
+    payment_service: PaymentService = Depends(get_read_payment_service),
+):
+    return await payment_service.get_payment_summary(current_user.id)
+
+
+@router.get("/summary/{user_id}", response_model=PaymentSummary)
+async def get_payment_summary(
+    user_id: int,
+    live: bool = False,
+    current_user=Depends(get_current_admin),
+    payment_service: PaymentService = Depends(get_read_payment_service),
+):
+    """Summary of any user; live=true recomputes it from the payments table."""
+    if live:
+        return await payment_service.compute_payment_summary(user_id)
+    return await payment_service.get_payment_summary(user_id)
+
+
+@router.get("/export")
+async def export_payments(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    current_user=Depends(get_current_user),
+    export_service: PaymentExportService = Depends(get_payment_export_service),
+):
+    """
+    Stream payments as NDJSON or CSV. Users export their own payments; admins
+    export a given user's payments, or everyone's when user_id is omitted.
+    """
+    if not current_user.is_admin:
+        if user_id is not None and user_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="The user doesn't have enough privileges",
+            )
+        user_id = current_user.id
+    if date_from is not None and date_to is not None and date_from >= date_to:
+        raise HTTPException(status_code=400, detail="date_from must be before date_to")
+
+    log.info(
+        "Exporting payments as {export_format} for user_id: {user_id}, "
+        "requested by user_id: {requested_by}",
+        export_format=export_format.value,
+        user_id=user_id,
+        requested_by=current_user.id,
+    )
+    return StreamingResponse(
+        export_service.export(export_format, user_id, date_from, date_to),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="payments.{export_format.value}"'
+        },
+    )
+
+
+@router.get("/seen-filter")
+async def get_seen_filter_stats(current_user=Depends(get_current_admin)):
+    """Memory use and false-positive rate of the seen transactions filter."""
+    return get_seen_transaction_filter().stats()
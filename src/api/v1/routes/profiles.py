@@ -0,0 +1,34 @@
+from typing import Dict, List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from src.api.deps import get_current_admin
+from src.core.profiling import ProfileStore, get_profile_store
+
+router = APIRouter()
+
+
+@router.get("", response_model=List[Dict])
+async def list_profiles(
+    current_user=Depends(get_current_admin),
+    store: ProfileStore = Depends(get_profile_store),
+):
+    """Summaries of the saved request traces, newest first."""
+    return store.summaries()
+
+
+@router.get("/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    current_user=Depends(get_current_admin),
+    store: ProfileStore = Depends(get_profile_store),
+):
+    """Download a saved trace: time breakdown, SQL statements, N+1 and stack samples."""
+    trace = store.get(profile_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return JSONResponse(
+        trace,
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{profile_id}.json"'
+        },
+    )
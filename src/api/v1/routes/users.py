@@ -1,8 +1,15 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from src.api.deps import get_current_user, get_current_admin, get_user_service
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from src.api.deps import (
+    get_current_user,
+    get_current_admin,
+    get_read_user_service,
+    get_user_service,
+)
+from src.api.v1.schemas.pagination import Page
 from src.api.v1.schemas.user import UserCreate, UserUpdate, UserInDB, UserWithAccounts
 from src.application.services.user import UserService
+from src.config.config import settings
 
 router = APIRouter()
 
@@ -12,12 +19,17 @@ async def read_users_me(current_user=Depends(get_current_user)):
     return current_user
 
 
-@router.get("", response_model=List[UserWithAccounts])
+@router.get("", response_model=Page[UserWithAccounts])
 async def read_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
     current_user=Depends(get_current_admin),
-    user_service: UserService = Depends(get_user_service),
+    user_service: UserService = Depends(get_read_user_service),
 ):
-    return await user_service.get_users()
+    try:
+        return await user_service.get_users_page(cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("", response_model=UserInDB)
@@ -1,3 +1,6 @@
+from enum import Enum
+from typing import Optional
+
 from pydantic import BaseModel, ConfigDict
 from decimal import Decimal
 from datetime import datetime
@@ -20,3 +23,37 @@ class PaymentInDB(BaseModel):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class PaymentSummary(BaseModel):
+    user_id: int
+    payments_count: int
+    total_amount: Decimal
+    last_payment_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WebhookStatus(str, Enum):
+    PROCESSED = "processed"
+    DUPLICATE = "duplicate"
+    INVALID_SIGNATURE = "invalid_signature"
+    FORBIDDEN = "forbidden"
+    UNKNOWN_USER = "unknown_user"
+
+
+class WebhookResult(BaseModel):
+    transaction_id: str
+    status: WebhookStatus
+    payment: Optional[PaymentInDB] = None
+    detail: Optional[str] = None
+
+
+class WebhookAccepted(BaseModel):
+    status: str = "accepted"
+    transaction_id: str
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
@@ -4,6 +4,7 @@ from typing import List, Optional
 from src.config.config import settings
 from src.infrastructure.repositories.account import AccountRepository
 from src.api.v1.schemas.account import AccountCreate, AccountInDB
+from src.application.services import cache_keys
 from src.application.services.cache import CacheService, get_cache_service
 from src.core.logger import log
 
@@ -38,12 +39,19 @@ class AccountService:
         Returns:
             AccountInDB: The created account.
         """
-        log.info(f"Creating account for user_id: {account_data.user_id}")
+        log.info(
+            "Creating account for user_id: {user_id}", user_id=account_data.user_id
+        )
         account = await self.account_repository.create(**account_data.model_dump())
         account_schema = AccountInDB.model_validate(account)
         # инвалидация кэша для счетов пользователя
-        await self.cache_service.delete(f"accounts:user:{account_schema.user_id}")
-        log.info(f"Account created successfully for user_id: {account_data.user_id}")
+        await self.cache_service.invalidate_tags(
+            [cache_keys.user_tag(account_schema.user_id)]
+        )
+        log.info(
+            "Account created successfully for user_id: {user_id}",
+            user_id=account_data.user_id,
+        )
         return account_schema
 
     async def get_account(self, account_id: int) -> Optional[AccountInDB]:
@@ -69,20 +77,18 @@ class AccountService:
         Returns:
             List[AccountInDB]: A list of accounts belonging to the user.
         """
-        cache_key = f"accounts:user:{user_id}"
-        cached_accounts = await self.cache_service.get(cache_key)
-        if cached_accounts:
-            log.debug(f"Cache hit for accounts of user_id: {user_id}")
-            return [AccountInDB(**acc) for acc in cached_accounts]
-
-        accounts = await self.account_repository.get_by_user_id(user_id)
-        account_schemas = [AccountInDB.model_validate(acc) for acc in accounts]
-        await self.cache_service.set(
-            cache_key,
-            [acc.model_dump() for acc in account_schemas],
-            expire=settings.CACHE_TTL,
+
+        async def load_accounts():
+            accounts = await self.account_repository.get_by_user_id(user_id)
+            return [AccountInDB.model_validate(acc).model_dump() for acc in accounts]
+
+        accounts = await self.cache_service.get_or_load(
+            cache_keys.user_accounts_key(user_id),
+            load_accounts,
+            ttl=settings.CACHE_TTL,
+            tags=[cache_keys.user_tag(user_id)],
         )
-        return account_schemas
+        return [AccountInDB(**acc) for acc in accounts]
 
     async def update_balance(self, account_id: int, amount: Decimal) -> AccountInDB:
         """
@@ -95,11 +101,18 @@ class AccountService:
         Returns:
             AccountInDB: The updated account.
         """
-        log.info(f"Updating balance for account_id: {account_id} by amount: {amount}")
+        log.info(
+            "Updating balance for account_id: {account_id} by amount: {amount}",
+            account_id=account_id,
+            amount=amount,
+        )
         current_balance = await self.account_repository.get_balance(account_id)
         new_balance = current_balance + amount
         if new_balance < 0:
-            log.error(f"Negative balance not allowed for account_id: {account_id}")
+            log.error(
+                "Negative balance not allowed for account_id: {account_id}",
+                account_id=account_id,
+            )
             raise ValueError("Account balance cannot be negative")
 
         updated_account = await self.account_repository.update_balance(
@@ -107,7 +120,9 @@ class AccountService:
         )
         account_schema = AccountInDB.model_validate(updated_account)
         # инвалидация кэша для счетов пользователя
-        await self.cache_service.delete(f"user:{account_schema.user_id}")
+        await self.cache_service.invalidate_tags(
+            [cache_keys.user_tag(account_schema.user_id)]
+        )
         return account_schema
 
     async def get_balance(self, account_id: int) -> Decimal:
@@ -121,5 +136,9 @@ class AccountService:
             Decimal: The balance of the account.
         """
         balance = await self.account_repository.get_balance(account_id)
-        log.debug(f"Retrieved balance {balance} for account_id: {account_id}")
+        log.debug(
+            "Retrieved balance {balance} for account_id: {account_id}",
+            balance=balance,
+            account_id=account_id,
+        )
         return balance
@@ -1,27 +1,26 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import jwt
-from passlib.context import CryptContext
 
 from src.api.v1.schemas.user import UserInDB
 from src.config.config import settings
 from src.core.logger import log
+from src.infrastructure.password_hasher import get_password_hasher
 from src.infrastructure.repositories.user import UserRepository
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class AuthService:
     def __init__(self, user_repository: UserRepository):
         self.user_repository = user_repository
 
+    # bcrypt занимает сотни миллисекунд, поэтому выполняется в пуле потоков
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        return await get_password_hasher().verify(plain_password, hashed_password)
 
     @staticmethod
-    def get_password_hash(password: str) -> str:
-        return pwd_context.hash(password)
+    async def get_password_hash(password: str) -> str:
+        return await get_password_hasher().hash(password)
 
     async def authenticate_user(self, email: str, password: str) -> Optional[UserInDB]:
         """
@@ -34,15 +33,20 @@ class AuthService:
         Returns:
             Optional[UserInDB]: Authenticated user or None
         """
-        log.info(f"Authenticating user with email: {email}")
+        log.info("Authenticating user with email: {email}", email=email)
         user = await self.user_repository.get_by_email(email)
         if not user:
-            log.warning(f"Authentication failed: user not found with email: {email}")
+            log.warning(
+                "Authentication failed: user not found with email: {email}", email=email
+            )
             return None
-        if not self.verify_password(password, user.hashed_password):
-            log.warning(f"Authentication failed: invalid password for email: {email}")
+        if not await self.verify_password(password, user.hashed_password):
+            log.warning(
+                "Authentication failed: invalid password for email: {email}",
+                email=email,
+            )
             return None
-        log.info(f"User authenticated successfully with email: {email}")
+        log.info("User authenticated successfully with email: {email}", email=email)
         return UserInDB.model_validate(user)
 
     @staticmethod
@@ -68,5 +72,7 @@ class AuthService:
             )
         to_encode.update({"exp": expire})
         encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
-        log.debug(f"Created access token for user_id: {data.get('sub')}")
+        log.debug(
+            "Created access token for user_id: {user_id}", user_id=data.get("sub")
+        )
         return encoded_jwt
@@ -27,4 +27,4 @@ class ServiceFactory:
         return AccountService(self.account_repo)
 
     def get_payment_service(self) -> PaymentService:
-        return PaymentService(self.payment_repo, self.account_repo)
+        return PaymentService(self.payment_repo, self.account_repo, self.user_repo)
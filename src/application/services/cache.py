@@ -1,55 +1,564 @@
-from datetime import datetime
-from decimal import Decimal
-from typing import Optional, TypeVar, Generic
+import asyncio
+import math
+import random
+import time
+import uuid
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Set,
+    TypeVar,
+    Generic,
+    List,
+    Tuple,
+    Union,
+)
+from src.application.services import cache_keys
+from src.core.metrics import registry
 from src.infrastructure.cache import RedisCacheAdapter, get_redis_cache_adapter
+from src.infrastructure.cache_codec import CacheCodec, CodecError, create_cache_codec
+from src.infrastructure.local_cache import LocalCache
 import json
 from src.core.logger import log
+from src.config.config import settings
 
 T = TypeVar("T")
 
+INVALIDATION_CHANNEL = "cache:invalidate"
+# Свои сообщения об инвалидации экземпляр пропускает
+INSTANCE_ID = uuid.uuid4().hex
 
-class CustomJSONEncoder(json.JSONEncoder):
-    """Кастомный энкодер для сериализации Decimal в JSON."""
+# L1 общий для процесса; до подписки на инвалидации он неактивен
+_local_cache = LocalCache(settings.CACHE_L1_MAX_SIZE, settings.CACHE_L1_TTL)
+_redis_stats = {"hits": 0, "misses": 0, "stale": 0, "decode_errors": 0}
+_codec = create_cache_codec(settings.CACHE_CODEC, settings.CACHE_COMPRESS_MIN_BYTES)
 
-    def default(self, obj):
-        # Преобразуем несериализуемый тип Decimal в строку
-        if isinstance(obj, Decimal):
-            return str(obj)
-        # Преобразуем datetime в строку ISO 8601
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
+# Загрузки, выполняющиеся в процессе: ключ -> future с результатом
+_inflight: Dict[str, asyncio.Future] = {}
+# Скользящее среднее длительности загрузки по месту вызова (для раннего обновления)
+_load_seconds: Dict[str, float] = {}
+
+
+# Значение, которое не удалось декодировать, считается промахом
+_MISS = object()
+
+_cache_requests = registry.counter(
+    "cache_requests_total",
+    "Cache lookups by key prefix and result: l1 hit, hit in Redis or miss.",
+    ["prefix", "result"],
+)
+_cache_lookup = registry.histogram(
+    "cache_lookup_duration_seconds",
+    "Time to find a value in L1 or Redis or to learn that it is missing.",
+    ["prefix"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+
+
+def _record_lookup(key: str, result: str, started: float) -> None:
+    prefix = cache_keys.key_prefix(key)
+    _cache_requests.labels(prefix, result).inc()
+    _cache_lookup.labels(prefix).observe(time.perf_counter() - started)
+
+
+TagVersions = Dict[str, int]
+
+
+def tag_key(tag: str) -> str:
+    """Ключ счётчика версии тега в Redis."""
+    return f"tag:{tag}"
 
 
 class CacheService(Generic[T]):
-    """Сервис кэширования для бизнес-логики."""
+    """Сервис кэширования для бизнес-логики: локальный L1 перед Redis (L2)."""
 
-    def __init__(self, cache_adapter: RedisCacheAdapter):
+    def __init__(
+        self,
+        cache_adapter: RedisCacheAdapter,
+        local_cache: Optional[LocalCache] = None,
+        codec: Optional[CacheCodec] = None,
+    ):
         self.cache_adapter = cache_adapter
+        self.local_cache = local_cache if local_cache is not None else _local_cache
+        self.codec = codec if codec is not None else _codec
+
+    def _decode(self, key: str, data: bytes) -> Any:
+        """Декодировать значение; нечитаемое (старый формат, чужой кодек) - промах."""
+        try:
+            return self.codec.decode(data)
+        except CodecError as e:
+            _redis_stats["decode_errors"] += 1
+            self.local_cache.delete_many([key])
+            log.warning("Cache value for key {key} is ignored: {}", e, key=key)
+            return _MISS
 
     async def get(self, key: str) -> Optional[T]:
         """Получить данные из кэша с десериализацией."""
-        data = await self.cache_adapter.get(key)
+        started = time.perf_counter()
+        result = "l1"
+        data = self.local_cache.get(key)
+        if data is None:
+            data = await self.cache_adapter.get(key)
+            if data:
+                _redis_stats["hits"] += 1
+                result = "hit"
+                self.local_cache.set(key, data)
+            else:
+                _redis_stats["misses"] += 1
         if data:
-            log.debug(f"Cache hit for key: {key}")
-            return json.loads(data)
-        log.debug(f"Cache miss for key: {key}")
+            value = self._decode(key, data)
+            if value is not _MISS:
+                _record_lookup(key, result, started)
+                log.debug("Cache hit for key: {key}", key=key)
+                return value
+        _record_lookup(key, "miss", started)
+        log.debug("Cache miss for key: {key}", key=key)
         return None
 
-    async def set(self, key: str, value: T, expire: int = 300) -> None:
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[T]]:
+        """Получить несколько ключей: промахи L1 читаются из Redis одним MGET."""
+        started = time.perf_counter()
+        keys = list(dict.fromkeys(keys))
+        raw: Dict[str, Optional[bytes]] = {
+            key: self.local_cache.get(key) for key in keys
+        }
+        missing = [key for key, data in raw.items() if data is None]
+        if missing:
+            for key, data in zip(missing, await self.cache_adapter.get_many(missing)):
+                if data:
+                    _redis_stats["hits"] += 1
+                    self.local_cache.set(key, data)
+                    raw[key] = data
+                else:
+                    _redis_stats["misses"] += 1
+        log.debug(
+            "Cache get_many: {} local, {} from Redis",
+            len(keys) - len(missing),
+            len(missing),
+        )
+        values: Dict[str, Optional[T]] = {}
+        missing_keys = set(missing)
+        for key, data in raw.items():
+            value = self._decode(key, data) if data else _MISS
+            values[key] = None if value is _MISS else value
+            if value is _MISS:
+                result = "miss"
+            else:
+                result = "hit" if key in missing_keys else "l1"
+            _record_lookup(key, result, started)
+        return values
+
+    async def set(self, key: str, value: T, expire: Optional[int] = None) -> None:
         """Записать данные в кэш с сериализацией."""
-        serialized_value = json.dumps(value, cls=CustomJSONEncoder)
-        await self.cache_adapter.set(key, serialized_value, expire)
-        log.debug(f"Cache set for key: {key} with TTL: {expire}")
+        async with self.batch() as batch:
+            batch.set(key, value, expire)
+
+    async def set_many(
+        self, values: Dict[str, T], expire: Optional[int] = None
+    ) -> None:
+        """Записать несколько значений с общим TTL за один запрос к Redis."""
+        async with self.batch() as batch:
+            for key, value in values.items():
+                batch.set(key, value, expire)
+
+    def batch(self) -> "CacheBatch":
+        """Сгруппировать записи и удаления в один pipeline, выполняемый при выходе из блока."""
+        return CacheBatch(self)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        early_refresh_beta: Optional[float] = None,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """Получить значение из кэша или загрузить его один раз на все конкурентные запросы.
+
+        Внутри процесса одновременные промахи по ключу ждут одну загрузку; между
+        процессами загрузку выполняет владелец короткой блокировки в Redis, а
+        остальные ждут появления значения. Незадолго до истечения TTL значение с
+        вероятностью по XFetch заранее обновляет один из запросов. None от loader
+        не кэшируется.
+
+        Значение с тегами хранится вместе с версиями тегов на момент загрузки и
+        читается в одном запросе с их текущими версиями: после invalidate_tags
+        версии расходятся, и запись считается промахом.
+        """
+        tags = tuple(tags)
+        ttl = ttl or settings.CACHE_TTL
+        beta = (
+            settings.CACHE_EARLY_REFRESH_BETA
+            if early_refresh_beta is None
+            else early_refresh_beta
+        )
+
+        started = time.perf_counter()
+        data = self.local_cache.get(key)
+        if data is not None:
+            # L1 с тегами очищает рассылка инвалидаций, версии здесь не сверяются
+            value = self._unwrap(self._decode(key, data), tags)
+            if value is not _MISS:
+                _record_lookup(key, "l1", started)
+                return value
+
+        versions: Optional[TagVersions] = None
+        if tags:
+            data, ttl_left_ms, raw_versions = await self.cache_adapter.get_with_ttl_and(
+                key, [tag_key(tag) for tag in tags]
+            )
+            versions = {
+                tag: int(version or 0) for tag, version in zip(tags, raw_versions)
+            }
+        else:
+            data, ttl_left_ms = await self.cache_adapter.get_with_ttl(key)
+        value = _MISS if data is None else self._decode(key, data)
+        value = self._unwrap(value, tags, versions)
+        if value is not _MISS:
+            _redis_stats["hits"] += 1
+            _record_lookup(key, "hit", started)
+            self.local_cache.set(
+                key, data, ttl_left_ms / 1000 if ttl_left_ms > 0 else None, tags
+            )
+            if beta > 0 and ttl_left_ms > 0 and key not in _inflight:
+                # XFetch: чем ближе истечение и дольше загрузка, тем вероятнее, что этот
+                # запрос обновит значение заранее. Загрузка идёт в запросе: loader
+                # работает с сессией запроса, и вынести его в фоновую задачу нельзя
+                load_seconds = _load_seconds.get(self._call_site(loader), 0.0)
+                jitter = -math.log(1.0 - random.random())
+                if load_seconds * beta * jitter * 1000 >= ttl_left_ms:
+                    log.debug("Early cache refresh for key: {key}", key=key)
+                    return await self._load_once(key, loader, ttl, versions)
+            return value
+
+        _redis_stats["misses"] += 1
+        _record_lookup(key, "miss", started)
+        return await self._load_once(key, loader, ttl, versions)
+
+    @staticmethod
+    def _unwrap(
+        value: Any, tags: Tuple[str, ...], versions: Optional[TagVersions] = None
+    ) -> Any:
+        """Достать значение из записи с версиями тегов; устаревшая запись - промах."""
+        if not tags or value is _MISS:
+            return value
+        if not isinstance(value, dict) or "value" not in value:
+            return _MISS
+        if versions is not None and value.get("tags") != versions:
+            _redis_stats["stale"] += 1
+            return _MISS
+        return value["value"]
+
+    async def _load_once(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        versions: Optional[TagVersions] = None,
+    ) -> Any:
+        inflight = _inflight.get(key)
+        if inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Отменили загружавший запрос, а не этот: загружаем сами
+                if not inflight.cancelled():
+                    raise
+                return await self._load_once(key, loader, ttl, versions)
+        future = asyncio.get_running_loop().create_future()
+        _inflight[key] = future
+        try:
+            value = await self._load_with_lock(key, loader, ttl, versions)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение получат ожидающие; если их нет, не засоряем лог
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            _inflight.pop(key, None)
+
+    async def _load_with_lock(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int,
+        versions: Optional[TagVersions] = None,
+    ) -> Any:
+        tags = tuple(versions or ())
+        lock_key = f"lock:{key}"
+        # Токен владельца: снять блокировку может только тот, кто её взял
+        lock_token = uuid.uuid4().hex
+        locked = await self.cache_adapter.set_if_absent(
+            lock_key, lock_token, settings.CACHE_LOCK_TTL
+        )
+        if not locked:
+            # Загружает другой процесс: ждём его результат, но не дольше CACHE_LOCK_WAIT
+            deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                data = await self.cache_adapter.get(key)
+                value = _MISS if data is None else self._decode(key, data)
+                value = self._unwrap(value, tags, versions)
+                if value is not _MISS:
+                    self.local_cache.set(key, data, tags=tags)
+                    return value
+            log.debug("Cache lock wait timed out for key: {key}", key=key)
+        try:
+            started = time.perf_counter()
+            value = await loader()
+            call_site = self._call_site(loader)
+            elapsed = time.perf_counter() - started
+            _load_seconds[call_site] = (
+                0.8 * _load_seconds.get(call_site, elapsed) + 0.2 * elapsed
+            )
+            if value is not None:
+                # Версии прочитаны до загрузки: инвалидация во время загрузки
+                # сделает запись устаревшей, а не потеряется
+                serialized_value = self.codec.encode(
+                    value if versions is None else {"tags": versions, "value": value}
+                )
+                await self.cache_adapter.set(key, serialized_value, ttl)
+                self.local_cache.set(key, serialized_value, ttl, tags)
+                log.debug("Cache loaded for key: {key} with TTL: {}", ttl, key=key)
+            return value
+        finally:
+            if locked:
+                # Загрузка могла пережить CACHE_LOCK_TTL, и блокировку уже взял
+                # другой процесс: удаляем её, только если она всё ещё наша
+                await self.cache_adapter.delete_if_equals(lock_key, lock_token)
+
+    @staticmethod
+    def _call_site(loader: Callable) -> str:
+        return getattr(loader, "__qualname__", repr(loader))
 
     async def delete(self, key: str) -> None:
         """Удалить данные из кэша."""
-        await self.cache_adapter.delete(key)
-        log.debug(f"Cache deleted for key: {key}")
+        await self.delete_many([key])
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        """Удалить несколько ключей из кэша за один запрос."""
+        async with self.batch() as batch:
+            batch.delete_many(keys)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        """Сделать устаревшими все записи с этими тегами за один запрос, сколько бы их ни было."""
+        async with self.batch() as batch:
+            batch.invalidate_tags(tags)
+
+    def _repeat_delete_after_replica_lag(
+        self, keys: list, tags: Iterable[str] = ()
+    ) -> None:
+        """Повторно удалить ключи и инвалидировать теги, когда реплики догонят primary.
+
+        Чтение с отстающей реплики сразу после инвалидации может снова положить
+        в кэш устаревшие данные на весь TTL.
+        """
+        if not settings.replica_urls:
+            return
+        task = asyncio.create_task(self._delete_later(keys, tags))
+        _pending_deletes.add(task)
+        task.add_done_callback(_pending_deletes.discard)
+
+    async def _delete_later(self, keys: list, tags: Iterable[str] = ()) -> None:
+        await asyncio.sleep(settings.REPLICA_MAX_LAG_SECONDS)
+        batch = CacheBatch(self, repeat_deletes=False)
+        batch.delete_many(keys)
+        batch.invalidate_tags(tags)
+        try:
+            await batch.execute()
+        except Exception as e:
+            log.warning("Delayed cache invalidation failed: {}", e)
+
+    async def stats(self) -> Dict:
+        """Счётчики попаданий, промахов и вытеснений по уровням кэша."""
+        redis_stats = dict(_redis_stats)
+        try:
+            info = await self.cache_adapter.info("stats")
+            redis_stats["evictions"] = info.get("evicted_keys")
+            redis_stats["expirations"] = info.get("expired_keys")
+        except Exception as e:
+            log.warning("Failed to read Redis stats: {}", e)
+        return {"l1": self.local_cache.stats(), "l2": redis_stats}
+
+
+class CacheBatch:
+    """Записи и удаления в кэше, отправляемые в Redis одним pipeline.
+
+    Операции копятся в порядке вызова и выполняются при выходе из блока
+    ``async with`` без исключения, вместе с одной публикацией инвалидации для
+    L1 других экземпляров. Свой L1 обновляется после успешного выполнения.
+    """
+
+    def __init__(self, cache_service: CacheService, repeat_deletes: bool = True):
+        self.cache_service = cache_service
+        self.repeat_deletes = repeat_deletes
+        # ("set", ключ, значение, TTL, попадает ли в L1), ("delete", ключ) или ("tag", тег)
+        self._operations: List[Tuple] = []
+
+    def set(self, key: str, value: Any, expire: Optional[int] = None) -> None:
+        """Записать значение, сериализованное кодеком сервиса; TTL по умолчанию CACHE_TTL."""
+        expire = expire or settings.CACHE_TTL
+        serialized_value = self.cache_service.codec.encode(value)
+        self._operations.append(("set", key, serialized_value, expire, True))
+
+    def set_raw(self, key: str, value: Union[str, bytes], expire: int = 300) -> None:
+        """Записать готовую строку только в Redis, минуя L1 и инвалидации."""
+        self._operations.append(("set", key, value, expire, False))
+
+    def delete(self, key: str) -> None:
+        """Удалить ключ."""
+        self._operations.append(("delete", key))
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Удалить несколько ключей."""
+        for key in keys:
+            self.delete(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        """Увеличить версии тегов: записи с ними станут промахами."""
+        for tag in tags:
+            self._operations.append(("tag", tag))
+
+    async def __aenter__(self) -> "CacheBatch":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.execute()
+
+    async def execute(self) -> None:
+        """Отправить накопленные операции в Redis за один запрос."""
+        operations, self._operations = self._operations, []
+        if not operations:
+            return
+        service = self.cache_service
+        invalidated = []
+        deleted = []
+        tags = []
+        async with service.cache_adapter.pipeline() as pipe:
+            for operation in operations:
+                if operation[0] == "set":
+                    _, key, value, expire, cached = operation
+                    pipe.setex(key, expire, value)
+                    if cached:
+                        invalidated.append(key)
+                elif operation[0] == "delete":
+                    _, key = operation
+                    pipe.delete(key)
+                    invalidated.append(key)
+                    deleted.append(key)
+                else:
+                    _, tag = operation
+                    # Версия должна пережить любую запись с этим тегом, иначе после
+                    # истечения счётчика старая запись с версией 0 снова станет актуальной
+                    pipe.incr(tag_key(tag))
+                    pipe.expire(tag_key(tag), settings.CACHE_TAG_TTL)
+                    tags.append(tag)
+            deleted = list(dict.fromkeys(deleted))
+            tags = list(dict.fromkeys(tags))
+            if (invalidated or tags) and settings.CACHE_L1_ENABLED:
+                # Другие экземпляры могли закэшировать прежние значения в L1
+                message = {
+                    "origin": INSTANCE_ID,
+                    "keys": list(dict.fromkeys(invalidated)),
+                }
+                if tags:
+                    message["tags"] = tags
+                pipe.publish(INVALIDATION_CHANNEL, json.dumps(message))
+            await pipe.execute()
+
+        for operation in operations:
+            if operation[0] == "set":
+                _, key, value, expire, cached = operation
+                if cached:
+                    service.local_cache.set(key, value, expire)
+            elif operation[0] == "delete":
+                service.local_cache.delete_many([operation[1]])
+            else:
+                service.local_cache.delete_tags([operation[1]])
+        log.debug("Cache batch executed: {} operations", len(operations))
+        if (deleted or tags) and self.repeat_deletes:
+            service._repeat_delete_after_replica_lag(deleted, tags)
+
+
+class CacheInvalidationListener:
+    """Подписка на инвалидации других экземпляров; пока она активна, работает L1."""
+
+    def __init__(
+        self,
+        cache_adapter: RedisCacheAdapter,
+        local_cache: Optional[LocalCache] = None,
+        retry_delay: float = 1.0,
+        instance_id: str = INSTANCE_ID,
+    ):
+        self.cache_adapter = cache_adapter
+        self.local_cache = local_cache if local_cache is not None else _local_cache
+        self.retry_delay = retry_delay
+        self.instance_id = instance_id
+
+    async def run(self) -> None:
+        """Слушать канал инвалидаций до отмены, переподключаясь при ошибках."""
+        while True:
+            pubsub = self.cache_adapter.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.handle(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Cache invalidation subscription lost: {}", e)
+            finally:
+                # Пока подписки нет, инвалидации теряются - L1 использовать нельзя
+                self.local_cache.deactivate()
+                await pubsub.aclose()
+            await asyncio.sleep(self.retry_delay)
+
+    def handle(self, message: Dict) -> None:
+        """Обработать сообщение pub/sub."""
+        if message["type"] == "subscribe":
+            self.local_cache.activate()
+            log.info("Local cache enabled, subscribed to cache invalidations")
+        elif message["type"] == "message":
+            payload = json.loads(message["data"])
+            if payload["origin"] != self.instance_id:
+                self.local_cache.delete_many(payload["keys"])
+                self.local_cache.delete_tags(payload.get("tags", ()))
+
+
+# Ссылки на фоновые задачи, чтобы их не собрал сборщик мусора
+_pending_deletes: Set[asyncio.Task] = set()
+
+
+_cache_service: Optional[CacheService] = None
+
+
+def get_cache_service() -> CacheService:
+    """Получить общий для процесса сервис кэширования."""
+    global _cache_service
+    if _cache_service is None:
+        _cache_service = CacheService(get_redis_cache_adapter())
+    return _cache_service
+
+
+def reset_cache_service() -> None:
+    """Забыть сервис кэширования, например после закрытия пулов Redis."""
+    global _cache_service
+    _cache_service = None
 
 
-def get_cache_service(
-    adapter: RedisCacheAdapter = get_redis_cache_adapter(),
-) -> CacheService:
-    """Получить экземпляр сервиса кэширования."""
-    return CacheService(adapter)
+def get_local_cache() -> LocalCache:
+    """Получить общий для процесса L1-кэш."""
+    return _local_cache
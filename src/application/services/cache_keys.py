@@ -0,0 +1,68 @@
+"""
+Cache key and tag registry.
+
+Services build cache keys and tags only through these functions, so a key read
+in one service and invalidated in another cannot drift apart.
+
+Tags name the entity whose changes make an entry stale. Entries derived from a
+user's money (account lists, payment lists and the first payment page) carry
+``user_tag(user_id)``; a single ``invalidate_tags`` call makes all of them stale
+at once.
+"""
+
+from typing import Optional
+
+# Префиксы ключей для метрик; более длинный проверяется раньше
+KEY_PREFIXES = ("accounts:user:", "payments:user:", "payment:", "user:")
+
+
+def key_prefix(key: str) -> str:
+    """The registered prefix of a key, used as a metrics label; ``other`` if none."""
+    for prefix in KEY_PREFIXES:
+        if key.startswith(prefix):
+            return prefix
+    return "other"
+
+
+def user_tag(user_id: int) -> str:
+    """Tag of everything derived from the user's accounts and payments."""
+    return f"user:{user_id}"
+
+
+def user_key(user_id: int) -> str:
+    """The user profile."""
+    return f"user:{user_id}"
+
+
+def user_token_version_key(user_id: int) -> str:
+    """Version of the user's access tokens; older tokens are revoked."""
+    return f"token_version:user:{user_id}"
+
+
+def user_accounts_key(user_id: int) -> str:
+    """The list of the user's accounts; tagged with ``user_tag``."""
+    return f"accounts:user:{user_id}"
+
+
+def payment_key(payment_id: int) -> str:
+    """A single payment; payments never change once stored."""
+    return f"payment:{payment_id}"
+
+
+def user_payments_key(user_id: int) -> str:
+    """The full list of the user's payments; tagged with ``user_tag``."""
+    return f"payments:user:{user_id}"
+
+
+def user_payments_page_key(
+    user_id: int, cursor: Optional[str], limit: Optional[int] = None
+) -> str:
+    """
+    A page of the user's payments.
+
+    Every page is tagged with ``user_tag``: ``created_at`` is the start time of
+    the inserting transaction, so a late commit can land behind any cursor.
+    """
+    if cursor is None:
+        return f"payments:user:{user_id}:page:first"
+    return f"payments:user:{user_id}:page:{cursor}:{limit}"
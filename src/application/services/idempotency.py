@@ -0,0 +1,174 @@
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from src.api.v1.schemas.payment import PaymentInDB, WebhookPayload
+from src.application.services.cache import CacheBatch, get_cache_service
+from src.config.config import settings
+from src.core.logger import log
+from src.infrastructure.cache import RedisCacheAdapter
+
+PENDING = b"pending"
+
+
+class IdempotencyService:
+    """
+    Redis-backed idempotency records for webhook transactions.
+
+    A transaction_id is claimed atomically with a short TTL while it is being
+    processed and then replaced with the stored ``PaymentInDB`` response, so
+    provider retries can be answered without touching the database. Redis
+    failures never block processing: the caller falls back to the database
+    unique constraint on ``payments.transaction_id``.
+
+    Attributes:
+        cache_adapter (RedisCacheAdapter): The Redis adapter.
+    """
+
+    def __init__(self, cache_adapter: RedisCacheAdapter):
+        """
+        Initialize the IdempotencyService.
+
+        Args:
+            cache_adapter (RedisCacheAdapter): The Redis adapter.
+        """
+        self.cache_adapter = cache_adapter
+
+    @staticmethod
+    def _key(transaction_id: str) -> str:
+        return f"idempotency:{transaction_id}"
+
+    async def claim(self, transaction_id: str) -> bool:
+        """
+        Atomically claim a transaction for processing.
+
+        Args:
+            transaction_id (str): The transaction ID from the webhook.
+
+        Returns:
+            bool: True if this caller owns the claim, False if the transaction
+            is already claimed or Redis is unavailable.
+        """
+        try:
+            return await self.cache_adapter.set_if_absent(
+                self._key(transaction_id),
+                PENDING,
+                expire=settings.IDEMPOTENCY_CLAIM_TTL,
+            )
+        except RedisError as e:
+            log.warning(
+                "Idempotency claim failed for {transaction_id}: {}",
+                e,
+                transaction_id=transaction_id,
+            )
+            return False
+
+    async def get_result(self, transaction_id: str) -> Optional[PaymentInDB]:
+        """
+        Get the stored response of an already processed transaction.
+
+        Args:
+            transaction_id (str): The transaction ID from the webhook.
+
+        Returns:
+            Optional[PaymentInDB]: The original response, or None if the
+            transaction is still in progress or unknown.
+        """
+        try:
+            data = await self.cache_adapter.get(self._key(transaction_id))
+        except RedisError as e:
+            log.warning(
+                "Idempotency lookup failed for {transaction_id}: {}",
+                e,
+                transaction_id=transaction_id,
+            )
+            return None
+        if not data or data == PENDING:
+            return None
+        return PaymentInDB.model_validate_json(data)
+
+    @staticmethod
+    def matches(payment: PaymentInDB, payload: WebhookPayload) -> bool:
+        """
+        Check that a retry carries the same data as the processed transaction.
+
+        Args:
+            payment (PaymentInDB): The stored response of the transaction.
+            payload (WebhookPayload): The retried webhook payload.
+
+        Returns:
+            bool: True if the user, account and amount are the same.
+        """
+        return (
+            payment.user_id == payload.user_id
+            and payment.account_id == payload.account_id
+            and payment.amount == payload.amount
+        )
+
+    async def complete(
+        self,
+        transaction_id: str,
+        payment: PaymentInDB,
+        batch: Optional[CacheBatch] = None,
+    ) -> None:
+        """
+        Replace the claim with the response of the processed transaction.
+
+        Args:
+            transaction_id (str): The transaction ID from the webhook.
+            payment (PaymentInDB): The response to return for retries.
+            batch (Optional[CacheBatch]): Queue the write into this cache batch
+                instead of sending it right away; errors then surface from the batch.
+        """
+        if batch is not None:
+            batch.set_raw(
+                self._key(transaction_id),
+                payment.model_dump_json(),
+                expire=settings.IDEMPOTENCY_RESULT_TTL,
+            )
+            return
+        try:
+            await self.cache_adapter.set(
+                self._key(transaction_id),
+                payment.model_dump_json(),
+                expire=settings.IDEMPOTENCY_RESULT_TTL,
+            )
+        except RedisError as e:
+            log.warning(
+                "Idempotency store failed for {transaction_id}: {}",
+                e,
+                transaction_id=transaction_id,
+            )
+
+    async def release(self, transaction_id: str) -> None:
+        """
+        Drop the claim of a transaction that failed to process.
+
+        Args:
+            transaction_id (str): The transaction ID from the webhook.
+        """
+        try:
+            await self.cache_adapter.delete(self._key(transaction_id))
+        except RedisError as e:
+            log.warning(
+                "Idempotency release failed for {transaction_id}: {}",
+                e,
+                transaction_id=transaction_id,
+            )
+
+
+_idempotency_service: Optional[IdempotencyService] = None
+
+
+def get_idempotency_service() -> IdempotencyService:
+    """Get the process-wide idempotency service sharing the cache Redis adapter."""
+    global _idempotency_service
+    if _idempotency_service is None:
+        _idempotency_service = IdempotencyService(get_cache_service().cache_adapter)
+    return _idempotency_service
+
+
+def reset_idempotency_service() -> None:
+    """Forget the idempotency service, e.g. after the Redis pools are closed."""
+    global _idempotency_service
+    _idempotency_service = None
@@ -1,14 +1,63 @@
 import hashlib
+from collections import defaultdict
+from datetime import datetime
 from decimal import Decimal
-from typing import Optional, List
+from typing import Dict, Optional, List
 from fastapi import HTTPException
+from redis.exceptions import RedisError
+from sqlalchemy.exc import IntegrityError
 
+from src.application.services import cache_keys
 from src.application.services.cache import CacheService, get_cache_service
+from src.application.services.idempotency import (
+    IdempotencyService,
+    get_idempotency_service,
+)
+from src.application.services.seen_transactions import (
+    SeenTransactionFilter,
+    get_seen_transaction_filter,
+)
 from src.config.config import settings
 from src.infrastructure.repositories.payment import PaymentRepository
 from src.infrastructure.repositories.account import AccountRepository
-from src.api.v1.schemas.payment import WebhookPayload, PaymentInDB
+from src.infrastructure.repositories.user import UserRepository
+from src.api.v1.schemas.pagination import Page, decode_cursor, encode_cursor
+from src.api.v1.schemas.payment import (
+    WebhookPayload,
+    PaymentInDB,
+    PaymentSummary,
+    WebhookResult,
+    WebhookStatus,
+)
 from src.core.logger import log
+from src.core.metrics import registry
+
+# Уникальный индекс payments.transaction_id из начальной миграции
+TRANSACTION_ID_CONSTRAINT = "ix_payments_transaction_id"
+
+_webhooks = registry.counter(
+    "webhooks_total",
+    "Processed webhooks by outcome: a WebhookStatus value, conflict or error.",
+    ["outcome"],
+)
+
+
+def violated_constraint(error: IntegrityError) -> Optional[str]:
+    """
+    Name of the constraint behind an IntegrityError, if the driver reports it.
+
+    Args:
+        error (IntegrityError): The error raised by SQLAlchemy.
+
+    Returns:
+        Optional[str]: The constraint name, or None if it is unknown.
+    """
+    # asyncpg: исключение драйвера - причина обёртки DBAPI в SQLAlchemy
+    for cause in (error.orig, getattr(error.orig, "__cause__", None)):
+        name = getattr(cause, "constraint_name", None)
+        if name:
+            return name
+    return None
 
 
 class PaymentService:
@@ -20,12 +69,14 @@ class PaymentService:
     Attributes:
         payment_repository (PaymentRepository): The repository for payment data access.
         account_repository (AccountRepository): The repository for account data access.
+        user_repository (UserRepository): The repository for user data access.
     """
 
     def __init__(
         self,
         payment_repository: PaymentRepository,
         account_repository: AccountRepository,
+        user_repository: UserRepository,
     ):
         """
         Initialize the PaymentService with the necessary dependencies.
@@ -33,10 +84,14 @@ class PaymentService:
         Args:
             payment_repository (PaymentRepository): The repository for payment data access.
             account_repository (AccountRepository): The repository for account data access.
+            user_repository (UserRepository): The repository for user data access.
         """
         self.payment_repository = payment_repository
         self.account_repository = account_repository
+        self.user_repository = user_repository
         self.cache_service: CacheService = get_cache_service()
+        self.idempotency_service: IdempotencyService = get_idempotency_service()
+        self.seen_filter: SeenTransactionFilter = get_seen_transaction_filter()
 
     @staticmethod
     def verify_signature(payload: WebhookPayload) -> bool:
@@ -54,13 +109,10 @@ class PaymentService:
 
         is_valid = calculated_signature == payload.signature
         log.debug(
-            f"Verifying signature for transaction_id: {payload.transaction_id}, result: {'valid' if is_valid else 'invalid'}"
+            "Verifying signature for transaction_id: {transaction_id}, result: {}",
+            "valid" if is_valid else "invalid",
+            transaction_id=payload.transaction_id,
         )
-
-        # FOR DEBUGGING
-        print(f"{data=}")
-        print(f"{calculated_signature=}")
-
         return is_valid
 
     async def _get_or_create_account(self, account_id: int, user_id: int) -> int:
@@ -80,16 +132,28 @@ class PaymentService:
         account = await self.account_repository.get(account_id)
         if account:
             if account.user_id != user_id:
-                log.error(f"Account {account_id} does not belong to user_id {user_id}")
+                log.error(
+                    "Account {account_id} does not belong to user_id {user_id}",
+                    account_id=account_id,
+                    user_id=user_id,
+                )
                 raise HTTPException(
                     status_code=403,
                     detail=f"Account {account_id} does not belong to user {user_id}",
                 )
-            log.debug(f"Found existing account ID {account_id} for user_id {user_id}")
+            log.debug(
+                "Found existing account ID {account_id} for user_id {user_id}",
+                account_id=account_id,
+                user_id=user_id,
+            )
             return account.id
 
         # Если счёт не существует, создаём его с указанным account_id
-        log.info(f"Creating new account with ID {account_id} for user_id {user_id}")
+        log.info(
+            "Creating new account with ID {account_id} for user_id {user_id}",
+            account_id=account_id,
+            user_id=user_id,
+        )
         new_account = await self.account_repository.create(
             id=account_id, user_id=user_id
         )
@@ -99,6 +163,12 @@ class PaymentService:
         """
         Process a payment from a webhook payload.
 
+        With ``WEBHOOK_ATOMIC_PIPELINE`` enabled the whole webhook runs as a single
+        transaction of set-based statements, otherwise the step-by-step flow is used.
+        With ``IDEMPOTENCY_ENABLED`` retries of processed transactions are answered
+        with the original response stored in Redis, without touching the database;
+        a retry whose user, account or amount differ from the original is rejected.
+
         Args:
             payload (WebhookPayload): The webhook payload containing payment information.
 
@@ -107,45 +177,327 @@ class PaymentService:
 
         Raises:
             ValueError: If the signature is invalid or the transaction has already been processed.
+            HTTPException: 409 if a processed transaction is retried with different data.
         """
-        log.info(f"Processing payment with transaction_id: {payload.transaction_id}")
+        log.info(
+            "Processing payment with transaction_id: {transaction_id}",
+            transaction_id=payload.transaction_id,
+        )
         if not self.verify_signature(payload):
-            log.error(f"Invalid signature for transaction_id: {payload.transaction_id}")
+            log.error(
+                "Invalid signature for transaction_id: {transaction_id}",
+                transaction_id=payload.transaction_id,
+            )
+            _webhooks.labels(WebhookStatus.INVALID_SIGNATURE.value).inc()
             raise ValueError("Invalid signature")
 
-        existing_payment = await self.payment_repository.get_by_transaction_id(
-            payload.transaction_id,
+        claimed = False
+        if settings.IDEMPOTENCY_ENABLED:
+            claimed = await self.idempotency_service.claim(payload.transaction_id)
+            if not claimed:
+                stored_payment = await self.idempotency_service.get_result(
+                    payload.transaction_id
+                )
+                if stored_payment is not None:
+                    if not self.idempotency_service.matches(stored_payment, payload):
+                        log.error(
+                            "Transaction {transaction_id} retried with different data",
+                            transaction_id=payload.transaction_id,
+                        )
+                        _webhooks.labels("conflict").inc()
+                        raise HTTPException(
+                            status_code=409,
+                            detail="Transaction already processed with different data",
+                        )
+                    log.info(
+                        "Duplicate payment answered from idempotency store "
+                        "for transaction_id: {transaction_id}",
+                        transaction_id=payload.transaction_id,
+                    )
+                    _webhooks.labels(WebhookStatus.DUPLICATE.value).inc()
+                    return stored_payment
+                # Транзакция в обработке или Redis недоступен: дубликаты отсечёт уникальный индекс в БД
+
+        try:
+            if settings.WEBHOOK_ATOMIC_PIPELINE:
+                payment_schema = await self._process_payment_atomic(payload)
+            else:
+                payment_schema = await self._process_payment_sequential(payload)
+        except Exception as e:
+            if claimed:
+                await self.idempotency_service.release(payload.transaction_id)
+            # Оба пути сообщают о дубликате через ValueError, о чужом счёте - через 403
+            if isinstance(e, ValueError):
+                outcome = WebhookStatus.DUPLICATE.value
+            elif isinstance(e, HTTPException) and e.status_code == 403:
+                outcome = WebhookStatus.FORBIDDEN.value
+            else:
+                outcome = "error"
+            _webhooks.labels(outcome).inc()
+            raise
+
+        self.seen_filter.add(payment_schema.transaction_id)
+        # Ответ для повторов, кэш платежа и инвалидация списков - один запрос к Redis
+        try:
+            async with self.cache_service.batch() as batch:
+                if settings.IDEMPOTENCY_ENABLED:
+                    await self.idempotency_service.complete(
+                        payload.transaction_id, payment_schema, batch=batch
+                    )
+                batch.set(
+                    cache_keys.payment_key(payment_schema.id),
+                    payment_schema.model_dump(),
+                )
+                # Новый платёж меняет списки платежей и баланс счетов пользователя
+                batch.invalidate_tags([cache_keys.user_tag(payload.user_id)])
+        except RedisError as e:
+            # Платёж уже зафиксирован в БД: сбой Redis не должен превращаться в 500
+            log.error(
+                "Cache update after commit failed for transaction_id: {transaction_id}: {}",
+                e,
+                transaction_id=payload.transaction_id,
+            )
+            if claimed:
+                # Иначе повторы до истечения захвата видели бы "в обработке"
+                await self.idempotency_service.release(payload.transaction_id)
+        log.info(
+            "Payment processed successfully for transaction_id: {transaction_id}",
+            transaction_id=payment_schema.transaction_id,
         )
-        if existing_payment:
-            log.warning(
-                f"Duplicate payment detected for transaction_id: {payload.transaction_id}"
+        _webhooks.labels(WebhookStatus.PROCESSED.value).inc()
+        return payment_schema
+
+    async def _process_payment_sequential(self, payload: WebhookPayload) -> PaymentInDB:
+        """
+        Store the payment step by step: duplicate check, account, payment, balance.
+
+        The duplicate-check SELECT is skipped when the seen transactions filter
+        reports the transaction as definitely new.
+
+        Args:
+            payload (WebhookPayload): The verified webhook payload.
+
+        Returns:
+            PaymentInDB: The stored payment.
+
+        Raises:
+            ValueError: If the transaction has already been processed.
+        """
+        if self.seen_filter.might_contain(payload.transaction_id):
+            existing_payment = await self.payment_repository.get_by_transaction_id(
+                payload.transaction_id,
             )
-            raise ValueError("Transaction already processed")
+            if existing_payment:
+                log.warning(
+                    "Duplicate payment detected for transaction_id: {transaction_id}",
+                    transaction_id=payload.transaction_id,
+                )
+                raise ValueError("Transaction already processed")
 
         account_id = await self._get_or_create_account(
             payload.account_id, payload.user_id
         )
 
-        payment = await self.payment_repository.create(
-            transaction_id=payload.transaction_id,
-            user_id=payload.user_id,
-            account_id=account_id,
-            amount=payload.amount,
-        )
+        try:
+            payment = await self.payment_repository.create(
+                transaction_id=payload.transaction_id,
+                user_id=payload.user_id,
+                account_id=account_id,
+                amount=payload.amount,
+            )
+        except IntegrityError as e:
+            await self.payment_repository.rollback()
+            # Фильтр не знает о платежах других воркеров после заполнения
+            if violated_constraint(e) != TRANSACTION_ID_CONSTRAINT:
+                raise
+            log.warning(
+                "Duplicate payment detected by unique constraint "
+                "for transaction_id: {transaction_id}",
+                transaction_id=payload.transaction_id,
+            )
+            raise ValueError("Transaction already processed")
 
         await self.account_repository.update_balance(account_id, payload.amount)
-        payment_schema = PaymentInDB.model_validate(payment)
+        return PaymentInDB.model_validate(payment)
 
-        # Кэшируем отдельный платеж и инвалидируем список платежей пользователя
-        await self.cache_service.set(
-            f"payment:{payment.id}", payment_schema.model_dump()
-        )
-        await self.cache_service.delete(f"payments:user:{payload.user_id}")
-        log.info(
-            f"Payment processed successfully for transaction_id: {payment.transaction_id}"
-        )
+    async def _process_payment_atomic(self, payload: WebhookPayload) -> PaymentInDB:
+        """
+        Store the payment in one transaction: account upsert, payment insert
+        ignoring duplicates and an atomic balance increment.
+
+        Args:
+            payload (WebhookPayload): The verified webhook payload.
+
+        Returns:
+            PaymentInDB: The stored payment.
+
+        Raises:
+            ValueError: If the transaction has already been processed.
+            HTTPException: If the account belongs to another user.
+        """
+        try:
+            account = await self.account_repository.upsert_for_user(
+                payload.account_id, payload.user_id
+            )
+            if account is None:
+                log.error(
+                    "Account {account_id} does not belong to user_id {user_id}",
+                    account_id=payload.account_id,
+                    user_id=payload.user_id,
+                )
+                raise HTTPException(
+                    status_code=403,
+                    detail=f"Account {payload.account_id} does not belong to user {payload.user_id}",
+                )
+
+            payment = await self.payment_repository.create_if_absent(
+                transaction_id=payload.transaction_id,
+                user_id=payload.user_id,
+                account_id=account.id,
+                amount=payload.amount,
+            )
+            if payment is None:
+                log.warning(
+                    "Duplicate payment detected for transaction_id: {transaction_id}",
+                    transaction_id=payload.transaction_id,
+                )
+                raise ValueError("Transaction already processed")
+
+            await self.account_repository.add_to_balance(account.id, payload.amount)
+            payment_schema = PaymentInDB.model_validate(payment)
+            await self.payment_repository.commit()
+        except Exception:
+            await self.payment_repository.rollback()
+            raise
         return payment_schema
 
+    async def process_payments_batch(
+        self, payloads: List[WebhookPayload]
+    ) -> List[WebhookResult]:
+        """
+        Process a batch of webhook payloads in a single transaction.
+
+        Duplicates are filtered with one set-based query, new payments are inserted
+        with one statement and balance deltas are applied with one grouped UPDATE.
+
+        Args:
+            payloads (List[WebhookPayload]): The webhook payloads to process.
+
+        Returns:
+            List[WebhookResult]: A result for each payload, in the same order.
+        """
+        log.info("Processing batch of {} webhooks", len(payloads))
+        results: List[Optional[WebhookResult]] = [None] * len(payloads)
+        candidates: Dict[str, int] = {}
+        for index, payload in enumerate(payloads):
+            if not self.verify_signature(payload):
+                results[index] = WebhookResult(
+                    transaction_id=payload.transaction_id,
+                    status=WebhookStatus.INVALID_SIGNATURE,
+                    detail="Invalid signature",
+                )
+            elif payload.transaction_id in candidates:
+                results[index] = WebhookResult(
+                    transaction_id=payload.transaction_id,
+                    status=WebhookStatus.DUPLICATE,
+                    detail="Transaction already processed",
+                )
+            else:
+                candidates[payload.transaction_id] = index
+
+        if candidates:
+            try:
+                existing = await self.payment_repository.get_existing_transaction_ids(
+                    candidates
+                )
+                for transaction_id in existing:
+                    results[candidates.pop(transaction_id)] = WebhookResult(
+                        transaction_id=transaction_id,
+                        status=WebhookStatus.DUPLICATE,
+                        detail="Transaction already processed",
+                    )
+
+                # Неизвестный user_id нарушил бы внешний ключ и откатил всю пачку
+                known_users = await self.user_repository.get_existing_ids(
+                    {payloads[index].user_id for index in candidates.values()}
+                )
+                for transaction_id, index in list(candidates.items()):
+                    payload = payloads[index]
+                    if payload.user_id not in known_users:
+                        results[candidates.pop(transaction_id)] = WebhookResult(
+                            transaction_id=transaction_id,
+                            status=WebhookStatus.UNKNOWN_USER,
+                            detail=f"User {payload.user_id} not found",
+                        )
+
+                owners: Dict[int, int] = {}
+                for index in candidates.values():
+                    payload = payloads[index]
+                    owners.setdefault(payload.account_id, payload.user_id)
+                owned = await self.account_repository.upsert_many_for_users(owners)
+
+                rows = []
+                for transaction_id, index in candidates.items():
+                    payload = payloads[index]
+                    if owned.get(payload.account_id) != payload.user_id:
+                        results[index] = WebhookResult(
+                            transaction_id=transaction_id,
+                            status=WebhookStatus.FORBIDDEN,
+                            detail=f"Account {payload.account_id} does not belong to user {payload.user_id}",
+                        )
+                        continue
+                    rows.append(
+                        {
+                            "transaction_id": transaction_id,
+                            "user_id": payload.user_id,
+                            "account_id": payload.account_id,
+                            "amount": payload.amount,
+                        }
+                    )
+
+                payments = await self.payment_repository.create_many_if_absent(rows)
+                inserted = {payment.transaction_id: payment for payment in payments}
+                deltas: Dict[int, Decimal] = defaultdict(Decimal)
+                for row in rows:
+                    transaction_id = row["transaction_id"]
+                    payment = inserted.get(transaction_id)
+                    if payment is None:
+                        # Транзакцию успел записать параллельный запрос
+                        results[candidates[transaction_id]] = WebhookResult(
+                            transaction_id=transaction_id,
+                            status=WebhookStatus.DUPLICATE,
+                            detail="Transaction already processed",
+                        )
+                        continue
+                    deltas[payment.account_id] += payment.amount
+                    self.seen_filter.add(transaction_id)
+                    results[candidates[transaction_id]] = WebhookResult(
+                        transaction_id=transaction_id,
+                        status=WebhookStatus.PROCESSED,
+                        payment=PaymentInDB.model_validate(payment),
+                    )
+
+                await self.account_repository.apply_balance_deltas(deltas)
+                await self.payment_repository.commit()
+            except Exception:
+                await self.payment_repository.rollback()
+                raise
+
+        # Инвалидируем данные затронутых пользователей одним запросом
+        await self.cache_service.invalidate_tags(
+            {
+                cache_keys.user_tag(result.payment.user_id)
+                for result in results
+                if result.status == WebhookStatus.PROCESSED
+            }
+        )
+
+        processed = sum(result.status == WebhookStatus.PROCESSED for result in results)
+        for result in results:
+            _webhooks.labels(result.status.value).inc()
+        log.info("Batch processed: {} of {} webhooks stored", processed, len(payloads))
+        return results
+
     async def get_payment(self, payment_id: int) -> Optional[PaymentInDB]:
         """
         Retrieve a payment by its ID.
@@ -156,18 +508,15 @@ class PaymentService:
         Returns:
             Optional[PaymentInDB]: The payment if found, None otherwise.
         """
-        cache_key = f"payment:{payment_id}"
-        cached_payment = await self.cache_service.get(cache_key)
-        if cached_payment:
-            log.debug(f"Cache hit for payment {payment_id}")
-            return PaymentInDB(**cached_payment)
 
-        payment = await self.payment_repository.get(payment_id)
-        if payment:
-            payment_schema = PaymentInDB.model_validate(payment)
-            await self.cache_service.set(cache_key, payment_schema.model_dump())
-            return payment_schema
-        return None
+        async def load_payment():
+            payment = await self.payment_repository.get(payment_id)
+            return PaymentInDB.model_validate(payment).model_dump() if payment else None
+
+        payment = await self.cache_service.get_or_load(
+            cache_keys.payment_key(payment_id), load_payment
+        )
+        return PaymentInDB(**payment) if payment else None
 
     async def get_payments_by_user_id(self, user_id: int) -> List[PaymentInDB]:
         """
@@ -179,21 +528,88 @@ class PaymentService:
         Returns:
             List[PaymentInDB]: A list of payments belonging to the user.
         """
-        cache_key = f"payments:user:{user_id}"
-        cached_payments = await self.cache_service.get(cache_key)
-        if cached_payments:
-            log.debug(f"Cache hit for payments of user {user_id}")
-            return [PaymentInDB(**payment_dict) for payment_dict in cached_payments]
-
-        payments = await self.payment_repository.get_by_user_id(user_id)
-        payment_schemas = [PaymentInDB.model_validate(payment) for payment in payments]
-        await self.cache_service.set(
-            cache_key,
-            [schema.model_dump() for schema in payment_schemas],
-            expire=settings.CACHE_TTL,
+
+        async def load_payments():
+            payments = await self.payment_repository.get_by_user_id(user_id)
+            log.info(
+                "Retrieved {} payments for user_id: {user_id}",
+                len(payments),
+                user_id=user_id,
+            )
+            return [
+                PaymentInDB.model_validate(payment).model_dump() for payment in payments
+            ]
+
+        payments = await self.cache_service.get_or_load(
+            cache_keys.user_payments_key(user_id),
+            load_payments,
+            ttl=settings.CACHE_TTL,
+            tags=[cache_keys.user_tag(user_id)],
+        )
+        return [PaymentInDB(**payment_dict) for payment_dict in payments]
+
+    async def get_payments_page(
+        self, user_id: int, cursor: Optional[str] = None, limit: Optional[int] = None
+    ) -> Page[PaymentInDB]:
+        """
+        Retrieve one page of a user's payments, newest first.
+
+        Pages are keyed on ``(created_at, id)``, so the cost does not depend on how
+        many payments precede the cursor. The first page of the default size and
+        all pages after a cursor are cached under the user's tag, so a new payment
+        invalidates every page: it may land behind a cursor already handed out.
+
+        Args:
+            user_id (int): The ID of the user.
+            cursor (Optional[str]): The next_cursor of the previous page.
+            limit (Optional[int]): The page size, defaults to PAGE_SIZE_DEFAULT.
+
+        Returns:
+            Page[PaymentInDB]: The payments and the cursor of the next page.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        limit = limit or settings.PAGE_SIZE_DEFAULT
+        after = None
+        if cursor is not None:
+            values = decode_cursor(cursor)
+            try:
+                after = (datetime.fromisoformat(values["c"]), int(values["i"]))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError("Invalid cursor") from e
+
+        # created_at - время начала транзакции: поздно зафиксированный платёж
+        # попадает в уже отданную страницу, поэтому все страницы с тегом пользователя
+        tags = [cache_keys.user_tag(user_id)]
+        if cursor is not None:
+            cache_key = cache_keys.user_payments_page_key(user_id, cursor, limit)
+        elif limit == settings.PAGE_SIZE_DEFAULT:
+            cache_key = cache_keys.user_payments_page_key(user_id, None)
+        else:
+            cache_key = None
+
+        async def load_page():
+            payments = await self.payment_repository.get_page_by_user_id(
+                user_id, limit + 1, after
+            )
+            items = [
+                PaymentInDB.model_validate(payment) for payment in payments[:limit]
+            ]
+            next_cursor = None
+            if len(payments) > limit:
+                last = items[-1]
+                next_cursor = encode_cursor(
+                    {"c": last.created_at.isoformat(), "i": last.id}
+                )
+            return Page[PaymentInDB](items=items, next_cursor=next_cursor).model_dump()
+
+        if cache_key is None:
+            return Page[PaymentInDB](**await load_page())
+        page = await self.cache_service.get_or_load(
+            cache_key, load_page, ttl=settings.CACHE_TTL, tags=tags
         )
-        log.info(f"Retrieved {len(payment_schemas)} payments for user_id: {user_id}")
-        return payment_schemas
+        return Page[PaymentInDB](**page)
 
     async def get_payment_by_transaction_id(
         self, transaction_id: str
@@ -210,6 +626,46 @@ class PaymentService:
         payment = await self.payment_repository.get_by_transaction_id(transaction_id)
         return PaymentInDB.model_validate(payment) if payment else None
 
+    async def get_payment_summary(self, user_id: int) -> PaymentSummary:
+        """
+        Get the count, total and last payment time of a user's payments.
+
+        Reads one row of ``user_payment_summary``, which triggers on the payments
+        table update in the same transaction as every insert.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            PaymentSummary: The summary, zero if the user has no payments.
+        """
+        summary = await self.payment_repository.get_summary(user_id)
+        if summary is None:
+            return PaymentSummary(
+                user_id=user_id, payments_count=0, total_amount=Decimal("0")
+            )
+        return PaymentSummary.model_validate(summary)
+
+    async def compute_payment_summary(self, user_id: int) -> PaymentSummary:
+        """
+        Compute a user's payment summary directly from the payments table.
+
+        Used to reconcile the maintained summary; costs a scan of the user's payments.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            PaymentSummary: The summary computed by a SQL aggregate.
+        """
+        row = await self.payment_repository.aggregate_summary(user_id)
+        return PaymentSummary(
+            user_id=user_id,
+            payments_count=row.payments_count,
+            total_amount=row.total_amount,
+            last_payment_at=row.last_payment_at,
+        )
+
     async def get_total_payments_amount(self, user_id: int) -> Decimal:
         """
         Calculate the total amount of payments for a user.
@@ -220,7 +676,10 @@ class PaymentService:
         Returns:
             Decimal: The total amount of payments.
         """
-        payments = await self.get_payments_by_user_id(user_id)
-        total = sum((payment.amount for payment in payments), Decimal("0"))
-        log.debug(f"Total payments amount for user with user_id: {user_id} is: {total}")
+        total = (await self.get_payment_summary(user_id)).total_amount
+        log.debug(
+            "Total payments amount for user with user_id: {user_id} is: {total}",
+            user_id=user_id,
+            total=total,
+        )
         return total
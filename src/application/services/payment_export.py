@@ -0,0 +1,132 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Callable, List, Optional
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.schemas.payment import ExportFormat
+from src.config.config import settings
+from src.core.logger import log
+from src.infrastructure.repositories.payment import PaymentRepository
+
+EXPORT_COLUMNS = [
+    "id",
+    "transaction_id",
+    "user_id",
+    "account_id",
+    "amount",
+    "created_at",
+]
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+class PaymentExportService:
+    """
+    Streams payment histories as NDJSON or CSV.
+
+    The export opens its own database session: a streaming response outlives the
+    request dependencies, so the request session is already closed by the time
+    the body is sent.
+
+    Attributes:
+        session_factory (Callable[[], AsyncSession]): Factory of database sessions.
+        batch_size (int): Rows fetched per server-side cursor round trip.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        batch_size: Optional[int] = None,
+    ):
+        """
+        Initialize the export service.
+
+        Args:
+            session_factory (Callable[[], AsyncSession]): Factory of database sessions.
+            batch_size (Optional[int]): Rows per cursor round trip, defaults to EXPORT_BATCH_SIZE.
+        """
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+
+    async def export(
+        self,
+        export_format: ExportFormat,
+        user_id: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream the payments as text chunks, one chunk per cursor batch.
+
+        Args:
+            export_format (ExportFormat): NDJSON or CSV.
+            user_id (Optional[int]): Export only this user's payments, all if None.
+            date_from (Optional[datetime]): Inclusive lower bound of created_at.
+            date_to (Optional[datetime]): Exclusive upper bound of created_at.
+
+        Yields:
+            str: Encoded rows; for CSV the header comes first.
+        """
+        encode = (
+            self._encode_csv
+            if export_format == ExportFormat.CSV
+            else self._encode_ndjson
+        )
+        if export_format == ExportFormat.CSV:
+            yield ",".join(EXPORT_COLUMNS) + "\r\n"
+
+        exported = 0
+        async with self.session_factory() as session:
+            repository = PaymentRepository(session)
+            async for rows in repository.stream_for_export(
+                user_id, date_from, date_to, self.batch_size
+            ):
+                exported += len(rows)
+                yield encode(rows)
+        log.info(
+            "Exported {exported} payments as {export_format}, user_id: {user_id}",
+            exported=exported,
+            export_format=export_format.value,
+            user_id=user_id,
+        )
+
+    @staticmethod
+    def _encode_ndjson(rows: List[Row]) -> str:
+        return "".join(
+            json.dumps(
+                {
+                    "id": row.id,
+                    "transaction_id": row.transaction_id,
+                    "user_id": row.user_id,
+                    "account_id": row.account_id,
+                    "amount": str(row.amount),
+                    "created_at": row.created_at.isoformat(),
+                }
+            )
+            + "\n"
+            for row in rows
+        )
+
+    @staticmethod
+    def _encode_csv(rows: List[Row]) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(
+            (
+                row.id,
+                row.transaction_id,
+                row.user_id,
+                row.account_id,
+                row.amount,
+                row.created_at.isoformat(),
+            )
+            for row in rows
+        )
+        return buffer.getvalue()
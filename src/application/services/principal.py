@@ -0,0 +1,246 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from jose import JWTError, jwt
+from redis.exceptions import RedisError
+
+from src.api.v1.schemas.user import UserInDB
+from src.application.services import cache_keys
+from src.config.config import settings
+from src.core.logger import log
+from src.infrastructure.cache import RedisCacheAdapter, get_redis_cache_adapter
+
+# Утверждения, без которых токен нельзя разрешить без обращения к БД
+PRINCIPAL_CLAIMS = ("email", "full_name", "is_admin", "ver")
+
+
+class PrincipalResolver:
+    """
+    Resolves the current user from the access token alone.
+
+    Tokens carry the fields of ``UserInDB`` and the user's token version.
+    Verified tokens are kept in an in-process LRU keyed by the token hash, so
+    repeated requests skip the signature check as well. Revocation bumps the
+    user's token version in Redis; each process re-reads a version at most
+    every ``version_refresh`` seconds, which bounds how long a revoked token
+    keeps working on other workers. Tokens are issued with the version read
+    from Redis, never the local copy.
+
+    The version keys are the only record of revocations and have no TTL, so
+    Redis must keep them: ``maxmemory-policy noeviction`` (or a ``volatile-*``
+    policy) and persistence (AOF or RDB). A token whose version is ahead of
+    the stored one shows the counter was lost and is rejected, but tokens
+    revoked before such a loss are accepted again until they expire.
+
+    Attributes:
+        cache_adapter (RedisCacheAdapter): Where token versions are stored.
+        max_size (int): Maximum number of cached tokens and versions.
+        version_refresh (float): Seconds a token version is trusted locally.
+    """
+
+    def __init__(
+        self,
+        cache_adapter: RedisCacheAdapter,
+        max_size: int,
+        version_refresh: float,
+    ):
+        """
+        Initialize the resolver with empty caches.
+
+        Args:
+            cache_adapter (RedisCacheAdapter): Where token versions are stored.
+            max_size (int): Maximum number of cached tokens and versions.
+            version_refresh (float): Seconds a token version is trusted locally.
+        """
+        self.cache_adapter = cache_adapter
+        self.max_size = max_size
+        self.version_refresh = version_refresh
+        # хэш токена -> (exp, версия токена, пользователь)
+        self._tokens: "OrderedDict[str, Tuple[float, int, UserInDB]]" = OrderedDict()
+        # id пользователя -> (когда прочитана, версия)
+        self._versions: "OrderedDict[int, Tuple[float, int]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._version_reads = 0
+
+    async def resolve(self, token: str) -> Optional[UserInDB]:
+        """
+        Get the user an access token was issued to.
+
+        Args:
+            token (str): The bearer token.
+
+        Returns:
+            Optional[UserInDB]: The user, or None if the token lacks the claims
+            or the token version is unavailable; the caller then loads the user.
+
+        Raises:
+            JWTError: If the token is invalid, expired or revoked.
+        """
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        entry = self._tokens.get(token_hash)
+        if entry is not None and entry[0] > time.time():
+            self._tokens.move_to_end(token_hash)
+            self._hits += 1
+            _, token_version, user = entry
+        else:
+            self._tokens.pop(token_hash, None)
+            self._misses += 1
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+            if payload.get("sub") is None:
+                raise JWTError("Token has no subject")
+            if any(claim not in payload for claim in PRINCIPAL_CLAIMS):
+                return None
+            token_version = payload["ver"]
+            user = UserInDB(
+                id=int(payload["sub"]),
+                email=payload["email"],
+                full_name=payload["full_name"],
+                is_admin=payload["is_admin"],
+            )
+            self._tokens[token_hash] = (payload["exp"], token_version, user)
+            if len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+
+        try:
+            current_version = await self.token_version(user.id)
+            if token_version > current_version:
+                # Токен выдан после отзыва, о котором этот процесс ещё не знает
+                current_version = await self.token_version(user.id, fresh=True)
+        except RedisError as e:
+            log.warning(
+                "Token version of user {user_id} is unavailable: {}",
+                e,
+                user_id=user.id,
+            )
+            return None
+        if token_version < current_version:
+            self._tokens.pop(token_hash, None)
+            raise JWTError("Token has been revoked")
+        if token_version > current_version:
+            # Счётчик в Redis потерян (вытеснен или сброшен): отзывам больше нельзя верить
+            log.error(
+                "Token version {token_version} of user {user_id} is ahead of "
+                "the stored version {current_version}",
+                token_version=token_version,
+                user_id=user.id,
+                current_version=current_version,
+            )
+            self._tokens.pop(token_hash, None)
+            raise JWTError("Token version is unknown")
+        return user
+
+    async def token_version(self, user_id: int, fresh: bool = False) -> int:
+        """
+        Get the user's current token version, re-reading it when the local copy is old.
+
+        Args:
+            user_id (int): The user's ID.
+            fresh (bool): Read the version from Redis even if the local copy is recent.
+
+        Returns:
+            int: The version; 0 if tokens of the user were never revoked.
+        """
+        entry = self._versions.get(user_id)
+        if (
+            not fresh
+            and entry is not None
+            and time.monotonic() - entry[0] < self.version_refresh
+        ):
+            return entry[1]
+        self._version_reads += 1
+        data = await self.cache_adapter.get(cache_keys.user_token_version_key(user_id))
+        version = int(data) if data is not None else 0
+        self._remember_version(user_id, version)
+        return version
+
+    async def claims(self, user: UserInDB) -> Dict:
+        """
+        Build the access token claims for a user.
+
+        The version is read from Redis, not the local copy: a revocation made on
+        another worker must not be carried into a new token. Without Redis the
+        version is unknown and only ``sub`` is issued, so such tokens are always
+        resolved through the database.
+
+        Args:
+            user (UserInDB): The authenticated user.
+
+        Returns:
+            Dict: The claims, without ``exp``.
+        """
+        claims = {"sub": str(user.id)}
+        try:
+            version = await self.token_version(user.id, fresh=True)
+        except RedisError as e:
+            log.warning(
+                "Issuing a token without claims for user {user_id}: {}",
+                e,
+                user_id=user.id,
+            )
+            return claims
+        claims.update(
+            email=user.email,
+            full_name=user.full_name,
+            is_admin=user.is_admin,
+            ver=version,
+        )
+        return claims
+
+    async def revoke(self, user_id: int) -> None:
+        """
+        Revoke all access tokens issued to the user so far.
+
+        Other processes stop accepting them within ``version_refresh`` seconds.
+
+        Args:
+            user_id (int): The user's ID.
+        """
+        version = await self.cache_adapter.incr(
+            cache_keys.user_token_version_key(user_id)
+        )
+        self._remember_version(user_id, version)
+        log.info(
+            "Access tokens of user {user_id} revoked, version {version}",
+            user_id=user_id,
+            version=version,
+        )
+
+    def _remember_version(self, user_id: int, version: int) -> None:
+        self._versions[user_id] = (time.monotonic(), version)
+        self._versions.move_to_end(user_id)
+        if len(self._versions) > self.max_size:
+            self._versions.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """Token cache hits and misses, cached entries and version reads."""
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "tokens": len(self._tokens),
+            "versions": len(self._versions),
+            "version_reads": self._version_reads,
+        }
+
+
+_principal_resolver: Optional[PrincipalResolver] = None
+
+
+def get_principal_resolver() -> PrincipalResolver:
+    """Get the process-wide principal resolver."""
+    global _principal_resolver
+    if _principal_resolver is None:
+        _principal_resolver = PrincipalResolver(
+            get_redis_cache_adapter(),
+            settings.AUTH_TOKEN_CACHE_SIZE,
+            settings.AUTH_TOKEN_VERSION_REFRESH,
+        )
+    return _principal_resolver
+
+
+def reset_principal_resolver() -> None:
+    """Forget the process-wide resolver; the next call creates a new one."""
+    global _principal_resolver
+    _principal_resolver = None
@@ -0,0 +1,114 @@
+import time
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.config import settings
+from src.core.bloom import BloomFilter
+from src.core.logger import log
+from src.infrastructure.repositories.payment import PaymentRepository
+
+
+class SeenTransactionFilter:
+    """
+    In-process Bloom filter of processed transaction IDs.
+
+    The filter is seeded from the ``payments`` table at startup and updated on
+    every stored payment. A "definitely new" answer lets the webhook skip the
+    duplicate-check SELECT; "maybe seen" still goes to the database. Payments
+    stored by other workers after seeding are not in this filter, so the
+    database unique constraint stays the source of truth.
+
+    Attributes:
+        capacity (int): Expected number of transactions.
+        error_rate (float): Target false-positive rate at full capacity.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Initialize the filter. Memory is allocated when seeding starts.
+
+        Args:
+            capacity (int): Expected number of transactions.
+            error_rate (float): Target false-positive rate at full capacity.
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bloom: Optional[BloomFilter] = None
+        self.ready = False
+
+    def might_contain(self, transaction_id: str) -> bool:
+        """
+        Check whether the transaction may have been processed already.
+
+        Args:
+            transaction_id (str): The transaction ID from the webhook.
+
+        Returns:
+            bool: False only if the transaction is definitely new.
+        """
+        if not self.ready:
+            return True
+        return transaction_id in self.bloom
+
+    def add(self, transaction_id: str) -> None:
+        """
+        Record a stored transaction.
+
+        Args:
+            transaction_id (str): The transaction ID of the stored payment.
+        """
+        if self.bloom is not None:
+            self.bloom.add(transaction_id)
+
+    async def seed(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        batch_size: int = 10000,
+    ) -> None:
+        """
+        Fill the filter by streaming all transaction IDs from the database.
+
+        Args:
+            session_factory (Callable[[], AsyncSession]): Factory of database sessions.
+            batch_size (int): Rows fetched per server-side cursor round trip.
+        """
+        self.ready = False
+        self.bloom = BloomFilter(self.capacity, self.error_rate)
+        started = time.monotonic()
+        try:
+            async with session_factory() as session:
+                repository = PaymentRepository(session)
+                async for transaction_id in repository.stream_transaction_ids(
+                    batch_size
+                ):
+                    self.bloom.add(transaction_id)
+        except Exception as e:
+            # Неготовый фильтр безопасен: все проверки идут в БД
+            log.error("Failed to seed seen transactions filter: {}", e)
+            return
+        self.ready = True
+        log.info(
+            "Seen transactions filter seeded in {:.1f}s: {}",
+            time.monotonic() - started,
+            self.stats(),
+        )
+
+    def stats(self) -> dict:
+        """Get memory use and false-positive rate of the filter."""
+        if self.bloom is None:
+            return {"ready": False}
+        return {"ready": self.ready, **self.bloom.stats()}
+
+
+_seen_transaction_filter: Optional[SeenTransactionFilter] = None
+
+
+def get_seen_transaction_filter() -> SeenTransactionFilter:
+    """Get the process-wide filter of seen transaction IDs."""
+    global _seen_transaction_filter
+    if _seen_transaction_filter is None:
+        _seen_transaction_filter = SeenTransactionFilter(
+            settings.SEEN_FILTER_CAPACITY, settings.SEEN_FILTER_ERROR_RATE
+        )
+    return _seen_transaction_filter
@@ -3,10 +3,14 @@ from sqlalchemy.exc import IntegrityError
 from typing import Optional, List
 
 from src.application.services.auth import AuthService
+from src.application.services import cache_keys
 from src.application.services.cache import CacheService, get_cache_service
+from src.application.services.principal import get_principal_resolver
 from src.infrastructure.repositories.user import UserRepository
 from src.core.logger import log
+from src.api.v1.schemas.pagination import Page, decode_cursor, encode_cursor
 from src.api.v1.schemas.user import UserCreate, UserUpdate, UserInDB, UserWithAccounts
+from src.config.config import settings
 
 
 class UserService:
@@ -25,8 +29,8 @@ class UserService:
         Returns:
             UserInDB: The created user object
         """
-        log.info(f"Creating user with email: {user_data.email}")
-        hashed_password = self.auth_service.get_password_hash(user_data.password)
+        log.info("Creating user with email: {email}", email=user_data.email)
+        hashed_password = await self.auth_service.get_password_hash(user_data.password)
         try:
             user = await self.user_repository.create(
                 email=user_data.email,
@@ -34,14 +38,19 @@ class UserService:
                 hashed_password=hashed_password,
             )
             created_user = UserInDB.model_validate(user)
-            await self.cache_service.set(f"user:{user.id}", created_user.model_dump())
+            await self.cache_service.set(
+                cache_keys.user_key(user.id), created_user.model_dump()
+            )
             log.info(
-                f"User created successfully with ID: {user.id}, email: {user.email}"
+                "User created successfully with ID: {user_id}, email: {email}",
+                user_id=user.id,
+                email=user.email,
             )
             return created_user
         except IntegrityError as e:
             log.warning(
-                f"Failed to create user: email {user_data.email} already exists"
+                "Failed to create user: email {email} already exists",
+                email=user_data.email,
             )
             raise HTTPException(
                 status_code=400,
@@ -61,31 +70,38 @@ class UserService:
         Returns:
             Optional[UserInDB]: The updated user object if successful, otherwise None
         """
-        log.info(f"Updating user with ID: {user_id}")
+        log.info("Updating user with ID: {user_id}", user_id=user_id)
         update_data = user_data.model_dump(exclude_unset=True)
         if "password" in update_data:
-            update_data["hashed_password"] = self.auth_service.get_password_hash(
+            update_data["hashed_password"] = await self.auth_service.get_password_hash(
                 update_data.pop("password")
             )
         updated_user = await self.user_repository.update(user_id, **update_data)
         if updated_user:
             updated_user_schema = UserInDB.model_validate(updated_user)
             await self.cache_service.set(
-                f"user:{user_id}", updated_user_schema.model_dump()
+                cache_keys.user_key(user_id), updated_user_schema.model_dump()
             )
-            log.info(f"User updated successfully for ID: {user_id}")
+            # Выданные токены несут старые email, имя и пароль больше не подтверждают
+            await get_principal_resolver().revoke(user_id)
+            log.info("User updated successfully for ID: {user_id}", user_id=user_id)
             return updated_user_schema
-        log.warning(f"User not found for update with ID: {user_id}")
+        log.warning("User not found for update with ID: {user_id}", user_id=user_id)
         return None
 
     async def delete_user(self, user_id: int):
-        log.info(f"Deleting user with ID: {user_id}")
+        log.info("Deleting user with ID: {user_id}", user_id=user_id)
         success = await self.user_repository.delete(user_id)
         if success:
-            await self.cache_service.delete(f"user:{user_id}")
-            log.info(f"User deleted successfully with ID: {user_id}")
+            await get_principal_resolver().revoke(user_id)
+            async with self.cache_service.batch() as batch:
+                batch.delete(cache_keys.user_key(user_id))
+                batch.invalidate_tags([cache_keys.user_tag(user_id)])
+            log.info("User deleted successfully with ID: {user_id}", user_id=user_id)
         else:
-            log.warning(f"User not found for deletion with ID: {user_id}")
+            log.warning(
+                "User not found for deletion with ID: {user_id}", user_id=user_id
+            )
         return success
 
     async def get_user(self, user_id: int) -> Optional[UserInDB]:
@@ -98,18 +114,18 @@ class UserService:
         Returns:
             Optional[UserInDB]: The user object if found, otherwise None
         """
-        cache_key = f"user:{user_id}"
-        cached_user = await self.cache_service.get(cache_key)
-        if cached_user:
-            log.debug(f"Cache hit for user_id: {user_id}")
-            return UserInDB(**cached_user)
-        user = await self.user_repository.get(user_id)
-        if user:
-            user_schema = UserInDB.model_validate(user)
-            await self.cache_service.set(cache_key, user_schema.model_dump())
-            log.info(f"User retrieved from DB with ID: {user_id}")
-            return user_schema
-        return None
+
+        async def load_user():
+            user = await self.user_repository.get(user_id)
+            if user is None:
+                return None
+            log.info("User retrieved from DB with ID: {user_id}", user_id=user_id)
+            return UserInDB.model_validate(user).model_dump()
+
+        user = await self.cache_service.get_or_load(
+            cache_keys.user_key(user_id), load_user
+        )
+        return UserInDB(**user) if user else None
 
     async def get_users(self) -> List[UserWithAccounts]:
         """
@@ -119,5 +135,35 @@ class UserService:
             List[UserWithAccounts]: List of all users with their accounts
         """
         users = await self.user_repository.get_all_with_accounts()
-        log.info(f"Retrieved {len(users)} users with accounts")
+        log.info("Retrieved {} users with accounts", len(users))
         return [UserWithAccounts.model_validate(user) for user in users]
+
+    async def get_users_page(
+        self, cursor: Optional[str] = None, limit: Optional[int] = None
+    ) -> Page[UserWithAccounts]:
+        """
+        Get one page of users with their accounts, ordered by ID.
+
+        Args:
+            cursor (Optional[str]): The next_cursor of the previous page.
+            limit (Optional[int]): The page size, defaults to PAGE_SIZE_DEFAULT.
+
+        Returns:
+            Page[UserWithAccounts]: The users and the cursor of the next page
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        limit = limit or settings.PAGE_SIZE_DEFAULT
+        after_id = None
+        if cursor is not None:
+            try:
+                after_id = int(decode_cursor(cursor)["i"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError("Invalid cursor") from e
+
+        users = await self.user_repository.get_page_with_accounts(limit + 1, after_id)
+        items = [UserWithAccounts.model_validate(user) for user in users[:limit]]
+        next_cursor = encode_cursor({"i": items[-1].id}) if len(users) > limit else None
+        log.info("Retrieved page of {} users with accounts", len(items))
+        return Page[UserWithAccounts](items=items, next_cursor=next_cursor)
@@ -0,0 +1,229 @@
+import asyncio
+import os
+import socket
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.v1.schemas.payment import WebhookPayload, WebhookStatus
+from src.application.services.base import ServiceFactory
+from src.config.config import settings
+from src.core.logger import log
+from src.infrastructure.queue import QueuedMessage, WebhookQueue
+
+
+class WebhookConsumerPool:
+    """
+    Pool of in-process asyncio consumers that drain the webhook queue in micro-batches.
+
+    Each consumer collects up to ``batch_size`` messages or waits at most
+    ``max_wait_ms`` after the first one, then processes the batch in a single
+    transaction and acknowledges it. Payloads that fail validation are
+    dead-lettered at once; when a batch fails, its messages are retried one by one
+    so a single poison message cannot block the rest, and a message that keeps
+    failing is dead-lettered after ``max_deliveries`` attempts.
+
+    Attributes:
+        queue (WebhookQueue): The queue with accepted webhooks.
+        session_factory (Callable[[], AsyncSession]): Factory of database sessions.
+    """
+
+    def __init__(
+        self,
+        queue: WebhookQueue,
+        session_factory: Callable[[], AsyncSession],
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_wait_ms: Optional[int] = None,
+        max_deliveries: Optional[int] = None,
+        claim_interval_ms: Optional[int] = None,
+        idle_block_ms: int = 1000,
+        retry_backoff: float = 1.0,
+    ):
+        """
+        Initialize the consumer pool. Omitted arguments are taken from settings.
+
+        Args:
+            queue (WebhookQueue): The queue with accepted webhooks.
+            session_factory (Callable[[], AsyncSession]): Factory of database sessions.
+            workers (Optional[int]): Number of concurrent consumers.
+            batch_size (Optional[int]): Maximum number of webhooks in one batch.
+            max_wait_ms (Optional[int]): Maximum time to fill a batch after its first message.
+            max_deliveries (Optional[int]): Attempts before a message is dead-lettered.
+            claim_interval_ms (Optional[int]): How often a consumer looks for stale messages.
+            idle_block_ms (int): How long an idle consumer waits for the first message.
+            retry_backoff (float): Pause in seconds after a failed batch.
+        """
+        self.queue = queue
+        self.session_factory = session_factory
+        self.workers = workers or settings.WEBHOOK_WORKERS
+        self.batch_size = batch_size or settings.WEBHOOK_MICROBATCH_SIZE
+        self.max_wait_ms = (
+            max_wait_ms
+            if max_wait_ms is not None
+            else settings.WEBHOOK_MICROBATCH_WAIT_MS
+        )
+        self.max_deliveries = max_deliveries or settings.WEBHOOK_QUEUE_MAX_DELIVERIES
+        self.claim_interval_ms = (
+            claim_interval_ms
+            if claim_interval_ms is not None
+            else settings.WEBHOOK_QUEUE_CLAIM_INTERVAL_MS
+        )
+        self.idle_block_ms = idle_block_ms
+        self.retry_backoff = retry_backoff
+        self._stopping = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._next_claim_at: Dict[str, float] = {}
+        self._name_prefix = f"{socket.gethostname()}-{os.getpid()}"
+
+    async def start(self) -> None:
+        """Create the queue resources and start the consumers."""
+        await self.queue.setup()
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._consume(f"{self._name_prefix}-{index}"))
+            for index in range(self.workers)
+        ]
+        log.info("Started {workers} webhook consumers", workers=self.workers)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let the consumers finish their current batch and stop them."""
+        self._stopping.set()
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+        log.info("Webhook consumers stopped")
+
+    async def collect_batch(self, consumer: str) -> List[QueuedMessage]:
+        """
+        Collect up to batch_size messages or whatever arrived within max_wait_ms.
+
+        Stale messages of crashed consumers are claimed at most once per
+        claim_interval_ms, not on every read.
+
+        Args:
+            consumer (str): The consumer name.
+
+        Returns:
+            List[QueuedMessage]: The collected messages, empty if the queue was idle.
+        """
+        now = time.monotonic()
+        if now >= self._next_claim_at.get(consumer, 0):
+            self._next_claim_at[consumer] = now + self.claim_interval_ms / 1000
+            claimed = await self.queue.claim_stale(consumer, self.batch_size)
+            if claimed:
+                return claimed
+
+        batch = await self.queue.read(consumer, self.batch_size, self.idle_block_ms)
+        if not batch:
+            return batch
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.batch_size:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            messages = await self.queue.read(
+                consumer, self.batch_size - len(batch), remaining_ms
+            )
+            if not messages:
+                break
+            batch.extend(messages)
+        return batch
+
+    async def process_batch(self, batch: List[QueuedMessage]) -> bool:
+        """
+        Process a batch in one transaction and acknowledge it.
+
+        Args:
+            batch (List[QueuedMessage]): The messages to process.
+
+        Returns:
+            bool: False if some messages failed and were left for another attempt.
+        """
+        items: List[Tuple[QueuedMessage, WebhookPayload]] = []
+        for message in batch:
+            try:
+                items.append(
+                    (message, WebhookPayload.model_validate_json(message.data))
+                )
+            except ValidationError as e:
+                log.error(
+                    "Dead-lettering invalid queued webhook {message_id}: {}",
+                    e,
+                    message_id=message.id,
+                )
+                await self.queue.dead_letter(message, f"invalid payload: {e}")
+        if not items:
+            return True
+
+        try:
+            await self._store(items)
+            return True
+        except Exception as e:
+            log.error("Failed to process batch of {} webhooks: {}", len(items), e)
+            if len(items) == 1:
+                await self._retry_or_dead_letter(items[0][0], str(e))
+                return False
+
+        # Обрабатываем по одному, чтобы сбойное сообщение не блокировало остальные
+        all_stored = True
+        for item in items:
+            try:
+                await self._store([item])
+            except Exception as e:
+                all_stored = False
+                await self._retry_or_dead_letter(item[0], str(e))
+        return all_stored
+
+    async def _store(self, items: List[Tuple[QueuedMessage, WebhookPayload]]) -> None:
+        async with self.session_factory() as session:
+            payment_service = ServiceFactory(session).get_payment_service()
+            results = await payment_service.process_payments_batch(
+                [payload for _, payload in items]
+            )
+        await self.queue.ack([message.id for message, _ in items])
+
+        for result in results:
+            if result.status not in (WebhookStatus.PROCESSED, WebhookStatus.DUPLICATE):
+                log.warning(
+                    "Queued webhook rejected for transaction_id: {transaction_id}, "
+                    "status: {status}",
+                    transaction_id=result.transaction_id,
+                    status=result.status.value,
+                )
+
+    async def _retry_or_dead_letter(self, message: QueuedMessage, reason: str) -> None:
+        if message.deliveries >= self.max_deliveries:
+            log.error(
+                "Dead-lettering queued webhook {message_id} after "
+                "{deliveries} deliveries: {reason}",
+                message_id=message.id,
+                deliveries=message.deliveries,
+                reason=reason,
+            )
+            await self.queue.dead_letter(message, reason)
+        else:
+            await self.queue.release([message])
+
+    async def _consume(self, consumer: str) -> None:
+        log.debug("Webhook consumer {consumer} started", consumer=consumer)
+        while not self._stopping.is_set():
+            try:
+                batch = await self.collect_batch(consumer)
+                if batch and not await self.process_batch(batch):
+                    await asyncio.sleep(self.retry_backoff)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(
+                    "Webhook consumer {consumer} failed to read the queue: {}",
+                    e,
+                    consumer=consumer,
+                )
+                await asyncio.sleep(self.retry_backoff)
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -6,15 +7,94 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 class Settings(BaseSettings):
     DATABASE_URL: str = ""
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_HEALTH_CHECK_INTERVAL: float = 5.0
+    REPLICA_READ_YOUR_WRITES_SECONDS: int = 10
     SECRET_KEY: str = ""
     WEBHOOK_SECRET_KEY: str = ""
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PASSWORD_HASH_WORKERS: int = 4
+    AUTH_STATELESS: bool = False
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_TOKEN_VERSION_REFRESH: float = 30.0
     API_PREFIX: str = "/api/v1"
     TOKEN_URL: str = "/auth/token"
 
+    WEBHOOK_ATOMIC_PIPELINE: bool = False
+    WEBHOOK_BATCH_MAX_SIZE: int = 1000
+
+    IDEMPOTENCY_ENABLED: bool = False
+    IDEMPOTENCY_CLAIM_TTL: int = 30
+    IDEMPOTENCY_RESULT_TTL: int = 86400
+
+    SEEN_FILTER_ENABLED: bool = False
+    SEEN_FILTER_CAPACITY: int = 10_000_000
+    SEEN_FILTER_ERROR_RATE: float = 0.01
+
+    WEBHOOK_ASYNC_MODE: bool = False
+    WEBHOOK_QUEUE_BACKEND: str = "redis"
+    WEBHOOK_QUEUE_STREAM: str = "webhooks"
+    WEBHOOK_QUEUE_GROUP: str = "webhook-workers"
+    WEBHOOK_QUEUE_CLAIM_IDLE_MS: int = 30000
+    WEBHOOK_QUEUE_CLAIM_INTERVAL_MS: int = 5000
+    WEBHOOK_QUEUE_MAX_DELIVERIES: int = 5
+    WEBHOOK_WORKERS: int = 4
+    WEBHOOK_MICROBATCH_SIZE: int = 100
+    WEBHOOK_MICROBATCH_WAIT_MS: int = 50
+
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
-    CACHE_TTL: int = 300
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    CACHE_TTL: int = 3600
+    CACHE_TAG_TTL: int = 86400
+    CACHE_L1_ENABLED: bool = True
+    CACHE_L1_MAX_SIZE: int = 10000
+    CACHE_L1_TTL: float = 30.0
+    CACHE_LOCK_TTL: int = 5
+    CACHE_LOCK_WAIT: float = 2.0
+    CACHE_EARLY_REFRESH_BETA: float = 1.0
+    CACHE_CODEC: str = "auto"
+    CACHE_COMPRESS_MIN_BYTES: int = 1024
+
+    METRICS_ENABLED: bool = True
+    METRICS_LOOP_LAG_INTERVAL: float = 0.5
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_SLOW_MS: float = 1000.0
+    PROFILING_BUFFER_SIZE: int = 100
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILING_N_PLUS_ONE_THRESHOLD: int = 5
+
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE: str = "logs/app.log"
+    LOG_FILE_LEVEL: str = "DEBUG"
+    LOG_JSON: bool = True
+    LOG_ENQUEUE: bool = True
+    LOG_SAMPLE_RATES: str = "DEBUG=0.1"
+
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 500
+    EXPORT_BATCH_SIZE: int = 1000
+
+    @property
+    def replica_urls(self) -> List[str]:
+        return [
+            url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()
+        ]
 
     model_config = SettingsConfigDict(
         env_file=[BASE_DIR / ".env.sample", BASE_DIR / ".env"],
@@ -0,0 +1,80 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set of strings.
+
+    ``item in bloom`` is never False for an added item and is True for an item
+    that was not added with probability close to ``error_rate`` while the
+    filter holds at most ``capacity`` items.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("Error rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.bits_set = 0
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        """Add an item to the filter; items already present are not counted again."""
+        bits = self.bits
+        changed = False
+        for position in self._positions(item):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                self.bits_set += 1
+                changed = True
+        # Повторное добавление не меняет заполненность: не завышаем счётчик
+        if changed:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def __len__(self) -> int:
+        """Items that set at least one bit; slightly low once false positives occur."""
+        return self.count
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+    @property
+    def estimated_error_rate(self) -> float:
+        """Current false-positive probability estimated from the fill ratio."""
+        return (self.bits_set / self.num_bits) ** self.num_hashes
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "target_error_rate": self.error_rate,
+            "estimated_error_rate": self.estimated_error_rate,
+            "items": self.count,
+            "bits": self.num_bits,
+            "hashes": self.num_hashes,
+            "fill_ratio": self.bits_set / self.num_bits,
+            "memory_bytes": self.memory_bytes,
+        }
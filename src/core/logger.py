@@ -1,21 +1,212 @@
-from loguru import logger
+import asyncio
+import json
+import queue
+import random
 import sys
+import threading
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, TextIO
+
+from loguru import logger
+
+from src.config.config import settings
+
+TEXT_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level} | {module} | {message}"
+# Записи этого уровня и выше не отбрасываются при переполненной очереди
+ERROR_LEVEL_NO = 40
+_STOP = object()
+
+
+class RotatingFile:
+    """
+    Append-only log file that is moved aside once it reaches ``max_bytes``.
+
+    Rotated files get a timestamp before the suffix, as loguru names them.
+    Only the writer thread of a ``QueueSink`` uses it.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def write(self, message: str) -> None:
+        if self._size and self._size + len(message) > self.max_bytes:
+            self._rotate()
+        self._file.write(message)
+        self._size += len(message)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S_%f")
+        self.path.rename(
+            self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        )
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class QueueSink:
+    """
+    Loguru sink that hands formatted records to a writer thread.
+
+    The calling thread only puts the string into an in-process queue, so a
+    slow disk or terminal never delays a request. loguru's own ``enqueue``
+    pickles every record through a multiprocessing pipe, which costs the
+    caller more than writing the file directly. When the queue is full,
+    records below ERROR are dropped and counted instead of blocking.
+
+    Attributes:
+        stream (TextIO): Where the writer thread writes.
+        dropped (int): Records dropped because the queue was full.
+    """
+
+    def __init__(self, stream: TextIO, max_size: int = 10000):
+        """
+        Start the writer thread.
+
+        Args:
+            stream (TextIO): Where the writer thread writes.
+            max_size (int): Maximum number of records waiting to be written.
+        """
+        self.stream = stream
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(max_size)
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message) -> None:
+        try:
+            self._queue.put(message, block=message.record["level"].no >= ERROR_LEVEL_NO)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            message = self._queue.get()
+            try:
+                if message is _STOP:
+                    return
+                self.stream.write(message)
+                # Сбрасываем буфер, когда очередь разобрана, а не после каждой записи
+                if self._queue.empty():
+                    self.stream.flush()
+            except Exception as e:
+                # Через логгер не сообщить: он и сломан; пишем в исходный stderr процесса
+                if sys.__stderr__ is not None:
+                    sys.__stderr__.write(f"Log writer failed: {e}\n")
+            finally:
+                self._queue.task_done()
+
+    def drain(self) -> None:
+        """Wait until every queued record is written."""
+        self._queue.join()
+
+    async def complete(self) -> None:
+        """Called by ``await logger.complete()``."""
+        await asyncio.to_thread(self.drain)
+
+    def stop(self) -> None:
+        """Called by loguru when the sink is removed, including at exit."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        if isinstance(self.stream, RotatingFile):
+            self.stream.close()
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """
+    Parse per-level sampling rates.
+
+    Args:
+        value (str): Comma-separated ``LEVEL=rate`` pairs, e.g. ``DEBUG=0.1``.
+
+    Returns:
+        Dict[str, float]: Share of records kept, by level name.
+    """
+    rates = {}
+    for pair in value.split(","):
+        if pair.strip():
+            level, rate = pair.split("=")
+            rates[level.strip().upper()] = float(rate)
+    return rates
+
+
+def sampling_filter(rates: Dict[str, float]) -> Callable[[Dict], bool]:
+    """
+    Build a sink filter that keeps the given share of records of each level.
+
+    loguru runs sink filters after the record is built and its message is
+    formatted, so sampling saves serializing and writing dropped records, not
+    formatting them. Only a sink level above DEBUG skips DEBUG calls entirely.
+    """
+
+    def keep(record: Dict) -> bool:
+        rate = rates.get(record["level"].name)
+        return rate is None or random.random() < rate
+
+    return keep
+
+
+def json_format(record: Dict) -> str:
+    """
+    Format a record as one compact JSON line.
+
+    Keyword arguments of the logging call are written as fields, so
+    ``log.info("Stored {transaction_id}", transaction_id=tx)`` can be queried
+    by ``transaction_id``.
+    """
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "module": record["module"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    extra = {key: value for key, value in record["extra"].items() if key != "json"}
+    if extra:
+        entry["extra"] = extra
+    if record["exception"] is not None:
+        entry["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"]["json"] = json.dumps(entry, default=str, ensure_ascii=False)
+    # Готовая строка подставляется как поле, чтобы loguru не разбирал скобки JSON
+    return "{extra[json]}\n"
 
 
 def setup_logger():
     # Удаляем стандартный обработчик и добавляем кастомный
     logger.remove()
-    logger.add(
-        sys.stderr,
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {module} | {message}",
-        level="INFO",
-    )
-    logger.add(
-        "logs/app.log",
-        rotation="1 MB",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {module} |  {message}",
-        level="DEBUG",
-    )
+    sample = sampling_filter(parse_sample_rates(settings.LOG_SAMPLE_RATES))
+    terminal = QueueSink(sys.stderr) if settings.LOG_ENQUEUE else sys.stderr
+    logger.add(terminal, format=TEXT_FORMAT, level=settings.LOG_LEVEL, filter=sample)
+    if settings.LOG_FILE:
+        file_format = json_format if settings.LOG_JSON else TEXT_FORMAT
+        if settings.LOG_ENQUEUE:
+            sink = QueueSink(RotatingFile(settings.LOG_FILE, 1024 * 1024))
+            logger.add(
+                sink, format=file_format, level=settings.LOG_FILE_LEVEL, filter=sample
+            )
+        else:
+            logger.add(
+                settings.LOG_FILE,
+                rotation="1 MB",
+                format=file_format,
+                level=settings.LOG_FILE_LEVEL,
+                filter=sample,
+            )
     return logger
 
 
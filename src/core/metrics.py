@@ -0,0 +1,264 @@
+import asyncio
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Sequence, Tuple
+
+# Границы корзин в секундах: от 1 мс до 10 с
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket bounds.
+
+    Observing is O(log buckets) and thread-safe, so it can be fed from
+    synchronous pool internals as well as from the event loop.
+
+    Attributes:
+        buckets (Sequence[float]): Upper bounds of the buckets, ascending.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            buckets (Sequence[float]): Upper bounds of the buckets, ascending.
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        Record one observation.
+
+        Args:
+            value (float): The observed value.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @property
+    def count(self) -> int:
+        """Total number of observations."""
+        return sum(self._counts)
+
+    def snapshot(self) -> Dict:
+        """
+        Return the cumulative bucket counts, the count and the sum.
+
+        Returns:
+            Dict: ``{"buckets": {"0.001": n, ..., "+Inf": n}, "count": n, "sum": s}``.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+        running += counts[-1]
+        cumulative["+Inf"] = running
+        return {"buckets": cumulative, "count": running, "sum": round(total, 6)}
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def escape_label_value(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _CounterValue:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeValue:
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _Metric(ABC):
+    """A named metric with children per combination of label values."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self):
+        """Create the value for a new combination of label values."""
+
+    def labels(self, *label_values: str):
+        """
+        Get the child for the label values, creating it on first use.
+
+        Hot paths may keep the child to skip the lookup.
+        """
+        child = self._children.get(label_values)
+        if child is None:
+            if len(label_values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}")
+            with self._lock:
+                child = self._children.setdefault(label_values, self._new_child())
+        return child
+
+    def render(self) -> List[str]:
+        """Lines of the metric in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for label_values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(label_values, child))
+        return lines
+
+    def _render_child(self, label_values: Tuple[str, ...], child) -> List[str]:
+        labels = _format_labels(self.label_names, label_values)
+        return [f"{self.name}{labels} {child.value}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter; ``counter.labels(...).inc()``."""
+
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+
+class Gauge(_Metric):
+    """Value that can go up and down; ``gauge.labels(...).set(value)``."""
+
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+
+class LabeledHistogram(_Metric):
+    """``Histogram`` per combination of labels; ``histogram.labels(...).observe(v)``."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self) -> Histogram:
+        return Histogram(self.buckets)
+
+    def _render_child(self, label_values: Tuple[str, ...], child) -> List[str]:
+        snapshot = child.snapshot()
+        lines = []
+        for bound, count in snapshot["buckets"].items():
+            labels = _format_labels(self.label_names, label_values, f'le="{bound}"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+        labels = _format_labels(self.label_names, label_values)
+        lines.append(f"{self.name}_sum{labels} {snapshot['sum']}")
+        lines.append(f"{self.name}_count{labels} {snapshot['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide set of metrics rendered by the ``/metrics`` endpoint.
+
+    Metrics are registered by the modules that update them. Registering a name
+    again returns the existing metric, so importing a module twice is harmless.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(
+        self, name: str, documentation: str, label_names: Sequence[str] = ()
+    ) -> Counter:
+        """Register a counter; by convention the name ends with ``_total``."""
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(
+        self, name: str, documentation: str, label_names: Sequence[str] = ()
+    ) -> Gauge:
+        """Register a gauge."""
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> LabeledHistogram:
+        """Register a histogram; by convention the name ends with the unit."""
+        return self._register(
+            LabeledHistogram(name, documentation, label_names, buckets)
+        )
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format, version 0.0.4."""
+        lines: List[str] = []
+        for metric in sorted(self._metrics.values(), key=lambda m: m.name):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+_loop_lag = registry.histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop woke up a timer; time every request waited for the loop.",
+)
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    """
+    Measure event loop lag until cancelled.
+
+    Args:
+        interval (float): Seconds between measurements.
+    """
+    lag = _loop_lag.labels()
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag.observe(max(0.0, time.perf_counter() - started - interval))
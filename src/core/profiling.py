@@ -0,0 +1,294 @@
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+from src.config.config import settings
+
+# Категории, на которые раскладывается время запроса
+CATEGORIES = ("db", "redis", "serialization", "bcrypt")
+# Сколько SQL-выражений и стеков хранится в одном профиле
+MAX_STATEMENTS = 200
+MAX_STATEMENT_LENGTH = 500
+MAX_STACKS = 30
+MAX_STACK_DEPTH = 64
+
+# Профиль текущего запроса; None, если запрос не профилируется
+current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "current_profile", default=None
+)
+# Профилировщик стека один на процесс: стек потока event loop общий для всех запросов
+_sampler_lock = threading.Lock()
+_whitespace = re.compile(r"\s+")
+_profile_store: Optional["ProfileStore"] = None
+
+
+class RequestProfile:
+    """
+    Where the wall time of one request went.
+
+    Instrumented code adds its time under a category (``db``, ``redis``,
+    ``serialization``, ``bcrypt``); SQL statements are kept with their
+    durations to find repeated queries. Time spent concurrently, e.g. two
+    queries awaited with ``gather``, is counted for each of them.
+
+    Attributes:
+        profile_id (str): Identifier of the saved trace.
+        started (float): ``perf_counter`` at the start of the request.
+        durations (Dict[str, float]): Seconds by category.
+        counts (Dict[str, int]): Operations by category.
+        statements (List[Tuple[str, float]]): SQL statements and their seconds.
+        statements_dropped (int): Statements not kept once MAX_STATEMENTS was reached.
+    """
+
+    def __init__(self):
+        self.profile_id = uuid.uuid4().hex[:16]
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc)
+        self.durations: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.statements: List[Tuple[str, float]] = []
+        self.statements_dropped = 0
+
+    def add(self, category: str, seconds: float) -> None:
+        """Add the time of one operation to a category."""
+        self.durations[category] += seconds
+        self.counts[category] += 1
+
+    def add_statement(self, statement: str, seconds: float) -> None:
+        """Add an executed SQL statement; its time counts as ``db``."""
+        self.add("db", seconds)
+        if len(self.statements) < MAX_STATEMENTS:
+            self.statements.append((statement, seconds))
+        else:
+            self.statements_dropped += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def n_plus_one(self, threshold: int) -> List[Dict]:
+        """
+        Statements executed repeatedly with the same text.
+
+        Statements are parameterized, so a query issued once per row of an
+        earlier result shows up as one text executed many times.
+
+        Args:
+            threshold (int): Minimum number of executions to report.
+
+        Returns:
+            List[Dict]: ``sql``, ``count`` and total ``ms``, most frequent first.
+        """
+        counts: Counter = Counter()
+        seconds: Dict[str, float] = defaultdict(float)
+        for statement, duration in self.statements:
+            normalized = _whitespace.sub(" ", statement).strip()
+            counts[normalized] += 1
+            seconds[normalized] += duration
+        return [
+            {
+                "sql": sql[:MAX_STATEMENT_LENGTH],
+                "count": count,
+                "ms": round(seconds[sql] * 1000, 3),
+            }
+            for sql, count in counts.most_common()
+            if count >= threshold
+        ]
+
+    def server_timing(self) -> str:
+        """The breakdown as a ``Server-Timing`` header value, in milliseconds."""
+        total = self.elapsed()
+        metrics = []
+        for category in CATEGORIES:
+            if category in self.counts:
+                metrics.append(
+                    f"{category};dur={self.durations[category] * 1000:.2f};"
+                    f'desc="{self.counts[category]} ops"'
+                )
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+    def to_trace(
+        self,
+        scope: Dict,
+        status: int,
+        reason: str,
+        n_plus_one_threshold: int,
+        stacks: Optional[Counter] = None,
+    ) -> Dict:
+        """
+        Compact, JSON-serializable record of the request.
+
+        Args:
+            scope (Dict): The ASGI scope of the request.
+            status (int): Response status.
+            reason (str): Why the request was profiled: requested, sampled or slow.
+            n_plus_one_threshold (int): Executions of one statement to report.
+            stacks (Optional[Counter]): Samples by collapsed stack, if sampled.
+
+        Returns:
+            Dict: The trace.
+        """
+        total = self.elapsed()
+        breakdown = {
+            category: round(self.durations.get(category, 0.0) * 1000, 3)
+            for category in CATEGORIES
+        }
+        breakdown["other"] = round(max(total * 1000 - sum(breakdown.values()), 0.0), 3)
+        route = scope.get("route")
+        trace = {
+            "id": self.profile_id,
+            "reason": reason,
+            "started_at": self.started_at.isoformat(),
+            "method": scope.get("method"),
+            "path": scope.get("path"),
+            "route": getattr(route, "path", None),
+            "status": status,
+            "duration_ms": round(total * 1000, 3),
+            "breakdown_ms": breakdown,
+            "counts": dict(self.counts),
+            "statements": [
+                {
+                    "sql": statement[:MAX_STATEMENT_LENGTH],
+                    "ms": round(seconds * 1000, 3),
+                }
+                for statement, seconds in self.statements
+            ],
+            "statements_dropped": self.statements_dropped,
+            "n_plus_one": self.n_plus_one(n_plus_one_threshold),
+        }
+        if stacks is not None:
+            trace["stacks"] = [
+                {"stack": stack, "samples": samples}
+                for stack, samples in stacks.most_common(MAX_STACKS)
+            ]
+        return trace
+
+
+class timed:
+    """
+    Context manager adding the time of a block to the current profile.
+
+    Costs one context variable read when no request is being profiled.
+    """
+
+    __slots__ = ("category", "profile", "started")
+
+    def __init__(self, category: str):
+        self.category = category
+
+    def __enter__(self) -> None:
+        self.profile = current_profile.get()
+        if self.profile is not None:
+            self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        if self.profile is not None:
+            self.profile.add(self.category, time.perf_counter() - self.started)
+
+
+class StackSampler:
+    """
+    Sampling profiler for the event loop thread.
+
+    A background thread records the stack of the loop thread every
+    ``interval`` seconds, in the collapsed ``outer;inner`` form flame graph
+    tools read. Coroutines of other requests run on the same thread, so only
+    one sampler runs at a time and the samples show what the loop was busy
+    with while the request was in flight.
+
+    Attributes:
+        interval (float): Seconds between samples.
+        samples (Counter): Number of samples by collapsed stack.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """
+        Start sampling the calling thread.
+
+        Returns:
+            bool: False if another request is already being sampled.
+        """
+        if not _sampler_lock.acquire(blocking=False):
+            return False
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self) -> Counter:
+        """Stop sampling and return the samples."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+            _sampler_lock.release()
+        return self.samples
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            names = []
+            while frame is not None and len(names) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                self.samples[";".join(reversed(names))] += 1
+
+
+class ProfileStore:
+    """
+    Ring buffer of the latest request traces.
+
+    Attributes:
+        max_size (int): Number of traces kept; older ones are discarded.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._traces: Deque[Dict] = deque(maxlen=max_size)
+
+    def add(self, trace: Dict) -> None:
+        self._traces.append(trace)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        for trace in self._traces:
+            if trace["id"] == profile_id:
+                return trace
+        return None
+
+    def summaries(self) -> List[Dict]:
+        """Traces without statements and stacks, newest first."""
+        keys = ("id", "reason", "started_at", "method", "path", "route", "status")
+        return [
+            {
+                **{key: trace[key] for key in keys},
+                "duration_ms": trace["duration_ms"],
+                "breakdown_ms": trace["breakdown_ms"],
+                "n_plus_one": len(trace["n_plus_one"]),
+            }
+            for trace in reversed(self._traces)
+        ]
+
+
+def get_profile_store() -> ProfileStore:
+    """Get the process-wide store of traces, sized by PROFILING_BUFFER_SIZE."""
+    global _profile_store
+    if _profile_store is None:
+        _profile_store = ProfileStore(settings.PROFILING_BUFFER_SIZE)
+    return _profile_store
@@ -2,8 +2,10 @@ __all__ = [
     "User",
     "Account",
     "Payment",
+    "UserPaymentSummary",
 ]
 
 from .user import User
 from .account import Account
 from .payment import Payment
+from .payment_summary import UserPaymentSummary
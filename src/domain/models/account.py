@@ -7,7 +7,7 @@ class Account(Base):
     __tablename__ = "accounts"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     balance = Column(Numeric(10, 2), default=0)
 
     user = relationship("User", back_populates="accounts")
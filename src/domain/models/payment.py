@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, Numeric, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.infrastructure.database import Base
@@ -10,9 +10,21 @@ class Payment(Base):
     id = Column(Integer, primary_key=True, index=True)
     transaction_id = Column(String, unique=True, index=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False, index=True)
     amount = Column(Numeric(10, 2), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="payments")
     account = relationship("Account", back_populates="payments")
+
+    __table_args__ = (
+        # Покрывает выборку платежей пользователя и keyset-пагинацию по (created_at, id)
+        Index(
+            "ix_payments_user_id_created_at_id",
+            "user_id",
+            created_at.desc(),
+            id.desc(),
+        ),
+        # Выгрузка всех платежей и по диапазону дат идёт в порядке (created_at, id)
+        Index("ix_payments_created_at_id", "created_at", "id"),
+    )
@@ -0,0 +1,84 @@
+from sqlalchemy import Column, DateTime, DDL, ForeignKey, Integer, Numeric, event
+from src.infrastructure.database import Base
+
+
+class UserPaymentSummary(Base):
+    """Per-user payment totals, maintained by triggers on the payments table."""
+
+    __tablename__ = "user_payment_summary"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    payments_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(18, 2), nullable=False, default=0)
+    last_payment_at = Column(DateTime(timezone=True))
+
+
+# Триггеры уровня оператора с transition-таблицами: пакетная вставка обновляет
+# сводку одним UPSERT на пользователя в той же транзакции, что и INSERT платежей.
+# Строка сводки блокируется до конца транзакции, поэтому одновременные вставки
+# платежей одного пользователя выполняются по очереди.
+# Единственный источник DDL: его выполняют миграция 5b1f2c8d9e41 и create_all.
+# Изменение требует новой миграции, повторно выполняющей эти операторы
+# (функции - CREATE OR REPLACE, триггеры - после DROP TRIGGER).
+PAYMENT_SUMMARY_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION payments_summary_on_insert() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO user_payment_summary
+            (user_id, payments_count, total_amount, last_payment_at)
+        SELECT user_id, count(*), sum(amount), max(created_at)
+        FROM new_payments
+        GROUP BY user_id
+        ORDER BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET
+            payments_count = user_payment_summary.payments_count + excluded.payments_count,
+            total_amount = user_payment_summary.total_amount + excluded.total_amount,
+            last_payment_at = greatest(
+                user_payment_summary.last_payment_at, excluded.last_payment_at
+            );
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION payments_summary_on_delete() RETURNS trigger AS $$
+    BEGIN
+        UPDATE user_payment_summary AS s SET
+            payments_count = s.payments_count - d.payments_count,
+            total_amount = s.total_amount - d.total_amount,
+            last_payment_at = (
+                SELECT max(p.created_at) FROM payments AS p WHERE p.user_id = s.user_id
+            )
+        FROM (
+            SELECT user_id, count(*) AS payments_count, sum(amount) AS total_amount
+            FROM old_payments
+            GROUP BY user_id
+        ) AS d
+        WHERE s.user_id = d.user_id;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER payments_summary_after_insert
+    AFTER INSERT ON payments
+    REFERENCING NEW TABLE AS new_payments
+    FOR EACH STATEMENT EXECUTE FUNCTION payments_summary_on_insert()
+    """,
+    """
+    CREATE TRIGGER payments_summary_after_delete
+    AFTER DELETE ON payments
+    REFERENCING OLD TABLE AS old_payments
+    FOR EACH STATEMENT EXECUTE FUNCTION payments_summary_on_delete()
+    """,
+]
+
+# Для Base.metadata.create_all (тесты); в базе приложения триггеры создает миграция
+for statement in PAYMENT_SUMMARY_TRIGGERS:
+    event.listen(
+        Base.metadata,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
@@ -1,36 +1,184 @@
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 import redis.asyncio as redis
 from src.config.config import settings
+from src.core.profiling import timed
 
+# Пулы соединений процесса: с декодированием ответов в str и без него
+_redis_pools: Dict[bool, redis.BlockingConnectionPool] = {}
+_redis_cache_adapter: Optional["RedisCacheAdapter"] = None
 
-class RedisCacheAdapter:
-    """Адаптер для работы с Redis как инфраструктурным кэшем."""
 
-    def __init__(self):
-        self.client = redis.Redis(
+class ProfiledConnection(redis.Connection):
+    """Соединение, добавляющее время отправки команд и чтения ответов в профиль запроса."""
+
+    async def send_packed_command(self, command, check_health: bool = True) -> None:
+        with timed("redis"):
+            await super().send_packed_command(command, check_health)
+
+    async def read_response(self, *args, **kwargs):
+        with timed("redis"):
+            return await super().read_response(*args, **kwargs)
+
+
+def get_redis_pool(decode_responses: bool = False) -> redis.BlockingConnectionPool:
+    """Получить общий пул соединений с Redis; размер и таймауты берутся из настроек.
+
+    Пул ограничен REDIS_MAX_CONNECTIONS: при исчерпании запрос ждёт свободное
+    соединение до REDIS_POOL_TIMEOUT, а не открывает новые.
+    """
+    pool = _redis_pools.get(decode_responses)
+    if pool is None:
+        pool = redis.BlockingConnectionPool(
             host=settings.REDIS_HOST,
             port=settings.REDIS_PORT,
             db=0,
-            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+            decode_responses=decode_responses,
+            connection_class=ProfiledConnection,
         )
+        _redis_pools[decode_responses] = pool
+    return pool
+
 
-    async def get(self, key: str) -> Optional[str]:
+def get_redis_pool_stats() -> Dict:
+    """Занятость пулов соединений с Redis."""
+    return {
+        ("text" if decode_responses else "binary"): {
+            "max_connections": pool.max_connections,
+            "in_use": len(pool._in_use_connections),
+            "idle": len(pool._available_connections),
+        }
+        for decode_responses, pool in _redis_pools.items()
+    }
+
+
+async def close_redis_pools() -> None:
+    """Закрыть все соединения пулов; следующий вызов get_redis_pool создаст новый пул."""
+    global _redis_cache_adapter
+    pools = list(_redis_pools.values())
+    _redis_pools.clear()
+    _redis_cache_adapter = None
+    for pool in pools:
+        await pool.disconnect()
+
+
+# GET и DEL одним атомарным шагом: между проверкой и удалением ключ не сменит владельца
+DELETE_IF_EQUALS_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class RedisCacheAdapter:
+    """Адаптер для работы с Redis как инфраструктурным кэшем."""
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        # Значения кэша бинарные (заголовок кодека, сжатие), поэтому без декодирования
+        self.client = client or redis.Redis(connection_pool=get_redis_pool())
+
+    async def ping(self) -> bool:
+        """Проверить доступность Redis."""
+        return bool(await self.client.ping())
+
+    async def get(self, key: str) -> Optional[bytes]:
         """Получить необработанные данные из Redis."""
         return await self.client.get(key)
 
-    async def set(self, key: str, value: str, expire: int = 300) -> None:
+    async def get_with_ttl(self, key: str) -> Tuple[Optional[bytes], int]:
+        """Получить данные и оставшийся TTL в миллисекундах за один запрос."""
+        async with self.pipeline() as pipe:
+            pipe.get(key)
+            pipe.pttl(key)
+            value, ttl_ms = await pipe.execute()
+        return value, ttl_ms
+
+    async def get_many(self, keys: Iterable[str]) -> List[Optional[bytes]]:
+        """Получить несколько ключей одной командой MGET, в порядке ключей."""
+        keys = list(keys)
+        if not keys:
+            return []
+        return await self.client.mget(keys)
+
+    async def get_with_ttl_and(
+        self, key: str, other_keys: Iterable[str]
+    ) -> Tuple[Optional[bytes], int, List[Optional[bytes]]]:
+        """Получить данные, их TTL в миллисекундах и значения других ключей за один запрос."""
+        other_keys = list(other_keys)
+        async with self.pipeline() as pipe:
+            pipe.get(key)
+            pipe.pttl(key)
+            if other_keys:
+                pipe.mget(other_keys)
+            results = await pipe.execute()
+        return results[0], results[1], results[2] if other_keys else []
+
+    async def set(self, key: str, value: Union[str, bytes], expire: int = 300) -> None:
         """Записать данные в Redis с TTL."""
         await self.client.setex(key, expire, value)
 
+    async def set_many(self, values: Dict[str, bytes], expire: int = 300) -> None:
+        """Записать несколько ключей с общим TTL за один запрос."""
+        if not values:
+            return
+        async with self.pipeline() as pipe:
+            for key, value in values.items():
+                pipe.setex(key, expire, value)
+            await pipe.execute()
+
+    async def set_if_absent(
+        self, key: str, value: Union[str, bytes], expire: int = 300
+    ) -> bool:
+        """Атомарно записать данные с TTL, только если ключа ещё нет."""
+        return bool(await self.client.set(key, value, ex=expire, nx=True))
+
+    async def incr(self, key: str) -> int:
+        """Атомарно увеличить счётчик без TTL и вернуть новое значение."""
+        return await self.client.incr(key)
+
     async def delete(self, key: str) -> None:
         """Удалить данные из Redis."""
         await self.client.delete(key)
 
+    async def delete_if_equals(self, key: str, value: Union[str, bytes]) -> bool:
+        """Атомарно удалить ключ, только если его значение равно value."""
+        return bool(await self.client.eval(DELETE_IF_EQUALS_SCRIPT, 1, key, value))
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        """Удалить несколько ключей одной командой."""
+        keys = list(keys)
+        if keys:
+            await self.client.delete(*keys)
+
+    def pipeline(self):
+        """Создать pipeline без транзакции: команды уходят в Redis одним запросом."""
+        return self.client.pipeline(transaction=False)
+
+    async def publish(self, channel: str, message: str) -> None:
+        """Опубликовать сообщение в канал pub/sub."""
+        await self.client.publish(channel, message)
+
+    def pubsub(self):
+        """Создать объект подписки pub/sub."""
+        return self.client.pubsub()
+
+    async def info(self, section: str) -> dict:
+        """Получить раздел INFO сервера Redis."""
+        return await self.client.info(section)
+
     async def close(self) -> None:
         """Закрыть соединение с Redis."""
-        await self.client.close()
+        await self.client.aclose()
 
 
 def get_redis_cache_adapter() -> RedisCacheAdapter:
-    """Получить экземпляр адаптера Redis."""
-    return RedisCacheAdapter()
+    """Получить общий для процесса адаптер Redis на общем пуле соединений."""
+    global _redis_cache_adapter
+    if _redis_cache_adapter is None:
+        _redis_cache_adapter = RedisCacheAdapter()
+    return _redis_cache_adapter
@@ -0,0 +1,204 @@
+import json
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from src.core.profiling import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - необязательная зависимость
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - необязательная зависимость
+    msgpack = None
+
+# Заголовок значения: MAGIC, версия формата, байт флагов (id кодека + сжатие)
+MAGIC = 0xCA
+FORMAT_VERSION = 1
+COMPRESSED = 0x80
+CODEC_ID_MASK = 0x7F
+
+
+class CodecError(ValueError):
+    """Raised when a cached value cannot be decoded by this build."""
+
+
+class Codec:
+    """
+    Serializer of cache values.
+
+    Decimal and datetime are written as strings, exactly as in the JSON API
+    responses; pydantic converts them back while validating, which in pydantic
+    v2 is faster than ``model_construct`` on already typed values.
+
+    Attributes:
+        name (str): Name used in CACHE_CODEC.
+        codec_id (int): Identifier stored in the value header.
+    """
+
+    name: str = ""
+    codec_id: int = 0
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+def _default(obj: Any) -> str:
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+class JsonCodec(Codec):
+    """Standard library JSON, the fallback when no faster library is installed."""
+
+    name = "json"
+    codec_id = 1
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    """orjson; datetime is serialized natively in the same ISO 8601 form."""
+
+    name = "orjson"
+    codec_id = 2
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=_default)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(Codec):
+    """msgpack; more compact than JSON for numeric payloads."""
+
+    name = "msgpack"
+    codec_id = 3
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=_default, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+def available_codecs() -> Dict[str, Codec]:
+    """Codecs whose libraries are installed, by name."""
+    codecs = [JsonCodec()]
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    if msgpack is not None:
+        codecs.append(MsgpackCodec())
+    return {codec.name: codec for codec in codecs}
+
+
+class CacheCodec:
+    """
+    Encodes cache values with a versioned header and optional zlib compression.
+
+    Values are written with the configured codec but read with whichever codec
+    the header names, so instances with different CACHE_CODEC settings can
+    share a Redis. Values with an unknown header, including ones written before
+    the header existed, raise ``CodecError`` and are treated as cache misses.
+
+    Attributes:
+        codec (Codec): The codec used for writing.
+        compress_min_bytes (int): Compress payloads of at least this size; 0 disables.
+    """
+
+    def __init__(self, codec: Codec, compress_min_bytes: int = 0):
+        """
+        Initialize the cache codec.
+
+        Args:
+            codec (Codec): The codec used for writing.
+            compress_min_bytes (int): Compress payloads of at least this size; 0 disables.
+        """
+        self.codec = codec
+        self.compress_min_bytes = compress_min_bytes
+        self._readers = {codec.codec_id: codec for codec in available_codecs().values()}
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Serialize a value and prepend the header.
+
+        Args:
+            value (Any): A JSON-like value; Decimal and datetime are allowed.
+
+        Returns:
+            bytes: The encoded value.
+        """
+        with timed("serialization"):
+            payload = self.codec.dumps(value)
+            flags = self.codec.codec_id
+            if self.compress_min_bytes and len(payload) >= self.compress_min_bytes:
+                payload = zlib.compress(payload, 1)
+                flags |= COMPRESSED
+            return bytes((MAGIC, FORMAT_VERSION, flags)) + payload
+
+    def decode(self, data: bytes) -> Any:
+        """
+        Parse the header and deserialize a value.
+
+        Args:
+            data (bytes): A value produced by ``encode``.
+
+        Returns:
+            Any: The decoded value.
+
+        Raises:
+            CodecError: If the header is missing, of another version or names an
+            unavailable codec, or the payload is corrupt.
+        """
+        if len(data) < 3 or data[0] != MAGIC or data[1] != FORMAT_VERSION:
+            raise CodecError("Unknown cache value format")
+        codec = self._readers.get(data[2] & CODEC_ID_MASK)
+        if codec is None:
+            raise CodecError(f"Cache codec {data[2] & CODEC_ID_MASK} is not available")
+        payload = data[3:]
+        try:
+            with timed("serialization"):
+                if data[2] & COMPRESSED:
+                    payload = zlib.decompress(payload)
+                return codec.loads(payload)
+        except Exception as e:
+            raise CodecError(f"Corrupt cache value: {e}") from e
+
+
+def create_cache_codec(name: str, compress_min_bytes: int = 0) -> CacheCodec:
+    """
+    Create the cache codec by name.
+
+    Args:
+        name (str): ``json``, ``orjson``, ``msgpack`` or ``auto`` for the fastest
+            installed one (orjson decodes fastest, then msgpack).
+        compress_min_bytes (int): Compress payloads of at least this size; 0 disables.
+
+    Raises:
+        ValueError: If the codec is unknown or its library is not installed.
+    """
+    codecs = available_codecs()
+    if name == "auto":
+        codec: Optional[Codec] = (
+            codecs.get("orjson") or codecs.get("msgpack") or codecs["json"]
+        )
+    else:
+        codec = codecs.get(name)
+    if codec is None:
+        raise ValueError(f"Cache codec {name!r} is unknown or not installed")
+    return CacheCodec(codec, compress_min_bytes)
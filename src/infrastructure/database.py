@@ -1,11 +1,228 @@
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Optional
+from sqlalchemy import event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    create_async_engine,
+    AsyncSession,
+    async_sessionmaker,
+)
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from src.config.config import settings
+from src.core.logger import log
+from src.core.metrics import Histogram, registry
+from src.core.profiling import current_profile
 
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+# Метод репозитория, выполняющий запросы; его выставляет BaseRepository
+query_origin: ContextVar[str] = ContextVar("query_origin", default="other")
+
+_query_duration = registry.histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time by repository method.",
+    ["origin"],
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait and how often they time out."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_wait = Histogram()
+        self.checkout_timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            self.checkout_wait.observe(time.perf_counter() - started)
+
+    def stats(self) -> Dict:
+        """Current pool occupancy and checkout wait statistics."""
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "timeout": self._timeout,
+            "checkout_timeouts": self.checkout_timeouts,
+            "checkout_wait_seconds": self.checkout_wait.snapshot(),
+        }
+
+
+def instrument_engine(engine: AsyncEngine) -> AsyncEngine:
+    """
+    Record the count and duration of SQL statements, by ``query_origin``.
+
+    Statements of a profiled request are also added to its profile.
+
+    Args:
+        engine (AsyncEngine): The engine to instrument.
+
+    Returns:
+        AsyncEngine: The same engine.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        started = conn.info.pop("query_started", None)
+        if started is not None:
+            duration = time.perf_counter() - started
+            _query_duration.labels(query_origin.get()).observe(duration)
+            profile = current_profile.get()
+            if profile is not None:
+                profile.add_statement(statement, duration)
+
+    return engine
+
+
+def create_engine_from_settings(url: Optional[str] = None) -> AsyncEngine:
+    """Create an engine with pool settings taken from Settings, for the primary by default."""
+    engine = create_async_engine(
+        url or settings.DATABASE_URL,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # 0 отключает кэш подготовленных выражений (нужно за PgBouncer в режиме transaction)
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+    return instrument_engine(engine)
+
+
+# На реплике: отставание по последней применённой транзакции. При простое primary
+# оно растёт, поэтому порог REPLICA_MAX_LAG_SECONDS задается с запасом
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_is_in_recovery() "
+    "THEN coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "ELSE 0 END"
+)
+
+
+class ReplicaRouter:
+    """
+    Chooses a healthy read replica for read-only sessions.
+
+    Replicas are checked periodically; one that cannot be reached or lags
+    behind the primary by more than ``max_lag_seconds`` is skipped until a later
+    check finds it healthy again. When no replica is healthy, ``pick`` returns
+    None and callers fall back to the primary.
+
+    Attributes:
+        engines (List[AsyncEngine]): Engines of the replicas.
+        max_lag_seconds (float): Largest acceptable replication lag.
+        check_interval (float): Seconds between health checks.
+    """
+
+    def __init__(
+        self,
+        engines: List[AsyncEngine],
+        max_lag_seconds: float,
+        check_interval: float,
+    ):
+        """
+        Initialize the router. Replicas count as unhealthy until the first check.
+
+        Args:
+            engines (List[AsyncEngine]): Engines of the replicas.
+            max_lag_seconds (float): Largest acceptable replication lag.
+            check_interval (float): Seconds between health checks.
+        """
+        self.engines = engines
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.session_factories = [
+            async_sessionmaker(engine, expire_on_commit=False) for engine in engines
+        ]
+        self.lags: List[Optional[float]] = [None] * len(engines)
+        self.healthy: List[bool] = [False] * len(engines)
+        self._next = itertools.count()
+
+    def pick(self) -> Optional[async_sessionmaker]:
+        """Return the session factory of the next healthy replica, None if there is none."""
+        healthy = [
+            factory
+            for factory, is_healthy in zip(self.session_factories, self.healthy)
+            if is_healthy
+        ]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    def mark_unhealthy(self, session_factory: async_sessionmaker) -> None:
+        """Stop using a replica until the next successful health check."""
+        index = self.session_factories.index(session_factory)
+        if self.healthy[index]:
+            log.warning(
+                "Read replica {index} failed, falling back to the primary", index=index
+            )
+        self.healthy[index] = False
+
+    async def check(self) -> None:
+        """Measure the lag of every replica and update its health."""
+        for index, engine in enumerate(self.engines):
+            try:
+                async with engine.connect() as conn:
+                    lag = float((await conn.execute(REPLICA_LAG_QUERY)).scalar())
+            except Exception as e:
+                lag = None
+                log.warning(
+                    "Read replica {index} health check failed: {}", e, index=index
+                )
+            healthy = lag is not None and lag <= self.max_lag_seconds
+            if healthy != self.healthy[index]:
+                log.info(
+                    "Read replica {index} healthy: {healthy}, lag: {lag}",
+                    index=index,
+                    healthy=healthy,
+                    lag=lag,
+                )
+            self.lags[index] = lag
+            self.healthy[index] = healthy
+
+    async def run(self) -> None:
+        """Check the replicas every check_interval seconds until cancelled."""
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    def stats(self) -> List[Dict]:
+        """Health and lag of every replica."""
+        return [
+            {"replica": index, "healthy": healthy, "lag_seconds": lag}
+            for index, (healthy, lag) in enumerate(zip(self.healthy, self.lags))
+        ]
+
+
+engine = create_engine_from_settings()
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
+replica_router = ReplicaRouter(
+    [create_engine_from_settings(url) for url in settings.replica_urls],
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_HEALTH_CHECK_INTERVAL,
+)
+
 
 class Base(DeclarativeBase):
     """Base class for declarative models."""
@@ -20,3 +237,41 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             yield session
         finally:
             await session.close()
+
+
+@asynccontextmanager
+async def read_session(prefer_primary: bool = False) -> AsyncIterator[AsyncSession]:
+    """
+    Open a session for read-only work on a healthy replica, or on the primary.
+
+    Args:
+        prefer_primary (bool): Read from the primary, e.g. for read-your-writes.
+    """
+    replica_session = None if prefer_primary else replica_router.pick()
+    if replica_session is not None:
+        async with replica_session() as session:
+            try:
+                # Соединение берем сразу, чтобы при недоступной реплике перейти на primary
+                await session.connection()
+            except Exception as e:
+                log.warning("Read replica is unavailable: {}", e)
+                replica_router.mark_unhealthy(replica_session)
+            else:
+                yield session
+                return
+    async with async_session() as session:
+        yield session
+
+
+async def dispose_engines() -> None:
+    """Close the connections of the primary and replica pools."""
+    await engine.dispose()
+    for replica_engine in replica_router.engines:
+        await replica_engine.dispose()
+
+
+def get_pool_stats() -> Dict:
+    """Statistics of the primary connection pool and the health of the replicas."""
+    stats = engine.pool.stats()
+    stats["replicas"] = replica_router.stats()
+    return stats
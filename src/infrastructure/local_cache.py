@@ -0,0 +1,122 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+
+class LocalCache:
+    """
+    In-process LRU cache with a per-entry TTL.
+
+    Holds encoded values in front of Redis. It only serves entries while
+    ``active``, i.e. while the process is subscribed to cross-instance
+    invalidations; deactivating clears it, because invalidations may have been
+    missed in the meantime. Entries may carry tags, and ``delete_tags`` drops
+    every entry with one of the given tags. Not thread-safe: it is used from the
+    event loop only.
+
+    Attributes:
+        max_size (int): Maximum number of entries before LRU eviction.
+        ttl (float): Lifetime of an entry in seconds.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Initialize an empty, inactive cache.
+
+        Args:
+            max_size (int): Maximum number of entries before LRU eviction.
+            ttl (float): Lifetime of an entry in seconds.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.active = False
+        self._entries: "OrderedDict[str, Tuple[float, bytes, Tuple[str, ...]]]" = (
+            OrderedDict()
+        )
+        self._tag_keys: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value, or None if it is missing, expired or the cache is inactive."""
+        if not self.active:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """Store a value; its lifetime is capped by the cache TTL."""
+        if not self.active:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._remove(key)
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self._tag_keys.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Drop the given keys."""
+        for key in keys:
+            self._remove(key)
+
+    def delete_tags(self, tags: Iterable[str]) -> None:
+        """Drop every entry carrying one of the given tags."""
+        for tag in tags:
+            for key in list(self._tag_keys.get(tag, ())):
+                self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def activate(self) -> None:
+        """Start serving entries, once invalidations are being received."""
+        self.active = True
+
+    def deactivate(self) -> None:
+        """Stop serving entries and drop them all."""
+        self.active = False
+        self._entries.clear()
+        self._tag_keys.clear()
+
+    def stats(self) -> Dict:
+        """Hit, miss and eviction counters and the current size."""
+        return {
+            "active": self.active,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
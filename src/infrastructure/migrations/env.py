@@ -9,7 +9,7 @@ from alembic import context
 
 from src.config.config import settings
 from src.infrastructure.database import Base
-from src.domain.models import User, Account, Payment  # noqa
+from src.domain.models import User, Account, Payment, UserPaymentSummary  # noqa
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,52 @@
+"""User payment summary
+
+Revision ID: 5b1f2c8d9e41
+Revises: ccdcd9fa29b9
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.domain.models.payment_summary import PAYMENT_SUMMARY_TRIGGERS
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1f2c8d9e41"
+down_revision: Union[str, None] = "ccdcd9fa29b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_payment_summary",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("payments_count", sa.Integer(), nullable=False),
+        sa.Column("total_amount", sa.Numeric(precision=18, scale=2), nullable=False),
+        sa.Column("last_payment_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+    # Блокируем вставки, чтобы платежи между заполнением и созданием триггера не потерялись
+    op.execute("LOCK TABLE payments IN SHARE ROW EXCLUSIVE MODE")
+    op.execute("""
+        INSERT INTO user_payment_summary
+            (user_id, payments_count, total_amount, last_payment_at)
+        SELECT user_id, count(*), sum(amount), max(created_at)
+        FROM payments
+        GROUP BY user_id
+        """)
+    for statement in PAYMENT_SUMMARY_TRIGGERS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS payments_summary_after_delete ON payments")
+    op.execute("DROP TRIGGER IF EXISTS payments_summary_after_insert ON payments")
+    op.execute("DROP FUNCTION IF EXISTS payments_summary_on_delete()")
+    op.execute("DROP FUNCTION IF EXISTS payments_summary_on_insert()")
+    op.drop_table("user_payment_summary")
@@ -0,0 +1,69 @@
+"""Foreign key indexes
+
+Revision ID: 8c3d7a1f0b52
+Revises: 5b1f2c8d9e41
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8c3d7a1f0b52"
+down_revision: Union[str, None] = "5b1f2c8d9e41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY не блокирует запись, но не может выполняться в транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_accounts_user_id"),
+            "accounts",
+            ["user_id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_payments_user_id_created_at_id",
+            "payments",
+            ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            op.f("ix_payments_account_id"),
+            "payments",
+            ["account_id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_payments_account_id"),
+            table_name="payments",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_payments_user_id_created_at_id",
+            table_name="payments",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            op.f("ix_accounts_user_id"),
+            table_name="accounts",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,41 @@
+"""Payments created_at index
+
+Revision ID: d41e6b9a2c73
+Revises: 8c3d7a1f0b52
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d41e6b9a2c73"
+down_revision: Union[str, None] = "8c3d7a1f0b52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Выгрузка читает платежи по индексу в порядке (created_at, id) и отдаёт
+    # первые строки сразу, без сортировки всей таблицы
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_payments_created_at_id",
+            "payments",
+            ["created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_payments_created_at_id",
+            table_name="payments",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
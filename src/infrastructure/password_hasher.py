@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, TypeVar
+
+from passlib.context import CryptContext
+
+from src.config.config import settings
+from src.core.metrics import Histogram
+from src.core.profiling import timed
+
+T = TypeVar("T")
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated thread pool so hashing never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so threads hash in parallel without
+    the pickling and startup cost of a process pool. The pool size is the
+    concurrency limit: further calls wait in the executor queue, and the queue
+    depth and wait time are recorded, so a login storm shows up as queueing
+    rather than as latency of every other request on the worker.
+
+    Attributes:
+        max_workers (int): Number of hashing threads.
+        queue_wait (Histogram): Seconds calls waited for a free thread.
+        hash_duration (Histogram): Seconds spent hashing.
+    """
+
+    def __init__(self, max_workers: int, context: CryptContext = pwd_context):
+        """
+        Initialize the hasher. Threads are started on first use.
+
+        Args:
+            max_workers (int): Number of hashing threads.
+            context (CryptContext): The passlib context that hashes and verifies.
+        """
+        self.max_workers = max_workers
+        self.context = context
+        self.queue_wait = Histogram()
+        self.hash_duration = Histogram()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._max_queued = 0
+        self._completed = 0
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password.
+
+        Args:
+            password (str): The plain password.
+
+        Returns:
+            str: The bcrypt hash.
+        """
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Check a password against a hash.
+
+        Args:
+            password (str): The plain password.
+            hashed_password (str): The stored hash.
+
+        Returns:
+            bool: True if the password matches.
+        """
+        return await self._run(self.context.verify, password, hashed_password)
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        submitted = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        def work() -> T:
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            self.queue_wait.observe(started - submitted)
+            try:
+                return func(*args)
+            finally:
+                self.hash_duration.observe(time.perf_counter() - started)
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+        # В профиль запроса попадает и ожидание свободного потока
+        with timed("bcrypt"):
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, work
+            )
+
+    def stats(self) -> Dict:
+        """Pool size, current queue depth and wait and hashing time histograms."""
+        with self._lock:
+            counters = {
+                "max_workers": self.max_workers,
+                "running": self._running,
+                "queued": self._queued,
+                "max_queued": self._max_queued,
+                "completed": self._completed,
+            }
+        counters["queue_wait_seconds"] = self.queue_wait.snapshot()
+        counters["hash_seconds"] = self.hash_duration.snapshot()
+        return counters
+
+    def shutdown(self) -> None:
+        """Stop the threads once queued calls have finished."""
+        self._executor.shutdown(wait=False)
+
+
+_password_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Get the process-wide password hasher."""
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS)
+    return _password_hasher
+
+
+def shutdown_password_hasher() -> None:
+    """Stop the process-wide hasher; the next call creates a new one."""
+    global _password_hasher
+    if _password_hasher is not None:
+        _password_hasher.shutdown()
+        _password_hasher = None
@@ -0,0 +1,221 @@
+import asyncio
+import itertools
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import redis.asyncio as redis
+from redis.exceptions import ResponseError
+
+from src.config.config import settings
+
+
+@dataclass
+class QueuedMessage:
+    """A raw webhook payload taken from the queue."""
+
+    id: str
+    data: str
+    deliveries: int = 1
+
+
+class WebhookQueue(ABC):
+    """Queue of accepted webhooks: written by the API, drained in batches by consumers."""
+
+    @abstractmethod
+    async def setup(self) -> None:
+        """Create the queue resources if they do not exist yet."""
+
+    @abstractmethod
+    async def put(self, data: str) -> None:
+        """Enqueue a serialized webhook payload."""
+
+    @abstractmethod
+    async def read(
+        self, consumer: str, count: int, block_ms: int
+    ) -> List[QueuedMessage]:
+        """Read up to count new messages, waiting at most block_ms for the first one."""
+
+    @abstractmethod
+    async def claim_stale(self, consumer: str, count: int) -> List[QueuedMessage]:
+        """Take over messages that were delivered but never acknowledged."""
+
+    @abstractmethod
+    async def ack(self, message_ids: List[str]) -> None:
+        """Acknowledge processed messages."""
+
+    @abstractmethod
+    async def release(self, messages: List[QueuedMessage]) -> None:
+        """Return unprocessed messages for another delivery attempt."""
+
+    @abstractmethod
+    async def dead_letter(self, message: QueuedMessage, reason: str) -> None:
+        """Move a message that cannot be processed out of the queue."""
+
+
+class InMemoryWebhookQueue(WebhookQueue):
+    """Process-local stand-in for development and tests. Not durable."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue[QueuedMessage] = asyncio.Queue()
+        self._ids = itertools.count(1)
+        self.dead_letters: List[tuple] = []
+
+    async def setup(self) -> None:
+        pass
+
+    async def put(self, data: str) -> None:
+        self._queue.put_nowait(QueuedMessage(id=str(next(self._ids)), data=data))
+
+    async def read(
+        self, consumer: str, count: int, block_ms: int
+    ) -> List[QueuedMessage]:
+        messages: List[QueuedMessage] = []
+        try:
+            messages.append(
+                await asyncio.wait_for(self._queue.get(), timeout=block_ms / 1000)
+            )
+        except asyncio.TimeoutError:
+            return messages
+        while len(messages) < count and not self._queue.empty():
+            messages.append(self._queue.get_nowait())
+        return messages
+
+    async def claim_stale(self, consumer: str, count: int) -> List[QueuedMessage]:
+        # Невыполненные сообщения сразу возвращаются в очередь через release
+        return []
+
+    async def ack(self, message_ids: List[str]) -> None:
+        pass
+
+    async def release(self, messages: List[QueuedMessage]) -> None:
+        for message in messages:
+            message.deliveries += 1
+            self._queue.put_nowait(message)
+
+    async def dead_letter(self, message: QueuedMessage, reason: str) -> None:
+        self.dead_letters.append((message, reason))
+
+
+class RedisStreamWebhookQueue(WebhookQueue):
+    """
+    Durable queue on a Redis Stream with a consumer group.
+
+    Messages left unacknowledged by a crashed consumer are taken over with
+    XAUTOCLAIM, and poison messages are moved to the ``<stream>:dead`` stream.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        stream: Optional[str] = None,
+        group: Optional[str] = None,
+        claim_idle_ms: Optional[int] = None,
+    ):
+        self.client = client
+        self.stream = stream or settings.WEBHOOK_QUEUE_STREAM
+        self.group = group or settings.WEBHOOK_QUEUE_GROUP
+        self.dead_letter_stream = f"{self.stream}:dead"
+        self.claim_idle_ms = (
+            claim_idle_ms
+            if claim_idle_ms is not None
+            else settings.WEBHOOK_QUEUE_CLAIM_IDLE_MS
+        )
+        self._claim_cursors: Dict[str, str] = {}
+
+    async def setup(self) -> None:
+        try:
+            await self.client.xgroup_create(
+                self.stream, self.group, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def put(self, data: str) -> None:
+        await self.client.xadd(self.stream, {"payload": data})
+
+    async def read(
+        self, consumer: str, count: int, block_ms: int
+    ) -> List[QueuedMessage]:
+        response = await self.client.xreadgroup(
+            self.group, consumer, {self.stream: ">"}, count=count, block=block_ms
+        )
+        messages: List[QueuedMessage] = []
+        for _, entries in response or []:
+            messages.extend(self._decode(entries))
+        return messages
+
+    async def claim_stale(self, consumer: str, count: int) -> List[QueuedMessage]:
+        start_id = self._claim_cursors.get(consumer, "0-0")
+        response = await self.client.xautoclaim(
+            self.stream,
+            self.group,
+            consumer,
+            min_idle_time=self.claim_idle_ms,
+            start_id=start_id,
+            count=count,
+        )
+        self._claim_cursors[consumer] = response[0]
+        messages = self._decode(response[1])
+        if not messages:
+            return messages
+        # Число доставок нужно, чтобы не передоставлять "ядовитые" сообщения бесконечно
+        pending = await self.client.xpending_range(
+            self.stream,
+            self.group,
+            min=messages[0].id,
+            max=messages[-1].id,
+            count=len(messages),
+            consumername=consumer,
+        )
+        deliveries = {
+            entry["message_id"]: entry["times_delivered"] for entry in pending
+        }
+        for message in messages:
+            message.deliveries = deliveries.get(message.id, message.deliveries)
+        return messages
+
+    async def ack(self, message_ids: List[str]) -> None:
+        if not message_ids:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.xack(self.stream, self.group, *message_ids)
+            pipe.xdel(self.stream, *message_ids)
+            await pipe.execute()
+
+    async def release(self, messages: List[QueuedMessage]) -> None:
+        # Сообщения остаются в PEL и будут переданы другому воркеру через XAUTOCLAIM
+        pass
+
+    async def dead_letter(self, message: QueuedMessage, reason: str) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.xadd(
+                self.dead_letter_stream,
+                {
+                    "payload": message.data,
+                    "message_id": message.id,
+                    "deliveries": message.deliveries,
+                    "reason": reason,
+                },
+            )
+            pipe.xack(self.stream, self.group, message.id)
+            pipe.xdel(self.stream, message.id)
+            await pipe.execute()
+
+    @staticmethod
+    def _decode(entries) -> List[QueuedMessage]:
+        return [
+            QueuedMessage(id=message_id, data=fields["payload"])
+            for message_id, fields in entries
+            if fields and "payload" in fields
+        ]
+
+
+def create_webhook_queue(client: Optional[redis.Redis] = None) -> WebhookQueue:
+    """Create the webhook queue configured by WEBHOOK_QUEUE_BACKEND."""
+    if settings.WEBHOOK_QUEUE_BACKEND == "memory":
+        return InMemoryWebhookQueue()
+    if client is None:
+        raise ValueError("Redis client is required for the redis webhook queue")
+    return RedisStreamWebhookQueue(client)
@@ -1,23 +1,107 @@
 from decimal import Decimal
+from typing import Dict, Optional
 
+from sqlalchemy import Integer, Numeric, column, update, values
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.domain.models.account import Account
-from src.infrastructure.repositories.base import BaseRepository
+from src.infrastructure.repositories.base import BaseRepository, track_queries
 
 
 class AccountRepository(BaseRepository[Account]):
     def __init__(self, session: AsyncSession):
         super().__init__(Account, session)
 
+    @track_queries
     async def get_by_user_id(self, user_id: int):
         return await self.get_by_filter(self.model.user_id == user_id)
 
+    @track_queries
     async def update_balance(self, account_id: int, amount: Decimal) -> Account:
         return await self.update(account_id, balance=self.model.balance + amount)
 
+    @track_queries
     async def get_balance(self, account_id: int) -> Decimal:
         """Get current account balance"""
         account = await self.get(account_id)
         if not account:
             raise ValueError(f"Account {account_id} not found")
         return account.balance
+
+    @track_queries
+    async def upsert_for_user(self, account_id: int, user_id: int) -> Optional[Account]:
+        """
+        Create the account if it is missing and lock it for the current transaction.
+
+        Does not commit. Returns None when the account exists but belongs to
+        another user.
+        """
+        stmt = insert(self.model).values(id=account_id, user_id=user_id, balance=0)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.id],
+            set_={"user_id": stmt.excluded.user_id},
+            where=self.model.user_id == stmt.excluded.user_id,
+        ).returning(self.model)
+        result = await self.session.scalars(
+            stmt, execution_options={"populate_existing": True}
+        )
+        return result.first()
+
+    @track_queries
+    async def add_to_balance(
+        self, account_id: int, amount: Decimal
+    ) -> Optional[Account]:
+        """Atomically add amount to the balance without committing."""
+        stmt = (
+            update(self.model)
+            .where(self.model.id == account_id)
+            .values(balance=self.model.balance + amount)
+            .returning(self.model)
+        )
+        result = await self.session.scalars(
+            stmt, execution_options={"populate_existing": True}
+        )
+        return result.first()
+
+    @track_queries
+    async def upsert_many_for_users(self, owners: Dict[int, int]) -> Dict[int, int]:
+        """
+        Create missing accounts and lock all of them with one statement.
+
+        Does not commit. Accepts a mapping of account_id to user_id and returns
+        the same mapping restricted to accounts that belong to the given users.
+        """
+        if not owners:
+            return {}
+        # Сортировка по id задаёт одинаковый порядок блокировок для параллельных пачек
+        rows = [
+            {"id": account_id, "user_id": user_id, "balance": 0}
+            for account_id, user_id in sorted(owners.items())
+        ]
+        stmt = insert(self.model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.id],
+            set_={"user_id": stmt.excluded.user_id},
+            where=self.model.user_id == stmt.excluded.user_id,
+        ).returning(self.model.id, self.model.user_id)
+        result = await self.session.execute(stmt)
+        return {row.id: row.user_id for row in result}
+
+    @track_queries
+    async def apply_balance_deltas(self, deltas: Dict[int, Decimal]) -> None:
+        """Add per-account deltas to balances with one grouped UPDATE, without committing."""
+        if not deltas:
+            return
+        deltas_table = values(
+            column("id", Integer),
+            column("delta", Numeric(10, 2)),
+            name="deltas",
+        ).data(sorted(deltas.items()))
+        stmt = (
+            update(self.model)
+            .where(self.model.id == deltas_table.c.id)
+            .values(balance=self.model.balance + deltas_table.c.delta)
+        )
+        await self.session.execute(
+            stmt, execution_options={"synchronize_session": False}
+        )
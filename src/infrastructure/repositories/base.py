@@ -1,27 +1,76 @@
-from typing import Generic, TypeVar, Type, Optional, List, Union
+import functools
+import inspect
+from typing import Callable, Generic, TypeVar, Type, Optional, List, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from src.infrastructure.database import Base
+from src.infrastructure.database import Base, query_origin
 
 ModelType = TypeVar("ModelType", bound=Base)
 
 
+def track_queries(method: Callable) -> Callable:
+    """
+    Label SQL executed by a repository method with ``Repository.method``.
+
+    Apply it to every method that runs queries. The outermost repository call
+    wins, so ``update`` calling ``get`` is reported as ``update``. Async
+    generators get the label only while they fetch, not while the caller
+    handles a yielded item.
+    """
+    name = method.__name__
+    if inspect.isasyncgenfunction(method):
+
+        @functools.wraps(method)
+        async def stream(self, *args, **kwargs):
+            origin = f"{type(self).__name__}.{name}"
+            items = method(self, *args, **kwargs)
+            try:
+                while True:
+                    token = query_origin.set(origin)
+                    try:
+                        item = await items.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        query_origin.reset(token)
+                    yield item
+            finally:
+                await items.aclose()
+
+        return stream
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if query_origin.get() != "other":
+            return await method(self, *args, **kwargs)
+        token = query_origin.set(f"{type(self).__name__}.{name}")
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            query_origin.reset(token)
+
+    return wrapper
+
+
 class BaseRepository(Generic[ModelType]):
     def __init__(self, model: Type[ModelType], session: AsyncSession):
         self.model = model
         self.session = session
 
+    @track_queries
     async def get(self, id: Union[int, str]) -> Optional[ModelType]:
         query = select(self.model).where(self.model.id == id)  # type: ignore
         result = await self.session.execute(query)
         return result.scalars().first()
 
+    @track_queries
     async def get_all(self) -> List[ModelType]:
         query = select(self.model)
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
+    @track_queries
     async def create(self, **kwargs) -> ModelType:
         instance = self.model(**kwargs)
         self.session.add(instance)
@@ -29,6 +78,7 @@ class BaseRepository(Generic[ModelType]):
         await self.session.refresh(instance)
         return instance
 
+    @track_queries
     async def update(self, id: Union[int, str], **kwargs) -> Optional[ModelType]:
         instance = await self.get(id)
         if instance:
@@ -38,6 +88,7 @@ class BaseRepository(Generic[ModelType]):
             await self.session.refresh(instance)
         return instance
 
+    @track_queries
     async def delete(self, id: Union[int, str]) -> bool:
         instance = await self.get(id)
         if instance:
@@ -46,12 +97,20 @@ class BaseRepository(Generic[ModelType]):
             return True
         return False
 
+    @track_queries
     async def get_one_by_filter(self, *filters) -> Optional[ModelType]:
         query = select(self.model).where(*filters)
         result = await self.session.execute(query)
         return result.scalars().first()
 
+    @track_queries
     async def get_by_filter(self, *filters) -> List[ModelType]:
         query = select(self.model).where(*filters)
         result = await self.session.execute(query)
         return list(result.scalars().all())
+
+    async def commit(self) -> None:
+        await self.session.commit()
+
+    async def rollback(self) -> None:
+        await self.session.rollback()
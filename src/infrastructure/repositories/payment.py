@@ -1,17 +1,155 @@
-from sqlalchemy import select
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Row, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.domain.models.payment import Payment
-from src.infrastructure.repositories.base import BaseRepository
+from src.domain.models.payment_summary import UserPaymentSummary
+from src.infrastructure.repositories.base import BaseRepository, track_queries
 
 
 class PaymentRepository(BaseRepository[Payment]):
     def __init__(self, session: AsyncSession):
         super().__init__(Payment, session)
 
+    @track_queries
     async def get_by_transaction_id(self, transaction_id: str):
         return await self.get_one_by_filter(
             self.model.transaction_id == transaction_id,
         )
 
+    @track_queries
     async def get_by_user_id(self, user_id: int):
         return await self.get_by_filter(Payment.user_id == user_id)
+
+    @track_queries
+    async def get_page_by_user_id(
+        self,
+        user_id: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Payment]:
+        """Get up to limit payments of a user, newest first, after the (created_at, id) key."""
+        query = select(self.model).where(self.model.user_id == user_id)
+        if after is not None:
+            query = query.where(
+                tuple_(self.model.created_at, self.model.id) < tuple_(*after)
+            )
+        query = query.order_by(self.model.created_at.desc(), self.model.id.desc())
+        result = await self.session.scalars(query.limit(limit))
+        return list(result.all())
+
+    @track_queries
+    async def get_summary(self, user_id: int) -> Optional[UserPaymentSummary]:
+        """Get the trigger-maintained payment summary of a user."""
+        return await self.session.get(UserPaymentSummary, user_id)
+
+    @track_queries
+    async def aggregate_summary(self, user_id: int) -> Row:
+        """Compute count, total and last payment time of a user with one SQL aggregate."""
+        query = select(
+            func.count(self.model.id).label("payments_count"),
+            func.coalesce(func.sum(self.model.amount), 0).label("total_amount"),
+            func.max(self.model.created_at).label("last_payment_at"),
+        ).where(self.model.user_id == user_id)
+        result = await self.session.execute(query)
+        return result.one()
+
+    @track_queries
+    async def create_if_absent(self, **kwargs) -> Optional[Payment]:
+        """
+        Insert a payment unless its transaction_id already exists.
+
+        Does not commit. Returns None for an already processed transaction.
+        """
+        stmt = (
+            insert(self.model)
+            .values(**kwargs)
+            .on_conflict_do_nothing(index_elements=[self.model.transaction_id])
+            .returning(self.model)
+        )
+        result = await self.session.scalars(stmt)
+        return result.first()
+
+    @track_queries
+    async def get_existing_transaction_ids(
+        self, transaction_ids: Iterable[str]
+    ) -> Set[str]:
+        """Return the subset of transaction_ids that are already stored."""
+        transaction_ids = list(transaction_ids)
+        if not transaction_ids:
+            return set()
+        query = select(self.model.transaction_id).where(
+            self.model.transaction_id.in_(transaction_ids)
+        )
+        result = await self.session.scalars(query)
+        return set(result.all())
+
+    @track_queries
+    async def create_many_if_absent(self, rows: List[Dict]) -> List[Payment]:
+        """
+        Bulk insert payments, skipping transaction_ids that already exist.
+
+        Does not commit. Returns only the rows that were actually inserted.
+        """
+        if not rows:
+            return []
+        stmt = (
+            insert(self.model)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[self.model.transaction_id])
+            .returning(self.model)
+        )
+        result = await self.session.scalars(stmt)
+        return list(result.all())
+
+    @track_queries
+    async def stream_transaction_ids(
+        self, batch_size: int = 10000
+    ) -> AsyncIterator[str]:
+        """Stream all transaction_ids through a server-side cursor."""
+        query = select(self.model.transaction_id).execution_options(
+            yield_per=batch_size
+        )
+        result = await self.session.stream_scalars(query)
+        async for transaction_id in result:
+            yield transaction_id
+
+    @track_queries
+    async def stream_for_export(
+        self,
+        user_id: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Stream payment rows in created_at order through a server-side cursor.
+
+        Yields plain rows (no ORM identity map) in chunks of up to batch_size,
+        so memory use does not depend on the number of exported payments.
+        date_from is inclusive, date_to is exclusive. The order is served by
+        ix_payments_user_id_created_at_id for one user and by
+        ix_payments_created_at_id otherwise, so no sort delays the first row.
+        """
+        query = select(
+            self.model.id,
+            self.model.transaction_id,
+            self.model.user_id,
+            self.model.account_id,
+            self.model.amount,
+            self.model.created_at,
+        )
+        if user_id is not None:
+            query = query.where(self.model.user_id == user_id)
+        if date_from is not None:
+            query = query.where(self.model.created_at >= date_from)
+        if date_to is not None:
+            query = query.where(self.model.created_at < date_to)
+        query = query.order_by(self.model.created_at, self.model.id).execution_options(
+            yield_per=batch_size
+        )
+        result = await self.session.stream(query)
+        async for rows in result.partitions():
+            yield rows
@@ -1,24 +1,47 @@
-from typing import List
+from typing import Iterable, List, Optional, Set
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from src.domain.models.user import User
-from src.infrastructure.repositories.base import BaseRepository
+from src.infrastructure.repositories.base import BaseRepository, track_queries
 
 
 class UserRepository(BaseRepository[User]):
     def __init__(self, session: AsyncSession):
         super().__init__(User, session)
 
+    @track_queries
     async def get_by_email(self, email: str):
         return await self.get_one_by_filter(self.model.email == email)
 
+    @track_queries
     async def get_with_accounts(self, user_id: int):
         return await self.get(user_id)
 
+    @track_queries
     async def get_all_with_accounts(self) -> List[User]:
         query = select(self.model).options(selectinload(self.model.accounts))
         result = await self.session.execute(query)
         return list(result.scalars().all())
+
+    @track_queries
+    async def get_page_with_accounts(
+        self, limit: int, after_id: Optional[int] = None
+    ) -> List[User]:
+        query = select(self.model).options(selectinload(self.model.accounts))
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        result = await self.session.execute(query.order_by(self.model.id).limit(limit))
+        return list(result.scalars().all())
+
+    @track_queries
+    async def get_existing_ids(self, user_ids: Iterable[int]) -> Set[int]:
+        """Return the subset of user_ids that exist."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        query = select(self.model.id).where(self.model.id.in_(user_ids))
+        result = await self.session.scalars(query)
+        return set(result.all())
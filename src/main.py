@@ -1,9 +1,115 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import redis.asyncio as redis
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from src.api.v1.routes import auth, users, payments, accounts
+from redis.exceptions import RedisError
+from src.api.deps import READ_PRIMARY_COOKIE
+from src.api.middleware import MetricsMiddleware, ProfilingMiddleware
+from src.api.v1.routes import auth, users, payments, accounts, profiles
+from src.application.services.cache import (
+    CacheInvalidationListener,
+    get_cache_service,
+    reset_cache_service,
+)
+from src.application.services.idempotency import reset_idempotency_service
+from src.application.services.principal import (
+    get_principal_resolver,
+    reset_principal_resolver,
+)
+from src.application.services.seen_transactions import get_seen_transaction_filter
+from src.application.services.webhook_consumer import WebhookConsumerPool
 from src.config.config import settings
+from src.core.logger import log
+from src.core.metrics import monitor_event_loop_lag, registry
+from src.core.profiling import get_profile_store
+from src.infrastructure.cache import (
+    close_redis_pools,
+    get_redis_pool,
+    get_redis_pool_stats,
+)
+from src.infrastructure.database import (
+    async_session,
+    dispose_engines,
+    get_pool_stats,
+    replica_router,
+)
+from src.infrastructure.password_hasher import (
+    get_password_hasher,
+    shutdown_password_hasher,
+)
+from src.infrastructure.queue import create_webhook_queue
+
 
-app = FastAPI(title="Payment System API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    queue_client = None
+    consumer_pool = None
+    seed_task = None
+    replica_task = None
+    invalidation_task = None
+    lag_task = None
+    # Общие для процесса ресурсы создаются здесь, а не при импорте или в запросе
+    cache_service = get_cache_service()
+    try:
+        await cache_service.cache_adapter.ping()
+    except RedisError as e:
+        # Без Redis сервис работает: кэш и идемпотентность деградируют до БД
+        log.warning("Redis is unavailable at startup: {}", e)
+    if settings.CACHE_L1_ENABLED:
+        invalidation_task = asyncio.create_task(
+            CacheInvalidationListener(cache_service.cache_adapter).run()
+        )
+    if settings.METRICS_ENABLED:
+        lag_task = asyncio.create_task(
+            monitor_event_loop_lag(settings.METRICS_LOOP_LAG_INTERVAL)
+        )
+    if replica_router.engines:
+        # Первая проверка до приема запросов, чтобы сразу читать с живых реплик
+        await replica_router.check()
+        replica_task = asyncio.create_task(replica_router.run())
+    if settings.SEEN_FILTER_ENABLED:
+        # Заполняется в фоне: до готовности фильтр отвечает "возможно обработана"
+        seed_task = asyncio.create_task(
+            get_seen_transaction_filter().seed(async_session)
+        )
+    if settings.WEBHOOK_ASYNC_MODE:
+        if settings.WEBHOOK_QUEUE_BACKEND != "memory":
+            queue_client = redis.Redis(
+                connection_pool=get_redis_pool(decode_responses=True)
+            )
+        app.state.webhook_queue = create_webhook_queue(queue_client)
+        consumer_pool = WebhookConsumerPool(app.state.webhook_queue, async_session)
+        await consumer_pool.start()
+    yield
+    if seed_task is not None and not seed_task.done():
+        seed_task.cancel()
+    if replica_task is not None:
+        replica_task.cancel()
+    if lag_task is not None:
+        lag_task.cancel()
+    if invalidation_task is not None:
+        invalidation_task.cancel()
+        await asyncio.gather(invalidation_task, return_exceptions=True)
+    if consumer_pool is not None:
+        await consumer_pool.stop()
+        app.state.webhook_queue = None
+    if queue_client is not None:
+        await queue_client.aclose()
+    reset_idempotency_service()
+    reset_principal_resolver()
+    reset_cache_service()
+    await close_redis_pools()
+    await dispose_engines()
+    shutdown_password_hasher()
+    # Дописать записи, оставшиеся в очереди логгера
+    await log.complete()
+
+
+app = FastAPI(title="Payment System API", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -14,6 +120,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """After a successful write, send the client's reads to the primary for a while."""
+    response = await call_next(request)
+    if (
+        replica_router.engines
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        primary_for = settings.REPLICA_READ_YOUR_WRITES_SECONDS
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            str(time.time() + primary_for),
+            max_age=primary_for,
+            httponly=True,
+        )
+    return response
+
+
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,  # type: ignore
+        store=get_profile_store(),
+        header=settings.PROFILING_HEADER,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        slow_seconds=settings.PROFILING_SLOW_MS / 1000,
+        sample_interval=settings.PROFILING_SAMPLE_INTERVAL_MS / 1000,
+        n_plus_one_threshold=settings.PROFILING_N_PLUS_ONE_THRESHOLD,
+    )
+
+if settings.METRICS_ENABLED:
+    # Добавлен последним, поэтому внешний: время запроса включает все middleware
+    app.add_middleware(MetricsMiddleware)  # type: ignore
+
+
 # Include routers
 app.include_router(auth.router, prefix=settings.API_PREFIX + "/auth", tags=["auth"])
 app.include_router(users.router, prefix=settings.API_PREFIX + "/users", tags=["users"])
@@ -25,6 +167,9 @@ app.include_router(
 app.include_router(
     accounts.router, prefix=settings.API_PREFIX + "/accounts", tags=["accounts"]
 )
+app.include_router(
+    profiles.router, prefix=settings.API_PREFIX + "/admin/profiles", tags=["admin"]
+)
 
 
 @app.get("/health")
@@ -32,6 +177,37 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Request, SQL, cache, webhook and event loop metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/health/db")
+async def database_pool_health():
+    """Connection pool occupancy, checkout wait histogram and timeouts."""
+    return get_pool_stats()
+
+
+@app.get("/health/cache")
+async def cache_health():
+    """Hit, miss and eviction counters of the cache tiers and Redis pool usage."""
+    stats = await get_cache_service().stats()
+    stats["pools"] = get_redis_pool_stats()
+    return stats
+
+
+@app.get("/health/auth")
+async def password_hasher_health():
+    """Password hashing pool and access token resolution statistics."""
+    return {
+        "password_hasher": get_password_hasher().stats(),
+        "principal": get_principal_resolver().stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,205 @@
+# tests/factories/dataset.py
+"""
+Deterministic synthetic dataset of users, accounts and payments.
+
+Payments are skewed the way merchant traffic is: a few whale users receive a
+fixed share of all payments, the rest follow a power law over a long tail.
+Rows are generated lazily in primary key order, ready for ``COPY``, so the
+100x dataset (a million users, ten million payments) never sits in memory.
+The same spec and seed always produce the same rows.
+"""
+
+import hashlib
+import math
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterator, Tuple
+
+from src.config.config import settings
+from src.infrastructure.password_hasher import pwd_context
+
+BASE_USERS = 10_000
+BASE_PAYMENTS = 100_000
+PASSWORD = "dataset-password"
+# Момент, от которого отсчитываются даты платежей: данные не зависят от дня запуска
+REFERENCE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+MAX_AMOUNT = 99_999_999.99
+
+_hashed_password = None
+
+
+def signed_webhook(
+    transaction_id: str, user_id: int, account_id: int, amount: str
+) -> Dict:
+    """A webhook payload with a valid signature."""
+    data = f"{account_id}{Decimal(amount)}{transaction_id}{user_id}{settings.WEBHOOK_SECRET_KEY}"
+    return {
+        "transaction_id": transaction_id,
+        "user_id": user_id,
+        "account_id": account_id,
+        "amount": amount,
+        "signature": hashlib.sha256(data.encode()).hexdigest(),
+    }
+
+
+def hashed_password() -> str:
+    """bcrypt hash of PASSWORD, shared by all users: hashing each would take hours."""
+    global _hashed_password
+    if _hashed_password is None:
+        _hashed_password = pwd_context.hash(PASSWORD)
+    return _hashed_password
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """
+    Size and shape of a dataset.
+
+    Attributes:
+        users (int): Number of users.
+        payments (int): Number of payments.
+        whales (int): Users with several accounts and a large share of payments.
+        whale_payment_share (float): Share of all payments received by whales.
+        tail_exponent (float): Power-law exponent of the other users' activity.
+        days (int): Payments are spread over this many days before REFERENCE_TIME.
+        seed (int): Seed of the random generator.
+    """
+
+    users: int
+    payments: int
+    whales: int
+    whale_payment_share: float = 0.3
+    tail_exponent: float = 1.2
+    days: int = 365
+    seed: int = 42
+
+    @classmethod
+    def scaled(cls, scale: int) -> "DatasetSpec":
+        """The base dataset multiplied by ``scale``, with 0.1% of users as whales."""
+        users = BASE_USERS * scale
+        return cls(users=users, payments=BASE_PAYMENTS * scale, whales=users // 1000)
+
+
+class Dataset:
+    """
+    Rows of a dataset, in the column order of the tables.
+
+    Users get one account, every tenth user two and whales five; account ids
+    are consecutive, so the accounts of a user are found without a lookup.
+    Account balances are left at zero: the loader sets them from the payments.
+    User 1 is an admin.
+
+    Attributes:
+        spec (DatasetSpec): Size and shape of the dataset.
+    """
+
+    USER_COLUMNS = ("id", "email", "full_name", "hashed_password", "is_admin")
+    ACCOUNT_COLUMNS = ("id", "user_id", "balance")
+    PAYMENT_COLUMNS = (
+        "id",
+        "transaction_id",
+        "user_id",
+        "account_id",
+        "amount",
+        "created_at",
+    )
+
+    def __init__(self, spec: DatasetSpec):
+        self.spec = spec
+        tail = spec.users - spec.whales
+        # Перестановка рангов хвоста: самые активные пользователи не идут подряд по id
+        self._stride = next(
+            stride
+            for stride in range(max(tail // 2 + 1, 1), tail + max(tail, 2))
+            if math.gcd(stride, max(tail, 1)) == 1
+        )
+
+    def accounts_of(self, user_id: int) -> Tuple[int, int]:
+        """First account id and number of accounts of a user."""
+        whales = self.spec.whales
+        if user_id <= whales:
+            return (user_id - 1) * 5 + 1, 5
+        # До пользователя: 5 счетов у каждого кита, 1 у остальных и по 1 у каждого десятого
+        previous = user_id - 1
+        first = whales * 5 + (previous - whales) + (previous // 10 - whales // 10) + 1
+        return first, 2 if user_id % 10 == 0 else 1
+
+    @property
+    def accounts(self) -> int:
+        first, count = self.accounts_of(self.spec.users)
+        return first + count - 1
+
+    def user(self, rng: random.Random) -> int:
+        """Draw the user of a payment: a whale, or a power-law rank in the tail."""
+        spec = self.spec
+        if spec.whales and rng.random() < spec.whale_payment_share:
+            return rng.randint(1, spec.whales)
+        tail = spec.users - spec.whales
+        # Обратная функция распределения степенного закона на [1, tail]
+        power = 1 - spec.tail_exponent
+        rank = int((((tail + 1) ** power - 1) * rng.random() + 1) ** (1 / power))
+        return self.tail_user(rank)
+
+    def tail_user(self, rank: int) -> int:
+        """Id of the user with the given activity rank among non-whales, 1 is the busiest."""
+        tail = self.spec.users - self.spec.whales
+        rank = min(max(rank, 1), tail)
+        return self.spec.whales + 1 + (rank - 1) * self._stride % tail
+
+    def payment(self, rng: random.Random, transaction_id: str) -> Tuple:
+        """A random payment without its id: transaction, user, account, amount, time."""
+        user_id = self.user(rng)
+        first, count = self.accounts_of(user_id)
+        amount = min(round(rng.lognormvariate(3, 1.2), 2), MAX_AMOUNT)
+        created_at = REFERENCE_TIME - timedelta(
+            seconds=rng.random() * self.spec.days * 86400
+        )
+        return (
+            transaction_id,
+            user_id,
+            first + rng.randrange(count),
+            Decimal(f"{max(amount, 0.01):.2f}"),
+            created_at,
+        )
+
+    def user_rows(self) -> Iterator[Tuple]:
+        password = hashed_password()
+        for user_id in range(1, self.spec.users + 1):
+            yield (
+                user_id,
+                f"user{user_id}@example.com",
+                f"User {user_id}",
+                password,
+                user_id == 1,
+            )
+
+    def account_rows(self) -> Iterator[Tuple]:
+        for user_id in range(1, self.spec.users + 1):
+            first, count = self.accounts_of(user_id)
+            for account_id in range(first, first + count):
+                yield (account_id, user_id, Decimal("0.00"))
+
+    def payment_rows(self) -> Iterator[Tuple]:
+        rng = random.Random(self.spec.seed)
+        for payment_id in range(1, self.spec.payments + 1):
+            yield (payment_id, *self.payment(rng, f"tx-{payment_id}"))
+
+    def webhooks(self, count: int, seed: int = 0) -> Iterator[Dict]:
+        """
+        Signed webhooks for transactions that are not in the dataset yet.
+
+        Args:
+            count (int): Number of webhooks.
+            seed (int): Distinguishes independent streams of webhooks.
+
+        Yields:
+            Dict: Webhook payloads, skewed across users like the payments.
+        """
+        rng = random.Random(self.spec.seed * 1_000_003 + seed + 1)
+        for i in range(count):
+            transaction_id, user_id, account_id, amount, _ = self.payment(
+                rng, f"wh-{seed}-{i}"
+            )
+            yield signed_webhook(transaction_id, user_id, account_id, str(amount))
@@ -0,0 +1,187 @@
+# tests/fixtures/database.py
+"""
+Postgres, Redis stand-ins and bulk loading for the benchmarks.
+
+``bulk_load`` writes a ``Dataset`` with ``COPY`` the way large imports are
+done: secondary indexes are dropped and the payment summary triggers
+disabled for the load, then the indexes are rebuilt once, and the summaries
+and account balances are computed with one statement each.
+"""
+
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator
+
+import asyncpg
+import pytest
+import redis.asyncio as redis
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.application.services.cache import reset_cache_service
+from src.application.services.idempotency import reset_idempotency_service
+from src.application.services.principal import reset_principal_resolver
+from src.domain.models.account import Account  # noqa: F401
+from src.domain.models.payment import Payment  # noqa: F401
+from src.domain.models.payment_summary import UserPaymentSummary  # noqa: F401
+from src.domain.models.user import User  # noqa: F401
+from src.infrastructure import cache as cache_module
+from src.infrastructure.database import Base
+from tests.factories.dataset import Dataset
+
+TABLES = ("users", "accounts", "payments")
+
+# Индексы, не обслуживающие ограничения: их дешевле построить после загрузки
+SECONDARY_INDEXES_QUERY = """
+SELECT i.indexname, i.indexdef
+FROM pg_indexes AS i
+WHERE i.schemaname = 'public'
+  AND i.tablename = ANY($1::text[])
+  AND NOT EXISTS (
+      SELECT 1 FROM pg_constraint AS c
+      WHERE c.conindid = format('%I.%I', i.schemaname, i.indexname)::regclass
+  )
+"""
+
+SUMMARY_SQL = """
+INSERT INTO user_payment_summary (user_id, payments_count, total_amount, last_payment_at)
+SELECT user_id, count(*), sum(amount), max(created_at)
+FROM payments
+GROUP BY user_id
+"""
+
+BALANCES_SQL = """
+UPDATE accounts SET balance = totals.amount
+FROM (SELECT account_id, sum(amount) AS amount FROM payments GROUP BY account_id) AS totals
+WHERE accounts.id = totals.account_id
+"""
+
+
+@contextmanager
+def postgres_url() -> Iterator[str]:
+    """
+    URL of an empty-or-disposable Postgres for benchmarks.
+
+    ``BENCHMARK_DATABASE_URL`` if set, otherwise a testcontainers instance;
+    the test is skipped when neither is available. The schema is recreated
+    by the benchmarks, so never point it at a database with real data.
+    """
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if url:
+        yield url
+        return
+    try:
+        from testcontainers.postgres import PostgresContainer
+
+        container = PostgresContainer("postgres:17-alpine", driver="asyncpg")
+        container.start()
+    except Exception as e:
+        pytest.skip(f"Postgres container is not available: {e}")
+    try:
+        yield container.get_connection_url()
+    finally:
+        container.stop()
+
+
+@asynccontextmanager
+async def fake_redis_pools() -> AsyncIterator[FakeServer]:
+    """
+    Serve the application's Redis pools from fakeredis.
+
+    The pools get fakeredis connections, so the cache, idempotency and token
+    version code runs unchanged. Process-wide services created meanwhile are
+    reset on exit.
+    """
+    server = FakeServer()
+    for decode_responses in (False, True):
+        cache_module._redis_pools[decode_responses] = redis.ConnectionPool(
+            connection_class=FakeAsyncRedisConnection,
+            server=server,
+            decode_responses=decode_responses,
+        )
+    try:
+        yield server
+    finally:
+        reset_idempotency_service()
+        reset_principal_resolver()
+        reset_cache_service()
+        await cache_module.close_redis_pools()
+
+
+async def recreate_schema(url: str) -> None:
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+    finally:
+        await engine.dispose()
+
+
+async def bulk_load(url: str, dataset: Dataset) -> Dict[str, float]:
+    """
+    Recreate the schema and load a dataset into it.
+
+    Args:
+        url (str): SQLAlchemy URL of the database.
+        dataset (Dataset): The rows to load.
+
+    Returns:
+        Dict[str, float]: Seconds spent in each stage and in total.
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    def stage(name: str, since: float) -> float:
+        now = time.perf_counter()
+        timings[name] = round(now - since, 3)
+        return now
+
+    await recreate_schema(url)
+    dsn = (
+        make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+    )
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.execute("SET maintenance_work_mem = '512MB'")
+        indexes = await conn.fetch(SECONDARY_INDEXES_QUERY, list(TABLES))
+        for index in indexes:
+            await conn.execute(f'DROP INDEX "{index["indexname"]}"')
+        await conn.execute("ALTER TABLE payments DISABLE TRIGGER USER")
+        now = stage("schema", started)
+
+        await conn.copy_records_to_table(
+            "users", records=dataset.user_rows(), columns=Dataset.USER_COLUMNS
+        )
+        now = stage("copy_users", now)
+        await conn.copy_records_to_table(
+            "accounts", records=dataset.account_rows(), columns=Dataset.ACCOUNT_COLUMNS
+        )
+        now = stage("copy_accounts", now)
+        await conn.copy_records_to_table(
+            "payments", records=dataset.payment_rows(), columns=Dataset.PAYMENT_COLUMNS
+        )
+        now = stage("copy_payments", now)
+
+        for index in indexes:
+            await conn.execute(index["indexdef"])
+        await conn.execute("ALTER TABLE payments ENABLE TRIGGER USER")
+        now = stage("indexes", now)
+
+        await conn.execute(SUMMARY_SQL)
+        await conn.execute(BALANCES_SQL)
+        for table in TABLES:
+            await conn.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), max(id)) "
+                f"FROM {table}"
+            )
+        now = stage("summaries", now)
+        await conn.execute("ANALYZE")
+        stage("analyze", now)
+    finally:
+        await conn.close()
+    timings["total"] = round(time.perf_counter() - started, 3)
+    return timings
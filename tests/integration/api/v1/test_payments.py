@@ -0,0 +1,253 @@
+# tests/integration/api/v1/test_payments.py
+import hashlib
+import pytest
+from decimal import Decimal
+from fastapi.testclient import TestClient
+
+from src.api.deps import (
+    get_current_user,
+    get_payment_export_service,
+    get_payment_service,
+    get_read_payment_service,
+)
+from src.api.v1.schemas.pagination import Page
+from src.api.v1.schemas.payment import (
+    ExportFormat,
+    PaymentInDB,
+    WebhookResult,
+    WebhookStatus,
+)
+from src.config.config import settings
+from src.infrastructure.queue import InMemoryWebhookQueue
+from src.main import app
+
+WEBHOOK_URL = f"{settings.API_PREFIX}/payments/webhook"
+
+
+def make_signed_body(transaction_id: str, user_id=1, account_id=1, amount="10.00"):
+    data = f"{account_id}{Decimal(amount)}{transaction_id}{user_id}{settings.WEBHOOK_SECRET_KEY}"
+    return {
+        "transaction_id": transaction_id,
+        "user_id": user_id,
+        "account_id": account_id,
+        "amount": amount,
+        "signature": hashlib.sha256(data.encode()).hexdigest(),
+    }
+
+
+@pytest.fixture
+def webhook_queue(mocker):
+    mocker.patch.object(settings, "WEBHOOK_ASYNC_MODE", True)
+    queue = InMemoryWebhookQueue()
+    app.state.webhook_queue = queue
+    yield queue
+    app.state.webhook_queue = None
+
+
+@pytest.fixture
+def api_client():
+    # Без контекстного менеджера lifespan не запускается
+    return TestClient(app)
+
+
+@pytest.mark.asyncio
+async def test_async_webhook_is_accepted_and_queued(api_client, webhook_queue):
+    # Act
+    response = api_client.post(WEBHOOK_URL, json=make_signed_body("tx1"))
+
+    # Assert
+    assert response.status_code == 202
+    assert response.json() == {"status": "accepted", "transaction_id": "tx1"}
+    [message] = await webhook_queue.read("consumer", count=10, block_ms=10)
+    assert '"transaction_id":"tx1"' in message.data
+
+
+@pytest.mark.asyncio
+async def test_async_webhook_rejects_invalid_signature(api_client, webhook_queue):
+    # Arrange
+    body = make_signed_body("tx1")
+    body["signature"] = "invalid_signature"
+
+    # Act
+    response = api_client.post(WEBHOOK_URL, json=body)
+
+    # Assert
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid signature"
+    assert await webhook_queue.read("consumer", count=10, block_ms=10) == []
+
+
+@pytest.fixture
+def mock_payment_service(mocker):
+    payment_service = mocker.AsyncMock()
+    app.dependency_overrides[get_payment_service] = lambda: payment_service
+    yield payment_service
+    app.dependency_overrides.clear()
+
+
+def test_async_webhook_unavailable_without_queue(api_client, mocker):
+    # Arrange
+    mocker.patch.object(settings, "WEBHOOK_ASYNC_MODE", True)
+
+    # Act
+    response = api_client.post(WEBHOOK_URL, json=make_signed_body("tx1"))
+
+    # Assert
+    assert response.status_code == 503
+
+
+def test_webhook_processed_synchronously_without_async_mode(
+    api_client, mock_payment_service, webhook_queue, mocker
+):
+    # Arrange
+    mocker.patch.object(settings, "WEBHOOK_ASYNC_MODE", False)
+    mock_payment_service.process_payment.return_value = PaymentInDB(
+        id=1,
+        transaction_id="tx1",
+        user_id=1,
+        account_id=1,
+        amount=Decimal("10.00"),
+        created_at="2026-01-01T00:00:00Z",
+    )
+
+    # Act
+    response = api_client.post(WEBHOOK_URL, json=make_signed_body("tx1"))
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["id"] == 1
+    mock_payment_service.process_payment.assert_awaited_once()
+
+
+def test_batch_webhook_returns_result_per_item(api_client, mock_payment_service):
+    # Arrange
+    mock_payment_service.process_payments_batch.return_value = [
+        WebhookResult(transaction_id="tx1", status=WebhookStatus.PROCESSED),
+        WebhookResult(transaction_id="tx2", status=WebhookStatus.UNKNOWN_USER),
+    ]
+
+    # Act
+    response = api_client.post(
+        f"{WEBHOOK_URL}/batch",
+        json=[make_signed_body("tx1"), make_signed_body("tx2", user_id=99)],
+    )
+
+    # Assert
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()] == [
+        "processed",
+        "unknown_user",
+    ]
+    payloads = mock_payment_service.process_payments_batch.call_args.args[0]
+    assert [p.transaction_id for p in payloads] == ["tx1", "tx2"]
+
+
+def test_batch_webhook_rejects_oversized_batch(api_client, mock_payment_service):
+    # Arrange
+    body = [
+        make_signed_body(f"tx{i}") for i in range(settings.WEBHOOK_BATCH_MAX_SIZE + 1)
+    ]
+
+    # Act
+    response = api_client.post(f"{WEBHOOK_URL}/batch", json=body)
+
+    # Assert
+    assert response.status_code == 422
+    mock_payment_service.process_payments_batch.assert_not_called()
+
+
+@pytest.fixture
+def current_user_override(mocker):
+    app.dependency_overrides[get_current_user] = lambda: mocker.Mock(id=1)
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_my_payments_returns_page(api_client, current_user_override, mocker):
+    # Arrange
+    payment_service = mocker.AsyncMock()
+    payment_service.get_payments_page.return_value = Page[PaymentInDB](
+        items=[], next_cursor=None
+    )
+    app.dependency_overrides[get_read_payment_service] = lambda: payment_service
+
+    # Act
+    response = api_client.get(
+        f"{settings.API_PREFIX}/payments/my", params={"cursor": "abc", "limit": 10}
+    )
+    app.dependency_overrides.pop(get_read_payment_service)
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": None}
+    payment_service.get_payments_page.assert_called_once_with(1, "abc", 10)
+
+
+def test_my_payments_rejects_invalid_cursor_and_limit(
+    api_client, current_user_override, mocker
+):
+    # Arrange
+    payment_service = mocker.AsyncMock()
+    payment_service.get_payments_page.side_effect = ValueError("Invalid cursor")
+    app.dependency_overrides[get_read_payment_service] = lambda: payment_service
+    url = f"{settings.API_PREFIX}/payments/my"
+
+    # Act
+    bad_cursor = api_client.get(url, params={"cursor": "broken"})
+    bad_limit = api_client.get(url, params={"limit": settings.PAGE_SIZE_MAX + 1})
+    app.dependency_overrides.pop(get_read_payment_service)
+
+    # Assert
+    assert bad_cursor.status_code == 400
+    assert bad_limit.status_code == 422
+
+
+@pytest.fixture
+def export_service(mocker):
+    async def export(export_format, user_id, date_from, date_to):
+        yield '{"id":1}\n'
+
+    service = mocker.Mock()
+    service.export = mocker.Mock(side_effect=export)
+    app.dependency_overrides[get_payment_export_service] = lambda: service
+    yield service
+    app.dependency_overrides.pop(get_payment_export_service)
+
+
+def test_export_streams_own_payments(api_client, export_service, mocker):
+    # Arrange
+    app.dependency_overrides[get_current_user] = lambda: mocker.Mock(
+        id=1, is_admin=False
+    )
+
+    # Act
+    response = api_client.get(f"{settings.API_PREFIX}/payments/export")
+    app.dependency_overrides.pop(get_current_user)
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text == '{"id":1}\n'
+    export_service.export.assert_called_once_with(ExportFormat.NDJSON, 1, None, None)
+
+
+def test_export_other_user_requires_admin(api_client, export_service, mocker):
+    # Arrange
+    url = f"{settings.API_PREFIX}/payments/export"
+    app.dependency_overrides[get_current_user] = lambda: mocker.Mock(
+        id=1, is_admin=False
+    )
+
+    # Act
+    forbidden = api_client.get(url, params={"user_id": 2})
+    app.dependency_overrides[get_current_user] = lambda: mocker.Mock(
+        id=1, is_admin=True
+    )
+    allowed = api_client.get(url, params={"format": "csv"})
+    app.dependency_overrides.pop(get_current_user)
+
+    # Assert
+    assert forbidden.status_code == 403
+    assert allowed.status_code == 200
+    assert allowed.headers["content-type"].startswith("text/csv")
+    export_service.export.assert_called_once_with(ExportFormat.CSV, None, None, None)
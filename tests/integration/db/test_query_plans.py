@@ -0,0 +1,192 @@
+# tests/integration/db/test_query_plans.py
+"""
+Query-plan regression suite.
+
+Runs every hot repository query against a seeded Postgres, captures the SQL it
+emits and fails if EXPLAIN shows a sequential scan. Requires Docker; skipped
+otherwise.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.infrastructure.database import Base
+from src.infrastructure.repositories.account import AccountRepository
+from src.infrastructure.repositories.payment import PaymentRepository
+from src.infrastructure.repositories.user import UserRepository
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+USERS = 20_000
+PAYMENTS = 200_000
+
+SEED_SQL = [
+    f"""
+    INSERT INTO users (id, email, full_name, hashed_password, is_admin)
+    SELECT g, 'user' || g || '@example.com', 'User ' || g, 'hash', false
+    FROM generate_series(1, {USERS}) AS g
+    """,
+    f"""
+    INSERT INTO accounts (id, user_id, balance)
+    SELECT g, g, 0 FROM generate_series(1, {USERS}) AS g
+    """,
+    f"""
+    INSERT INTO payments (transaction_id, user_id, account_id, amount, created_at)
+    SELECT 'tx-' || g, g % {USERS} + 1, g % {USERS} + 1, 10,
+           now() - g * interval '1 second'
+    FROM generate_series(1, {PAYMENTS}) AS g
+    """,
+    "SELECT setval(pg_get_serial_sequence('users', 'id'), max(id)) FROM users",
+    "SELECT setval(pg_get_serial_sequence('accounts', 'id'), max(id)) FROM accounts",
+    "SELECT setval(pg_get_serial_sequence('payments', 'id'), max(id)) FROM payments",
+    "ANALYZE",
+]
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def seeded_engine():
+    try:
+        from testcontainers.postgres import PostgresContainer
+
+        container = PostgresContainer("postgres:17-alpine", driver="asyncpg")
+        container.start()
+    except Exception as e:
+        pytest.skip(f"Postgres container is not available: {e}")
+
+    engine = create_async_engine(container.get_connection_url())
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            for statement in SEED_SQL:
+                await conn.exec_driver_sql(statement)
+        yield engine
+    finally:
+        await engine.dispose()
+        container.stop()
+
+
+def find_seq_scans(plan: dict) -> list:
+    """Return the relations read with a sequential scan anywhere in the plan."""
+    scans = []
+    if plan.get("Node Type") == "Seq Scan":
+        scans.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        scans.extend(find_seq_scans(child))
+    return scans
+
+
+async def drain(iterator):
+    async for _ in iterator:
+        pass
+
+
+def after_cursor():
+    return (datetime.now(timezone.utc), 10**9)
+
+
+# Горячие запросы репозиториев; полные выборки (get_all, stream_transaction_ids) не входят
+HOT_QUERIES = {
+    "account.get": lambda s: AccountRepository(s).get(42),
+    "account.get_by_user_id": lambda s: AccountRepository(s).get_by_user_id(42),
+    "account.upsert_for_user": lambda s: AccountRepository(s).upsert_for_user(42, 42),
+    "account.add_to_balance": lambda s: AccountRepository(s).add_to_balance(
+        42, Decimal("1.00")
+    ),
+    "account.upsert_many_for_users": lambda s: AccountRepository(
+        s
+    ).upsert_many_for_users({42: 42, 43: 43}),
+    "account.apply_balance_deltas": lambda s: AccountRepository(s).apply_balance_deltas(
+        {42: Decimal("1.00"), 43: Decimal("2.00")}
+    ),
+    "payment.get_by_transaction_id": lambda s: PaymentRepository(
+        s
+    ).get_by_transaction_id("tx-100"),
+    "payment.get_by_user_id": lambda s: PaymentRepository(s).get_by_user_id(42),
+    "payment.get_page_by_user_id": lambda s: PaymentRepository(s).get_page_by_user_id(
+        42, 51
+    ),
+    "payment.get_page_by_user_id.after": lambda s: PaymentRepository(
+        s
+    ).get_page_by_user_id(42, 51, after_cursor()),
+    "payment.get_summary": lambda s: PaymentRepository(s).get_summary(42),
+    "payment.aggregate_summary": lambda s: PaymentRepository(s).aggregate_summary(42),
+    "payment.get_existing_transaction_ids": lambda s: PaymentRepository(
+        s
+    ).get_existing_transaction_ids(["tx-1", "tx-2", "tx-new"]),
+    "payment.create_if_absent": lambda s: PaymentRepository(s).create_if_absent(
+        transaction_id="tx-new", user_id=42, account_id=42, amount=Decimal("1.00")
+    ),
+    "payment.create_many_if_absent": lambda s: PaymentRepository(
+        s
+    ).create_many_if_absent(
+        [
+            {
+                "transaction_id": "tx-new",
+                "user_id": 42,
+                "account_id": 42,
+                "amount": Decimal("1.00"),
+            }
+        ]
+    ),
+    "payment.stream_for_export": lambda s: drain(
+        PaymentRepository(s).stream_for_export(user_id=42)
+    ),
+    "payment.stream_for_export.date_range": lambda s: drain(
+        PaymentRepository(s).stream_for_export(
+            date_from=after_cursor()[0] - timedelta(hours=1),
+            date_to=after_cursor()[0],
+        )
+    ),
+    "user.get": lambda s: UserRepository(s).get(42),
+    "user.get_by_email": lambda s: UserRepository(s).get_by_email("user42@example.com"),
+    "user.get_existing_ids": lambda s: UserRepository(s).get_existing_ids([1, 2, 3]),
+    "user.get_page_with_accounts": lambda s: UserRepository(s).get_page_with_accounts(
+        50, 100
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+async def test_hot_query_uses_indexes(seeded_engine, name):
+    # Arrange
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if (
+            statement.lstrip()
+            .upper()
+            .startswith(("SELECT", "INSERT", "UPDATE", "DELETE"))
+        ):
+            captured.append((statement, parameters))
+
+    session_factory = async_sessionmaker(seeded_engine, expire_on_commit=False)
+
+    # Act
+    event.listen(seeded_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with session_factory() as session:
+            await HOT_QUERIES[name](session)
+            # Изменяющие запросы не должны портить данные для следующих проверок
+            await session.rollback()
+    finally:
+        event.remove(seeded_engine.sync_engine, "before_cursor_execute", capture)
+
+    # Assert
+    assert captured, f"{name} did not run any query"
+    async with seeded_engine.connect() as conn:
+        for statement, parameters in captured:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )
+            plan = result.scalar_one()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            seq_scans = find_seq_scans(plan[0]["Plan"])
+            assert (
+                not seq_scans
+            ), f"{name} plans a sequential scan on {seq_scans}:\n{statement}"
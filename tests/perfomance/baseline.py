@@ -0,0 +1,119 @@
+# tests/perfomance/baseline.py
+"""
+Regression baseline of the benchmarks.
+
+Results of every suite are saved to ``tests/perfomance/results/<suite>.json``
+and compared with ``tests/perfomance/baseline.json``: a metric that got worse
+than the stored value by more than the tolerance fails the benchmark. The
+baseline is only meaningful on the machine that recorded it; re-record it
+there with ``pytest tests/perfomance --perf --update-baseline``.
+"""
+
+import json
+import platform
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+RESULTS_DIR = Path(__file__).with_name("results")
+DEFAULT_TOLERANCE = 0.2
+# Метрики, у которых больше - лучше; у остальных (время, память) лучше меньше
+HIGHER_IS_BETTER = {"throughput_rps"}
+# Поля результата, которые не сравниваются
+NOT_COMPARED = {"requests", "errors", "duration_s"}
+
+
+def save_result(suite: str, name: str, metrics: Dict[str, float]) -> Path:
+    """
+    Add the result of one benchmark to the results file of its suite.
+
+    Args:
+        suite (str): Suite name, e.g. ``load``.
+        name (str): Benchmark name within the suite.
+        metrics (Dict[str, float]): Measured values.
+
+    Returns:
+        Path: The results file.
+    """
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"{suite}.json"
+    results = json.loads(path.read_text()) if path.exists() else {}
+    results[name] = {
+        **metrics,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "machine": platform.node(),
+        "python": platform.python_version(),
+    }
+    path.write_text(json.dumps(results, indent=2, sort_keys=True))
+    return path
+
+
+class Baseline:
+    """
+    Stored reference values of the benchmarks, by suite and benchmark name.
+
+    Attributes:
+        path (Path): The baseline file.
+        tolerance (float): Allowed relative regression, 0.2 is 20%.
+    """
+
+    def __init__(self, path: Path = BASELINE_PATH, tolerance: Optional[float] = None):
+        """
+        Load the baseline file if it exists.
+
+        Args:
+            path (Path): The baseline file.
+            tolerance (Optional[float]): Overrides the tolerance stored in the file.
+        """
+        self.path = path
+        self._data = json.loads(path.read_text()) if path.exists() else {}
+        self.tolerance = (
+            tolerance
+            if tolerance is not None
+            else self._data.get("tolerance", DEFAULT_TOLERANCE)
+        )
+
+    def get(self, suite: str, name: str) -> Optional[Dict[str, float]]:
+        return self._data.get("suites", {}).get(suite, {}).get(name)
+
+    def compare(self, suite: str, name: str, metrics: Dict[str, float]) -> List[str]:
+        """
+        Find metrics that regressed beyond the tolerance.
+
+        Args:
+            suite (str): Suite name.
+            name (str): Benchmark name.
+            metrics (Dict[str, float]): Measured values.
+
+        Returns:
+            List[str]: One line per regressed metric; empty if there is no
+            baseline for the benchmark yet.
+        """
+        reference = self.get(suite, name)
+        if reference is None:
+            return []
+        regressions = []
+        for metric, value in metrics.items():
+            expected = reference.get(metric)
+            if metric in NOT_COMPARED or not expected:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                regressed = value < expected * (1 - self.tolerance)
+            else:
+                regressed = value > expected * (1 + self.tolerance)
+            if regressed:
+                regressions.append(
+                    f"{suite}/{name} {metric}: {value:.4g}, baseline {expected:.4g}"
+                )
+        return regressions
+
+    def update(self, suite: str, name: str, metrics: Dict[str, float]) -> None:
+        """Store measured values as the new reference and write the file."""
+        self._data.setdefault("tolerance", self.tolerance)
+        self._data.setdefault("suites", {}).setdefault(suite, {})[name] = {
+            metric: value
+            for metric, value in metrics.items()
+            if metric not in NOT_COMPARED
+        }
+        self.path.write_text(json.dumps(self._data, indent=2, sort_keys=True) + "\n")
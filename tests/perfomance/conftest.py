@@ -0,0 +1,20 @@
+# tests/perfomance/conftest.py
+import pytest
+
+from tests.perfomance.baseline import Baseline, save_result
+
+
+@pytest.fixture
+def record_benchmark(request):
+    """Save a benchmark result and return its regressions against the baseline."""
+    baseline = Baseline(tolerance=request.config.getoption("--baseline-tolerance"))
+    update = request.config.getoption("--update-baseline")
+
+    def record(suite, name, metrics):
+        save_result(suite, name, metrics)
+        if update:
+            baseline.update(suite, name, metrics)
+            return []
+        return baseline.compare(suite, name, metrics)
+
+    return record
@@ -0,0 +1,70 @@
+# tests/perfomance/load.py
+"""
+Load generator for the in-process and uvicorn-served application.
+
+A scenario is an async function that sends request number ``i`` and returns
+whether the response was the expected one. ``run_scenario`` calls it from a
+fixed number of concurrent workers and reports throughput and latency
+percentiles; latency is measured per request in the client, so it includes
+HTTP parsing and, under uvicorn, the socket round trip.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(
+    request: Callable[[int], Awaitable[bool]], requests: int, concurrency: int
+) -> Dict[str, float]:
+    """
+    Send ``requests`` requests from ``concurrency`` workers.
+
+    Args:
+        request (Callable[[int], Awaitable[bool]]): Sends request number ``i``
+            and returns False if the response was unexpected.
+        requests (int): Total number of requests.
+        concurrency (int): Requests in flight at a time.
+
+    Returns:
+        Dict[str, float]: ``requests``, ``errors``, ``duration_s``,
+        ``throughput_rps`` and ``p50_ms``, ``p95_ms``, ``p99_ms``.
+    """
+    latencies: List[float] = []
+    errors = 0
+    next_index = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        # Общий итератор: запросы раздаются по порядку, как только воркер свободен
+        for i in next_index:
+            started = time.perf_counter()
+            try:
+                ok = await request(i)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(requests / duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
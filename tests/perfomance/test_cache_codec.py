@@ -0,0 +1,118 @@
+# tests/perfomance/test_cache_codec.py
+"""
+Cache codec benchmarks.
+
+Compares the previous cache path (stdlib JSON text, then model validation on
+every hit) with each installed codec, with and without compression, on payment
+lists of realistic sizes. Every variant ends with the same validation, so the
+difference is the codec; ``model_construct`` is measured for reference, it is
+slower than validation in pydantic v2.
+
+Run with ``pytest tests/perfomance/test_cache_codec.py --perf``.
+"""
+
+import json
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.api.v1.schemas.payment import PaymentInDB
+from src.infrastructure.cache_codec import CacheCodec, available_codecs
+
+pytestmark = pytest.mark.perfomance
+
+# Одна запись, страница, длинная история пользователя
+SIZES = [1, 50, 1000, 10000]
+ROUNDS = 20
+
+
+def make_payments(count):
+    started = datetime(2026, 1, 1, 12, 0)
+    return [
+        PaymentInDB(
+            id=i,
+            transaction_id=f"tx-{i:010d}",
+            user_id=1,
+            account_id=1,
+            amount=Decimal(i % 10000) / 100,
+            created_at=started + timedelta(seconds=i),
+        ).model_dump()
+        for i in range(1, count + 1)
+    ]
+
+
+def legacy_encode(value):
+    return json.dumps(value, default=str).encode()
+
+
+def legacy_decode(data):
+    return [PaymentInDB(**item) for item in json.loads(data)]
+
+
+def construct(payments):
+    return [PaymentInDB.model_construct(**item) for item in payments]
+
+
+def best_of(func, rounds=ROUNDS):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def variants():
+    yield "legacy-json+validate", legacy_encode, legacy_decode
+    for name, codec in sorted(available_codecs().items()):
+        for compress_min_bytes in (0, 1024):
+            cache_codec = CacheCodec(codec, compress_min_bytes)
+            label = f"{name}{'+zlib' if compress_min_bytes else ''}+validate"
+
+            def decode(data, cache_codec=cache_codec):
+                return [PaymentInDB(**item) for item in cache_codec.decode(data)]
+
+            yield label, cache_codec.encode, decode
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_cache_codec_benchmark(size, capsys):
+    # Arrange
+    payments = make_payments(size)
+    expected = [PaymentInDB(**payment) for payment in payments]
+    rows = []
+
+    # Act
+    for label, encode, decode in variants():
+        data = encode(payments)
+        # Медленные варианты на больших списках меряем меньше раз
+        rounds = ROUNDS if size <= 1000 else 3
+        rows.append(
+            (
+                label,
+                len(data),
+                best_of(lambda: encode(payments), rounds),
+                best_of(lambda: decode(data), rounds),
+            )
+        )
+        assert decode(data) == expected
+    rows.append(
+        (
+            "model_construct (reference)",
+            0,
+            0.0,
+            best_of(lambda: construct(payments), ROUNDS if size <= 1000 else 3),
+        )
+    )
+
+    # Assert
+    with capsys.disabled():
+        print(f"\n{size} payments")
+        print(f"{'codec':<28}{'bytes':>10}{'encode ms':>12}{'decode ms':>12}")
+        for label, length, encode_seconds, decode_seconds in rows:
+            print(
+                f"{label:<28}{length:>10}"
+                f"{encode_seconds * 1000:>12.3f}{decode_seconds * 1000:>12.3f}"
+            )
@@ -0,0 +1,279 @@
+# tests/perfomance/test_load.py
+"""
+End-to-end load tests of the API.
+
+The application runs with its real services, repositories and middleware
+against Postgres, and against fakeredis in place of Redis: the Redis
+connection pools are swapped for ones with fakeredis connections, so the
+cache, idempotency and token version code runs unchanged. Postgres is
+``BENCHMARK_DATABASE_URL`` if set, otherwise a testcontainers instance;
+without either the tests are skipped.
+
+Scenarios: signed webhook storms with 10% and 50% duplicates, a login burst,
+``/accounts/me`` and ``/payments/my`` polling and a mix of all of them.
+Throughput and p50/p95/p99 latency are saved to
+``tests/perfomance/results/load.json`` and compared with the baseline.
+
+Run with ``pytest tests/perfomance/test_load.py --perf``; add
+``--load-server uvicorn`` to serve the app through uvicorn on a local port
+and ``--update-baseline`` to record new reference values.
+"""
+
+import asyncio
+import random
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from typing import AsyncIterator, List
+
+import httpx
+import pytest
+import uvicorn
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from src.api.deps import get_read_db_session
+from src.api.v1.schemas.user import UserInDB
+from src.application.services.auth import AuthService
+from src.application.services.principal import get_principal_resolver
+from src.config.config import settings
+from src.domain.models.account import Account
+from src.domain.models.payment import Payment
+from src.domain.models.payment_summary import UserPaymentSummary  # noqa: F401
+from src.domain.models.user import User
+from src.infrastructure.database import Base, create_engine_from_settings, get_session
+from src.infrastructure.password_hasher import pwd_context
+from src.main import app
+from tests.factories.dataset import signed_webhook
+from tests.fixtures.database import fake_redis_pools, postgres_url
+from tests.perfomance.load import run_scenario
+
+pytestmark = pytest.mark.perfomance
+
+SEED = 20250101
+USERS = 500
+PAYMENTS_PER_USER = 20
+PASSWORD = "load-test-password"
+CONCURRENCY = 50
+API = settings.API_PREFIX
+
+
+@pytest.fixture(scope="module")
+def database_url():
+    with postgres_url() as url:
+        yield url
+
+
+async def seed(engine: AsyncEngine) -> List[UserInDB]:
+    """Recreate the schema with USERS users, one account and some payments each."""
+    # Один хэш на всех: bcrypt при заполнении занял бы минуты
+    hashed_password = pwd_context.hash(PASSWORD)
+    users = [
+        UserInDB(
+            id=i, email=f"user{i}@example.com", full_name=f"User {i}", is_admin=False
+        )
+        for i in range(1, USERS + 1)
+    ]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            [
+                {**user.model_dump(), "hashed_password": hashed_password}
+                for user in users
+            ],
+        )
+        await conn.execute(
+            insert(Account),
+            [{"id": user.id, "user_id": user.id, "balance": 0} for user in users],
+        )
+        await conn.execute(
+            insert(Payment),
+            [
+                {
+                    "transaction_id": f"seed-{user.id}-{k}",
+                    "user_id": user.id,
+                    "account_id": user.id,
+                    "amount": Decimal("10.00"),
+                }
+                for user in users
+                for k in range(PAYMENTS_PER_USER)
+            ],
+        )
+        # Идентификаторы заданы явно: сдвигаем последовательности за них
+        for table in ("users", "accounts"):
+            await conn.execute(text(f"SELECT setval('{table}_id_seq', {USERS})"))
+    return users
+
+
+@asynccontextmanager
+async def serve(mode: str) -> AsyncIterator[httpx.AsyncClient]:
+    """A client of the app, called in-process or through uvicorn on a free port."""
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    if mode == "asgi":
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://load", limits=limits
+        ) as client:
+            yield client
+        return
+
+    # lifespan выключен в обоих режимах: ресурсы теста готовит фикстура
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="error")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits
+        ) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        await task
+
+
+@pytest.fixture
+async def load_app(request, database_url):
+    engine = create_engine_from_settings(database_url)
+    users = await seed(engine)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_session():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    app.dependency_overrides[get_read_db_session] = override_session
+    try:
+        async with fake_redis_pools():
+            async with serve(request.config.getoption("--load-server")) as client:
+                yield client, users
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+def webhook_storm(client, users, duplicate_ratio):
+    rng = random.Random(SEED)
+    sent: List[dict] = []
+
+    async def request(i):
+        if sent and rng.random() < duplicate_ratio:
+            body = rng.choice(sent)
+            response = await client.post(f"{API}/payments/webhook", json=body)
+            # Повтор принимается как идемпотентный ответ или отклоняется как дубликат
+            return response.status_code in (200, 400, 409)
+        user = rng.choice(users)
+        amount = f"{rng.randint(100, 100000) / 100:.2f}"
+        body = signed_webhook(f"load-{i}", user.id, user.id, amount)
+        sent.append(body)
+        response = await client.post(f"{API}/payments/webhook", json=body)
+        return response.status_code == 200
+
+    return request
+
+
+def login_burst(client, users):
+    async def request(i):
+        response = await client.post(
+            f"{API}/auth/token",
+            data={"username": users[i % len(users)].email, "password": PASSWORD},
+        )
+        return response.status_code == 200
+
+    return request
+
+
+async def bearer_headers(users):
+    resolver = get_principal_resolver()
+    return [
+        {
+            "Authorization": "Bearer "
+            + AuthService.create_access_token(await resolver.claims(user))
+        }
+        for user in users
+    ]
+
+
+def polling(client, headers, path):
+    async def request(i):
+        response = await client.get(f"{API}{path}", headers=headers[i % len(headers)])
+        return response.status_code == 200
+
+    return request
+
+
+def mixed(scenarios):
+    """Pick a scenario per request by weight, deterministically."""
+    rng = random.Random(SEED)
+    requests = [request for request, _ in scenarios]
+    weights = [weight for _, weight in scenarios]
+
+    async def request(i):
+        return await rng.choices(requests, weights)[0](i)
+
+    return request
+
+
+async def build(name, client, users):
+    if name == "webhook_storm_dup10":
+        return webhook_storm(client, users, 0.1), 3000
+    if name == "webhook_storm_dup50":
+        return webhook_storm(client, users, 0.5), 3000
+    if name == "login_burst":
+        # bcrypt ограничивает вход пулом PASSWORD_HASH_WORKERS, запросов меньше
+        return login_burst(client, users), 200
+    headers = await bearer_headers(users)
+    if name == "accounts_me_polling":
+        return polling(client, headers, "/accounts/me"), 5000
+    if name == "payments_my_polling":
+        return polling(client, headers, "/payments/my"), 5000
+    return (
+        mixed(
+            [
+                (webhook_storm(client, users, 0.2), 40),
+                (polling(client, headers, "/accounts/me"), 30),
+                (polling(client, headers, "/payments/my"), 28),
+                (login_burst(client, users), 2),
+            ]
+        ),
+        5000,
+    )
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "webhook_storm_dup10",
+        "webhook_storm_dup50",
+        "login_burst",
+        "accounts_me_polling",
+        "payments_my_polling",
+        "mixed",
+    ],
+)
+async def test_load(name, load_app, record_benchmark, request, capsys):
+    # Arrange
+    client, users = load_app
+    scenario, requests = await build(name, client, users)
+
+    # Act
+    result = await run_scenario(scenario, requests, CONCURRENCY)
+
+    # Assert
+    with capsys.disabled():
+        print(
+            f"\n{name} [{request.config.getoption('--load-server')}]: "
+            f"{result['throughput_rps']} req/s, p50 {result['p50_ms']} ms, "
+            f"p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, "
+            f"{result['errors']} errors"
+        )
+    assert result["errors"] == 0
+    regressions = record_benchmark(
+        "load", f"{name}-{request.config.getoption('--load-server')}", result
+    )
+    assert not regressions, "Slower than the baseline:\n" + "\n".join(regressions)
@@ -0,0 +1,169 @@
+# tests/perfomance/test_logging.py
+"""
+Logging overhead per webhook request.
+
+Replays the log calls of one synchronous webhook (six INFO and two DEBUG
+lines) against the previous setup, synchronous text sinks with eager
+f-strings, and against the current one: ``QueueSink`` writer threads, lazy
+arguments, JSON file records and sampled DEBUG. loguru's own ``enqueue`` is
+measured for reference. The time is measured in the calling thread, which is
+what the request waits for.
+
+Run with ``pytest tests/perfomance/test_logging.py --perf``.
+"""
+
+import os
+import statistics
+import time
+
+import pytest
+from loguru import logger
+
+from src.core.logger import (
+    TEXT_FORMAT,
+    QueueSink,
+    RotatingFile,
+    json_format,
+    parse_sample_rates,
+    sampling_filter,
+    setup_logger,
+)
+
+pytestmark = pytest.mark.perfomance
+
+REQUESTS = 2000
+
+
+def eager_request(tx):
+    logger.info(f"Received webhook for transaction_id: {tx}")
+    logger.info(f"Processing payment with transaction_id: {tx}")
+    logger.debug(f"Verifying signature for transaction_id: {tx}, result: valid")
+    logger.debug(f"Found existing account ID 1 for user_id 1")
+    logger.info(f"Creating new account with ID 1 for user_id 1")
+    logger.info(f"Payment processed successfully for transaction_id: {tx}")
+    logger.info(f"Webhook processed successfully for transaction_id: {tx}")
+    logger.info(f"Retrieved 1 payments for user_id: 1")
+
+
+def lazy_request(tx):
+    logger.info(
+        "Received webhook for transaction_id: {transaction_id}", transaction_id=tx
+    )
+    logger.info(
+        "Processing payment with transaction_id: {transaction_id}", transaction_id=tx
+    )
+    logger.debug(
+        "Verifying signature for transaction_id: {transaction_id}, result: {}",
+        "valid",
+        transaction_id=tx,
+    )
+    logger.debug(
+        "Found existing account ID {account_id} for user_id {user_id}",
+        account_id=1,
+        user_id=1,
+    )
+    logger.info(
+        "Creating new account with ID {account_id} for user_id {user_id}",
+        account_id=1,
+        user_id=1,
+    )
+    logger.info(
+        "Payment processed successfully for transaction_id: {transaction_id}",
+        transaction_id=tx,
+    )
+    logger.info(
+        "Webhook processed successfully for transaction_id: {transaction_id}",
+        transaction_id=tx,
+    )
+    logger.info("Retrieved {} payments for user_id: {user_id}", 1, user_id=1)
+
+
+def configure_previous(path, terminal):
+    logger.remove()
+    logger.add(terminal, format=TEXT_FORMAT, level="INFO")
+    logger.add(path, rotation="1 MB", format=TEXT_FORMAT, level="DEBUG")
+
+
+def configure_loguru_enqueue(path, terminal):
+    logger.remove()
+    sample = sampling_filter(parse_sample_rates("DEBUG=0.1"))
+    logger.add(terminal, format=TEXT_FORMAT, level="INFO", enqueue=True, filter=sample)
+    logger.add(
+        path,
+        rotation="1 MB",
+        format=json_format,
+        level="DEBUG",
+        enqueue=True,
+        filter=sample,
+    )
+
+
+def configure_current(path, terminal):
+    logger.remove()
+    sample = sampling_filter(parse_sample_rates("DEBUG=0.1"))
+    logger.add(QueueSink(terminal), format=TEXT_FORMAT, level="INFO", filter=sample)
+    logger.add(
+        QueueSink(RotatingFile(path, 1024 * 1024)),
+        format=json_format,
+        level="DEBUG",
+        filter=sample,
+    )
+
+
+class SlowTerminal:
+    """stderr piped to a log collector that takes ``delay`` seconds per flush."""
+
+    def __init__(self, stream, delay):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, message):
+        self.stream.write(message)
+
+    def flush(self):
+        time.sleep(self.delay)
+
+
+def run(request):
+    durations = []
+    for i in range(REQUESTS):
+        started = time.perf_counter()
+        request(f"tx-{i:010d}")
+        durations.append(time.perf_counter() - started)
+    durations.sort()
+    return statistics.mean(durations), durations[int(len(durations) * 0.99)]
+
+
+@pytest.mark.parametrize("flush_delay", [0, 0.0002], ids=["fast-io", "slow-io"])
+def test_logging_overhead_per_request(tmp_path, capsys, flush_delay):
+    # Arrange
+    rows = []
+    variants = (
+        ("sync text, f-strings", configure_previous, eager_request),
+        ("loguru enqueue, lazy", configure_loguru_enqueue, lazy_request),
+        ("queue sink json, lazy", configure_current, lazy_request),
+    )
+
+    # Act
+    try:
+        with open(os.devnull, "w") as devnull:
+            terminal = SlowTerminal(devnull, flush_delay)
+            for label, configure, request in variants:
+                configure(tmp_path / f"{label[:5]}.log", terminal)
+                mean, p99 = run(request)
+                # Снимаем обработчики: очереди дописываются до следующего варианта
+                logger.remove()
+                rows.append((label, mean, p99))
+    finally:
+        setup_logger()
+
+    # Assert
+    assert (tmp_path / "queue.log").stat().st_size > 0
+    if flush_delay:
+        # Медленный вывод задерживает запросы только при синхронной записи
+        assert rows[2][1] < rows[0][1]
+    with capsys.disabled():
+        print(f"\n{REQUESTS} webhook requests, 8 log calls each, flush {flush_delay}s")
+        print(f"{'variant':<24}{'mean us':>10}{'p99 us':>10}")
+        for label, mean, p99 in rows:
+            print(f"{label:<24}{mean * 1e6:>10.1f}{p99 * 1e6:>10.1f}")
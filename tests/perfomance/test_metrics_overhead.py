@@ -0,0 +1,89 @@
+# tests/perfomance/test_metrics_overhead.py
+"""
+Cost of the metrics on the request path.
+
+Calls a trivial ASGI app directly, with and without ``MetricsMiddleware``,
+and times the individual metric updates a webhook makes (a counter, cache
+lookups and SQL statements). Run with
+``pytest tests/perfomance/test_metrics_overhead.py --perf``.
+"""
+
+import time
+
+import pytest
+
+from src.api.middleware import MetricsMiddleware
+from src.application.services.cache import _record_lookup
+from src.core.metrics import MetricsRegistry
+
+pytestmark = pytest.mark.perfomance
+
+CALLS = 20000
+
+
+class Route:
+    path = "/api/v1/payments/webhook"
+
+
+async def app(scope, receive, send):
+    scope["route"] = Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def per_call(handler):
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(CALLS):
+            await handler({"type": "http", "method": "POST"}, receive, send)
+        best = min(best, time.perf_counter() - started)
+    return best / CALLS
+
+
+def per_update(func):
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        func()
+    return (time.perf_counter() - started) / CALLS
+
+
+@pytest.mark.asyncio
+async def test_metrics_overhead(capsys):
+    # Arrange
+    registry = MetricsRegistry()
+    counter = registry.counter("outcomes_total", "Outcomes.", ["outcome"])
+    histogram = registry.histogram("queries_seconds", "Queries.", ["origin"])
+    started = time.perf_counter()
+
+    # Act
+    bare = await per_call(app)
+    instrumented = await per_call(MetricsMiddleware(app))
+    rows = [
+        ("middleware per request", instrumented - bare),
+        ("counter inc", per_update(lambda: counter.labels("processed").inc())),
+        (
+            "histogram observe",
+            per_update(lambda: histogram.labels("PaymentRepository.get").observe(0.01)),
+        ),
+        (
+            "cache lookup record",
+            per_update(lambda: _record_lookup("payments:user:1", "hit", started)),
+        ),
+    ]
+
+    # Assert
+    # Вся инструментация вебхука - единицы микросекунд на фоне миллисекунд запроса
+    assert instrumented - bare < 50e-6
+    with capsys.disabled():
+        print(f"\n{'operation':<26}{'us':>8}")
+        for label, seconds in rows:
+            print(f"{label:<26}{seconds * 1e6:>8.2f}")
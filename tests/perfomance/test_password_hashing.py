@@ -0,0 +1,80 @@
+# tests/perfomance/test_password_hashing.py
+"""
+Event-loop lag during a login storm.
+
+A ticker coroutine sleeps 10 ms in a loop and records how late it wakes up
+while concurrent logins verify bcrypt hashes, first inline on the event loop
+(the previous ``AuthService.verify_password``) and then through
+``PasswordHasher``. The lag is what every other request on the worker waits.
+
+Run with ``pytest tests/perfomance/test_password_hashing.py --perf``.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.infrastructure.password_hasher import PasswordHasher, pwd_context
+
+pytestmark = pytest.mark.perfomance
+
+LOGINS = 16
+TICK = 0.01
+
+
+async def measure_lag(storm):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - started - TICK)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK)
+    started = time.perf_counter()
+    await storm()
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticker_task
+    lags.sort()
+    return elapsed, lags[len(lags) // 2], lags[-1]
+
+
+@pytest.mark.asyncio
+async def test_login_storm_event_loop_lag(capsys):
+    # Arrange
+    hashed = pwd_context.hash("password")
+    hasher = PasswordHasher(max_workers=4)
+
+    async def inline_login():
+        return pwd_context.verify("password", hashed)
+
+    async def storm(login):
+        results = await asyncio.gather(*(login() for _ in range(LOGINS)))
+        assert all(results)
+
+    # Act
+    before = await measure_lag(lambda: storm(inline_login))
+    after = await measure_lag(lambda: storm(lambda: hasher.verify("password", hashed)))
+    stats = hasher.stats()
+    hasher.shutdown()
+
+    # Assert
+    # Пока bcrypt в пуле, event loop отвечает почти без задержки
+    assert after[2] < before[2]
+    assert stats["max_queued"] > 0
+    with capsys.disabled():
+        print(f"\n{LOGINS} concurrent logins")
+        print(f"{'variant':<16}{'total s':>10}{'p50 lag ms':>12}{'max lag ms':>12}")
+        for label, (elapsed, median, worst) in (
+            ("inline", before),
+            ("thread pool", after),
+        ):
+            print(
+                f"{label:<16}{elapsed:>10.2f}{median * 1000:>12.1f}{worst * 1000:>12.1f}"
+            )
+        print(f"max queued: {stats['max_queued']}")
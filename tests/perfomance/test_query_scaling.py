@@ -0,0 +1,239 @@
+# tests/perfomance/test_query_scaling.py
+"""
+Latency of every repository query, and the webhook service path, by data size.
+
+For each scale in ``--dataset-scales`` (1x is 10k users and 100k payments)
+the synthetic dataset is bulk-loaded and every query runs REPEATS times for
+three kinds of users: a whale, the busiest long-tail user and a typical one.
+Median and p95 latency go to ``tests/perfomance/results/query_scaling.json``
+and are compared with the baseline; the load itself to ``dataset_load.json``.
+A table of median latency by scale, with the growth from the smallest to the
+largest scale, is printed and written to ``results/query_scaling.md``.
+
+Cached service reads are served by the cache regardless of the data size;
+their misses are the repository queries measured here.
+
+Run with ``pytest tests/perfomance/test_query_scaling.py --perf``; requires
+Docker or ``BENCHMARK_DATABASE_URL``. ``--dataset-scales 1,10`` skips the
+100x dataset, which takes a few minutes to generate and load.
+"""
+
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.api.v1.schemas.payment import WebhookPayload
+from src.application.services.base import ServiceFactory
+from src.infrastructure.repositories.account import AccountRepository
+from src.infrastructure.repositories.payment import PaymentRepository
+from src.infrastructure.repositories.user import UserRepository
+from tests.factories.dataset import REFERENCE_TIME, Dataset, DatasetSpec
+from tests.fixtures.database import bulk_load, fake_redis_pools, postgres_url
+from tests.perfomance.baseline import RESULTS_DIR
+from tests.perfomance.load import percentile
+
+pytestmark = pytest.mark.perfomance
+
+REPEATS = 20
+PAGE_SIZE = 51
+
+
+def pytest_generate_tests(metafunc):
+    if "scale" in metafunc.fixturenames:
+        scales = metafunc.config.getoption("--dataset-scales")
+        metafunc.parametrize(
+            "scale", [int(scale) for scale in scales.split(",")], ids=lambda s: f"{s}x"
+        )
+
+
+@pytest.fixture(scope="module")
+def database_url():
+    with postgres_url() as url:
+        yield url
+
+
+def targets(dataset: Dataset) -> SimpleNamespace:
+    """Users and keys the queries are run for."""
+    tail = dataset.spec.users - dataset.spec.whales
+    return SimpleNamespace(
+        whale=1,
+        busiest=dataset.tail_user(1),
+        typical=dataset.tail_user(tail // 100),
+        transaction_id=f"tx-{dataset.spec.payments // 2}",
+        email=f"user{dataset.spec.users // 2}@example.com",
+        middle_user=dataset.spec.users // 2,
+        # Курсор примерно из середины истории платежей
+        cursor=(REFERENCE_TIME - timedelta(days=dataset.spec.days // 2), 10**9),
+    )
+
+
+async def drain(iterator):
+    async for _ in iterator:
+        pass
+
+
+def payments(s):
+    return PaymentRepository(s)
+
+
+def accounts(s):
+    return AccountRepository(s)
+
+
+def users(s):
+    return UserRepository(s)
+
+
+QUERIES = {
+    "user.get": lambda s, t: users(s).get(t.middle_user),
+    "user.get_by_email": lambda s, t: users(s).get_by_email(t.email),
+    "user.get_with_accounts.whale": lambda s, t: users(s).get_with_accounts(t.whale),
+    "user.get_existing_ids": lambda s, t: users(s).get_existing_ids(
+        [t.whale, t.busiest, t.typical]
+    ),
+    "user.get_page_with_accounts.first": lambda s, t: users(s).get_page_with_accounts(
+        PAGE_SIZE
+    ),
+    "user.get_page_with_accounts.middle": lambda s, t: users(s).get_page_with_accounts(
+        PAGE_SIZE, t.middle_user
+    ),
+    "account.get": lambda s, t: accounts(s).get(t.whale),
+    "account.get_by_user_id.whale": lambda s, t: accounts(s).get_by_user_id(t.whale),
+    "account.upsert_for_user": lambda s, t: accounts(s).upsert_for_user(1, t.whale),
+    "account.add_to_balance": lambda s, t: accounts(s).add_to_balance(
+        1, Decimal("1.00")
+    ),
+    "account.apply_balance_deltas": lambda s, t: accounts(s).apply_balance_deltas(
+        {1: Decimal("1.00"), 2: Decimal("2.00")}
+    ),
+    "payment.get_by_transaction_id": lambda s, t: payments(s).get_by_transaction_id(
+        t.transaction_id
+    ),
+    "payment.get_by_user_id.typical": lambda s, t: payments(s).get_by_user_id(
+        t.typical
+    ),
+    "payment.get_page_by_user_id.whale": lambda s, t: payments(s).get_page_by_user_id(
+        t.whale, PAGE_SIZE
+    ),
+    "payment.get_page_by_user_id.busiest": lambda s, t: payments(s).get_page_by_user_id(
+        t.busiest, PAGE_SIZE
+    ),
+    "payment.get_page_by_user_id.busiest.after": lambda s, t: payments(
+        s
+    ).get_page_by_user_id(t.busiest, PAGE_SIZE, t.cursor),
+    "payment.get_summary.busiest": lambda s, t: payments(s).get_summary(t.busiest),
+    "payment.aggregate_summary.whale": lambda s, t: payments(s).aggregate_summary(
+        t.whale
+    ),
+    "payment.aggregate_summary.busiest": lambda s, t: payments(s).aggregate_summary(
+        t.busiest
+    ),
+    "payment.get_existing_transaction_ids": lambda s, t: payments(
+        s
+    ).get_existing_transaction_ids([t.transaction_id, "tx-0", "wh-new"]),
+    "payment.create_if_absent": lambda s, t: payments(s).create_if_absent(
+        transaction_id="wh-new", user_id=t.whale, account_id=1, amount=Decimal("1.00")
+    ),
+    "payment.stream_for_export.typical": lambda s, t: drain(
+        payments(s).stream_for_export(user_id=t.typical)
+    ),
+    "payment.stream_for_export.whale": lambda s, t: drain(
+        payments(s).stream_for_export(user_id=t.whale)
+    ),
+}
+
+
+async def measure(session_factory, query, t):
+    """Median and p95 of REPEATS runs; changes are rolled back after each run."""
+    durations = []
+    for _ in range(REPEATS):
+        async with session_factory() as session:
+            started = time.perf_counter()
+            await query(session, t)
+            durations.append(time.perf_counter() - started)
+            await session.rollback()
+    durations.sort()
+    return {
+        "p50_ms": round(percentile(durations, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(durations, 0.95) * 1000, 3),
+    }
+
+
+async def measure_webhooks(session_factory, dataset, scale):
+    """process_payment for new, signed transactions; each one is committed."""
+    durations = []
+    async with fake_redis_pools():
+        for body in dataset.webhooks(REPEATS, seed=scale):
+            async with session_factory() as session:
+                service = ServiceFactory(session).get_payment_service()
+                started = time.perf_counter()
+                await service.process_payment(WebhookPayload(**body))
+                durations.append(time.perf_counter() - started)
+    durations.sort()
+    return {
+        "p50_ms": round(percentile(durations, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(durations, 0.95) * 1000, 3),
+    }
+
+
+def render_scaling(results) -> str:
+    """Markdown table of median latency by query and scale."""
+    by_query = {}
+    for key, metrics in results.items():
+        name, scale = key.rsplit("@", 1)
+        by_query.setdefault(name, {})[int(scale.rstrip("x"))] = metrics["p50_ms"]
+    scales = sorted({scale for values in by_query.values() for scale in values})
+    lines = [
+        "| query | " + " | ".join(f"{scale}x ms" for scale in scales) + " | growth |",
+        "|---" * (len(scales) + 2) + "|",
+    ]
+    for name in sorted(by_query):
+        values = by_query[name]
+        cells = [f"{values[s]:.2f}" if s in values else "" for s in scales]
+        first, last = values.get(scales[0]), values.get(scales[-1])
+        growth = f"x{last / first:.1f}" if first and last else ""
+        lines.append(f"| {name} | " + " | ".join(cells) + f" | {growth} |")
+    return "\n".join(lines)
+
+
+async def test_query_latency_by_data_size(
+    scale, database_url, record_benchmark, capsys
+):
+    # Arrange
+    dataset = Dataset(DatasetSpec.scaled(scale))
+    load_timings = await bulk_load(database_url, dataset)
+    engine = create_async_engine(database_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    t = targets(dataset)
+    regressions = record_benchmark("dataset_load", f"{scale}x", load_timings)
+
+    # Act
+    try:
+        for name, query in QUERIES.items():
+            metrics = await measure(session_factory, query, t)
+            regressions += record_benchmark(
+                "query_scaling", f"{name}@{scale}x", metrics
+            )
+        metrics = await measure_webhooks(session_factory, dataset, scale)
+        regressions += record_benchmark(
+            "query_scaling", f"service.process_payment@{scale}x", metrics
+        )
+    finally:
+        await engine.dispose()
+
+    # Assert
+    results = json.loads((RESULTS_DIR / "query_scaling.json").read_text())
+    table = render_scaling(results)
+    (RESULTS_DIR / "query_scaling.md").write_text(table + "\n")
+    with capsys.disabled():
+        print(
+            f"\n{scale}x: {dataset.spec.users} users, {dataset.accounts} accounts, "
+            f"{dataset.spec.payments} payments loaded in {load_timings['total']} s"
+        )
+        print(table)
+    assert not regressions, "Slower than the baseline:\n" + "\n".join(regressions)
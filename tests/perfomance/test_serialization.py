@@ -0,0 +1,232 @@
+# tests/perfomance/test_serialization.py
+"""
+Serialization and validation hot paths, one at a time.
+
+For lists of 1, 100, 10k and 100k items measures:
+
+- ``model_validate`` of ORM rows into ``PaymentInDB``, ``AccountInDB`` and
+  ``UserWithAccounts`` (two accounts each), as the services do after a query;
+- the cache round trip of ``CacheService``: ``model_dump`` and encoding with
+  the configured codec on a miss, decoding and validation on a hit;
+- FastAPI response encoding: ``serialize_response`` with the route's
+  ``response_model`` and rendering of the ``JSONResponse`` body.
+
+Time is the best per-call time (small lists are called many times per
+round). Memory is measured separately under tracemalloc: the peak above the
+starting point and what the result keeps allocated. Results are saved to
+``tests/perfomance/results/serialization.json`` and compared with the
+baseline, so a schema or codec change that costs more than the tolerance
+fails here before it reaches production.
+
+Run with ``pytest tests/perfomance/test_serialization.py --perf``.
+"""
+
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from functools import lru_cache
+from typing import List
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from src.api.v1.schemas.account import AccountInDB
+from src.api.v1.schemas.payment import PaymentInDB
+from src.api.v1.schemas.user import UserWithAccounts
+from src.config.config import settings
+from src.domain.models.account import Account
+from src.domain.models.payment import Payment
+from src.domain.models.payment_summary import UserPaymentSummary  # noqa: F401
+from src.domain.models.user import User
+from src.infrastructure.cache_codec import create_cache_codec
+
+pytestmark = pytest.mark.perfomance
+
+SIZES = [1, 100, 10_000, 100_000]
+# На маленьких списках один вызов короче разрешения таймера: вызываем пачкой
+CALLS_PER_ROUND = 10_000
+STARTED = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+codec = create_cache_codec(settings.CACHE_CODEC, settings.CACHE_COMPRESS_MIN_BYTES)
+
+
+@lru_cache(maxsize=None)
+def orm_payments(size):
+    return [
+        Payment(
+            id=i,
+            transaction_id=f"tx-{i:010d}",
+            user_id=i % 1000 + 1,
+            account_id=i % 1000 + 1,
+            amount=Decimal(i % 100000) / 100,
+            created_at=STARTED + timedelta(seconds=i),
+        )
+        for i in range(1, size + 1)
+    ]
+
+
+@lru_cache(maxsize=None)
+def orm_accounts(size):
+    return [
+        Account(id=i, user_id=i, balance=Decimal(i % 100000) / 100)
+        for i in range(1, size + 1)
+    ]
+
+
+@lru_cache(maxsize=None)
+def orm_users(size):
+    return [
+        User(
+            id=i,
+            email=f"user{i}@example.com",
+            full_name=f"User {i}",
+            hashed_password="hash",
+            is_admin=False,
+            accounts=[
+                Account(id=2 * i - 1, user_id=i, balance=Decimal("10.00")),
+                Account(id=2 * i, user_id=i, balance=Decimal("20.50")),
+            ],
+        )
+        for i in range(1, size + 1)
+    ]
+
+
+@lru_cache(maxsize=None)
+def payments(size):
+    return [PaymentInDB.model_validate(payment) for payment in orm_payments(size)]
+
+
+async def list_payments() -> List[PaymentInDB]:
+    pass
+
+
+response_field = APIRoute(
+    "/payments", list_payments, response_model=List[PaymentInDB]
+).response_field
+
+
+def run_sync(coroutine):
+    """Result of a coroutine that completes without suspending."""
+    # serialize_response ничего не ждет: цикл событий только добавил бы шум
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("The coroutine suspended")
+
+
+def validate_payments(size):
+    rows = orm_payments(size)
+    return lambda: [PaymentInDB.model_validate(row) for row in rows]
+
+
+def validate_accounts(size):
+    rows = orm_accounts(size)
+    return lambda: [AccountInDB.model_validate(row) for row in rows]
+
+
+def validate_users(size):
+    rows = orm_users(size)
+    return lambda: [UserWithAccounts.model_validate(row) for row in rows]
+
+
+def cache_encode(size):
+    items = payments(size)
+    return lambda: codec.encode([item.model_dump() for item in items])
+
+
+def cache_decode(size):
+    data = codec.encode([item.model_dump() for item in payments(size)])
+    return lambda: [PaymentInDB(**item) for item in codec.decode(data)]
+
+
+def response_encode(size):
+    items = payments(size)
+
+    def encode():
+        content = run_sync(
+            serialize_response(field=response_field, response_content=items)
+        )
+        return JSONResponse(content).body
+
+    return encode
+
+
+PATHS = {
+    "validate.PaymentInDB": validate_payments,
+    "validate.AccountInDB": validate_accounts,
+    "validate.UserWithAccounts": validate_users,
+    "cache.dump_encode": cache_encode,
+    "cache.decode_validate": cache_decode,
+    "response.encode": response_encode,
+}
+
+
+def best_time(func, size):
+    calls = max(1, CALLS_PER_ROUND // size)
+    rounds = 3 if size >= 100_000 else 7
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, (time.perf_counter() - started) / calls)
+    return best
+
+
+def memory(func):
+    """Peak allocation during one call and memory held by its result, in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak - start, current - start
+
+
+def check(path, size, result):
+    """The paths must produce the same data as the application."""
+    if path == "cache.dump_encode":
+        assert len(codec.decode(result)) == size
+    elif path == "cache.decode_validate":
+        assert result == payments(size)
+    elif path == "response.encode":
+        assert json.loads(result)[-1]["transaction_id"] == f"tx-{size:010d}"
+    else:
+        assert len(result) == size
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("path", list(PATHS))
+def test_serialization(path, size, record_benchmark, capsys):
+    # Arrange
+    func = PATHS[path](size)
+    check(path, size, func())
+
+    # Act
+    seconds = best_time(func, size)
+    peak, retained = memory(func)
+    metrics = {
+        "best_ms": round(seconds * 1000, 4),
+        "per_item_us": round(seconds / size * 1e6, 3),
+        "peak_kb": round(peak / 1024, 1),
+        "retained_kb": round(retained / 1024, 1),
+    }
+    regressions = record_benchmark("serialization", f"{path}[{size}]", metrics)
+
+    # Assert
+    with capsys.disabled():
+        print(
+            f"\n{path:<28}{size:>8} items {metrics['best_ms']:>11.4f} ms "
+            f"{metrics['per_item_us']:>8.3f} us/item "
+            f"peak {metrics['peak_kb']:>10.1f} KB retained {metrics['retained_kb']:>10.1f} KB"
+        )
+    assert not regressions, "Slower than the baseline:\n" + "\n".join(regressions)
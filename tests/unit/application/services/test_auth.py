@@ -38,7 +38,7 @@ async def test_authenticate_user(mocker, email, password, expected_user):
     mock_user.email = "test@example.com"
     mock_user.full_name = "Test User"
     mock_user.is_admin = False
-    mock_user.hashed_password = AuthService.get_password_hash("password")
+    mock_user.hashed_password = await AuthService.get_password_hash("password")
     mock_user_repo.get_by_email.return_value = mock_user
     auth_service = AuthService(mock_user_repo)
 
@@ -0,0 +1,413 @@
+# tests/unit/application/services/test_cache.py
+import asyncio
+import json
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from src.application.services import cache as cache_module
+from src.application.services.cache import CacheInvalidationListener, CacheService
+from src.infrastructure.cache import RedisCacheAdapter
+from src.infrastructure.local_cache import LocalCache
+
+
+@pytest.fixture
+async def redis_server():
+    return FakeServer()
+
+
+@pytest.fixture
+async def make_adapter(redis_server):
+    # Адаптеры разных "экземпляров" приложения на общем FakeRedis
+    adapters = []
+
+    def make():
+        adapter = RedisCacheAdapter()
+        adapter.client = FakeRedis(server=redis_server)
+        adapters.append(adapter)
+        return adapter
+
+    yield make
+    for adapter in adapters:
+        await adapter.client.aclose()
+
+
+def encode(value):
+    return cache_module._codec.encode(value)
+
+
+def decode(data):
+    return cache_module._codec.decode(data)
+
+
+def make_local_cache():
+    local_cache = LocalCache(max_size=100, ttl=30)
+    local_cache.activate()
+    return local_cache
+
+
+@pytest.mark.asyncio
+async def test_get_is_served_from_local_cache(make_adapter, mocker):
+    # Arrange
+    adapter = make_adapter()
+    service = CacheService(adapter, make_local_cache())
+    await service.set("user:1", {"id": 1})
+    redis_get = mocker.spy(adapter.client, "get")
+
+    # Act
+    first = await service.get("user:1")
+    second = await service.get("user:1")
+
+    # Assert
+    assert first == second == {"id": 1}
+    redis_get.assert_not_called()
+    assert service.local_cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_local_miss_falls_through_to_redis(make_adapter):
+    # Arrange
+    adapter = make_adapter()
+    await adapter.set("user:1", encode({"id": 1}))
+    service = CacheService(adapter, make_local_cache())
+
+    # Act
+    value = await service.get("user:1")
+
+    # Assert
+    assert value == {"id": 1}
+    assert decode(service.local_cache.get("user:1")) == {"id": 1}
+
+
+@pytest.mark.asyncio
+async def test_delete_invalidates_local_cache_of_other_instances(make_adapter):
+    # Arrange
+    other_local_cache = LocalCache(max_size=100, ttl=30)
+    # Сообщения своего экземпляра игнорируются, поэтому слушает "другой" экземпляр
+    listener = CacheInvalidationListener(
+        make_adapter(), other_local_cache, instance_id="other"
+    )
+    listener_task = asyncio.create_task(listener.run())
+    while not other_local_cache.active:
+        await asyncio.sleep(0.01)
+    other_local_cache.set("user:1", encode({"id": 1}))
+    service = CacheService(make_adapter(), make_local_cache())
+
+    # Act
+    await service.delete("user:1")
+    for _ in range(100):
+        if other_local_cache.get("user:1") is None:
+            break
+        await asyncio.sleep(0.01)
+
+    # Assert
+    assert other_local_cache.get("user:1") is None
+    listener_task.cancel()
+    await asyncio.gather(listener_task, return_exceptions=True)
+    assert not other_local_cache.active
+
+
+def test_listener_ignores_own_invalidations():
+    # Arrange
+    local_cache = make_local_cache()
+    local_cache.set("user:1", encode({}))
+    listener = CacheInvalidationListener(None, local_cache)
+    message = json.dumps({"origin": cache_module.INSTANCE_ID, "keys": ["user:1"]})
+
+    # Act
+    listener.handle({"type": "message", "data": message})
+
+    # Assert
+    assert decode(local_cache.get("user:1")) == {}
+
+
+def test_listener_drops_tagged_entries():
+    # Arrange
+    local_cache = make_local_cache()
+    local_cache.set("payments:user:1", encode([]), tags=("user:1",))
+    listener = CacheInvalidationListener(None, local_cache, instance_id="other")
+    message = json.dumps(
+        {"origin": cache_module.INSTANCE_ID, "keys": [], "tags": ["user:1"]}
+    )
+
+    # Act
+    listener.handle({"type": "message", "data": message})
+
+    # Assert
+    assert local_cache.get("payments:user:1") is None
+
+
+@pytest.fixture
+def cache_service(make_adapter):
+    return CacheService(make_adapter(), make_local_cache())
+
+
+@pytest.mark.asyncio
+async def test_get_many_reads_local_misses_with_one_mget(cache_service, mocker):
+    # Arrange
+    adapter = cache_service.cache_adapter
+    await cache_service.set("user:1", {"id": 1})
+    await adapter.set("user:2", encode({"id": 2}))
+    mget = mocker.spy(adapter.client, "mget")
+
+    # Act
+    values = await cache_service.get_many(["user:1", "user:2", "user:3"])
+
+    # Assert
+    assert values == {"user:1": {"id": 1}, "user:2": {"id": 2}, "user:3": None}
+    # user:1 отдан из L1, остальные запрошены одной командой
+    mget.assert_called_once_with(["user:2", "user:3"])
+    assert decode(cache_service.local_cache.get("user:2")) == {"id": 2}
+
+
+@pytest.mark.asyncio
+async def test_set_many_writes_in_one_pipeline(cache_service, mocker):
+    # Arrange
+    adapter = cache_service.cache_adapter
+    pipeline = mocker.spy(adapter, "pipeline")
+
+    # Act
+    await cache_service.set_many({"user:1": {"id": 1}, "user:2": {"id": 2}}, 60)
+
+    # Assert
+    pipeline.assert_called_once()
+    assert [decode(data) for data in await adapter.get_many(["user:1", "user:2"])] == [
+        {"id": 1},
+        {"id": 2},
+    ]
+    assert 0 < await adapter.client.ttl("user:1") <= 60
+
+
+@pytest.mark.asyncio
+async def test_batch_applies_operations_in_order(cache_service, mocker):
+    # Arrange
+    adapter = cache_service.cache_adapter
+    await cache_service.set("payments:user:1", [])
+    pipeline = mocker.spy(adapter, "pipeline")
+
+    # Act
+    async with cache_service.batch() as batch:
+        batch.set("payment:1", {"id": 1})
+        batch.delete("payments:user:1")
+        batch.set_raw("idempotency:tx-1", "done", 60)
+        # До выхода из блока в Redis ничего не отправлено
+        assert await adapter.get("payment:1") is None
+
+    # Assert
+    pipeline.assert_called_once()
+    assert decode(await adapter.get("payment:1")) == {"id": 1}
+    assert await adapter.get("payments:user:1") is None
+    assert await adapter.get("idempotency:tx-1") == b"done"
+    assert cache_service.local_cache.get("payments:user:1") is None
+    # Сырые записи в L1 не попадают
+    assert cache_service.local_cache.get("idempotency:tx-1") is None
+
+
+@pytest.mark.asyncio
+async def test_batch_is_dropped_on_error(cache_service):
+    # Arrange
+    adapter = cache_service.cache_adapter
+
+    # Act
+    with pytest.raises(RuntimeError):
+        async with cache_service.batch() as batch:
+            batch.set("payment:1", {"id": 1})
+            raise RuntimeError("failed")
+
+    # Assert
+    assert await adapter.get("payment:1") is None
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_merges_concurrent_loads(cache_service):
+    # Arrange
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"id": 1}
+
+    # Act
+    results = await asyncio.gather(
+        *(cache_service.get_or_load("user:1", loader) for _ in range(10))
+    )
+
+    # Assert
+    assert calls == 1
+    assert all(result == {"id": 1} for result in results)
+    assert decode(await cache_service.cache_adapter.get("user:1")) == {"id": 1}
+    assert await cache_service.cache_adapter.get("lock:user:1") is None
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_waits_for_load_in_other_process(cache_service, mocker):
+    # Arrange
+    adapter = cache_service.cache_adapter
+    await adapter.set_if_absent("lock:user:1", "other-process", 5)
+    loader = mocker.AsyncMock(return_value={"id": 2})
+
+    async def other_process_loads():
+        await asyncio.sleep(0.1)
+        await adapter.set("user:1", encode({"id": 1}))
+
+    # Act
+    _, value = await asyncio.gather(
+        other_process_loads(), cache_service.get_or_load("user:1", loader)
+    )
+
+    # Assert
+    assert value == {"id": 1}
+    loader.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_loads_itself_when_lock_wait_times_out(cache_service, mocker):
+    # Arrange
+    mocker.patch.object(cache_module.settings, "CACHE_LOCK_WAIT", 0.1)
+    await cache_service.cache_adapter.set_if_absent("lock:user:1", "other", 5)
+    loader = mocker.AsyncMock(return_value={"id": 1})
+
+    # Act
+    value = await cache_service.get_or_load("user:1", loader)
+
+    # Assert
+    assert value == {"id": 1}
+    loader.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_keeps_lock_taken_over_by_other_process(cache_service):
+    # Arrange
+    adapter = cache_service.cache_adapter
+
+    async def slow_loader():
+        # Блокировка истекла во время загрузки и досталась другому процессу
+        await adapter.set("lock:user:1", "other-process")
+        return {"id": 1}
+
+    # Act
+    value = await cache_service.get_or_load("user:1", slow_loader)
+
+    # Assert
+    assert value == {"id": 1}
+    assert await adapter.get("lock:user:1") == b"other-process"
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_refreshes_early_near_expiry(cache_service, mocker):
+    # Arrange
+    await cache_service.cache_adapter.set("user:1", encode({"id": 1}), expire=1)
+
+    async def loader():
+        return {"id": 2}
+
+    # Загрузка "длится" дольше оставшегося TTL - обновление почти неизбежно
+    mocker.patch.dict(cache_module._load_seconds, {loader.__qualname__: 1000.0})
+    mocker.patch.object(cache_module.random, "random", return_value=0.5)
+
+    # Act
+    value = await cache_service.get_or_load("user:1", loader)
+
+    # Assert
+    assert value == {"id": 2}
+    assert decode(await cache_service.cache_adapter.get("user:1")) == {"id": 2}
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_does_not_cache_none_or_errors(cache_service, mocker):
+    # Arrange
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        raise RuntimeError("db is down")
+
+    missing = mocker.AsyncMock(return_value=None)
+
+    # Act
+    with pytest.raises(RuntimeError):
+        await asyncio.gather(
+            cache_service.get_or_load("user:1", failing),
+            cache_service.get_or_load("user:1", failing),
+        )
+    value = await cache_service.get_or_load("user:2", missing)
+
+    # Assert
+    assert calls == 1
+    assert value is None
+    assert await cache_service.cache_adapter.get("user:2") is None
+    assert cache_module._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_value_in_old_format_is_a_miss(cache_service, mocker):
+    # Arrange
+    # Значение, записанное до появления заголовка кодека
+    await cache_service.cache_adapter.set("user:1", '{"id": 1}')
+    loader = mocker.AsyncMock(return_value={"id": 1})
+
+    # Act
+    value = await cache_service.get_or_load("user:1", loader)
+
+    # Assert
+    assert value == {"id": 1}
+    loader.assert_called_once()
+    assert decode(await cache_service.cache_adapter.get("user:1")) == {"id": 1}
+
+
+@pytest.mark.asyncio
+async def test_invalidate_tags_makes_tagged_entries_stale(
+    cache_service, make_adapter, mocker
+):
+    # Arrange
+    adapter = cache_service.cache_adapter
+    loader = mocker.AsyncMock(side_effect=[[1], [1, 2], [3]])
+    await cache_service.get_or_load("payments:user:1", loader, tags=["user:1"])
+    await cache_service.get_or_load("payments:user:2", loader, tags=["user:2"])
+    # Другой экземпляр приложения читает мимо своего L1
+    other_service = CacheService(make_adapter(), make_local_cache())
+    pipeline = mocker.spy(adapter, "pipeline")
+
+    # Act
+    await cache_service.invalidate_tags(["user:1"])
+    first = await other_service.get_or_load("payments:user:1", loader, tags=["user:1"])
+    second = await other_service.get_or_load("payments:user:2", loader, tags=["user:2"])
+
+    # Assert
+    # Инвалидация - один pipeline на все теги, ключи не перечисляются
+    pipeline.assert_called_once()
+    assert first == [3]
+    assert second == [1, 2]
+    assert loader.await_count == 3
+    assert cache_service.local_cache.get("payments:user:1") is None
+    assert await adapter.get("tag:user:1") == b"1"
+    tag_ttl = await adapter.client.ttl("tag:user:1")
+    assert 0 < tag_ttl <= cache_module.settings.CACHE_TAG_TTL
+
+
+@pytest.mark.asyncio
+async def test_lookups_are_counted_by_key_prefix(cache_service, mocker):
+    # Arrange
+    requests = cache_module._cache_requests
+    before = {
+        result: requests.labels("payments:user:", result).value
+        for result in ("l1", "hit", "miss")
+    }
+    loader = mocker.AsyncMock(return_value=[1])
+
+    # Act
+    await cache_service.get_or_load("payments:user:1", loader)
+    await cache_service.get_or_load("payments:user:1", loader)
+    cache_service.local_cache.delete_many(["payments:user:1"])
+    await cache_service.get("payments:user:1")
+
+    # Assert
+    assert {
+        result: requests.labels("payments:user:", result).value - before[result]
+        for result in before
+    } == {"l1": 1, "hit": 1, "miss": 1}
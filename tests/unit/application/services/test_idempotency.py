@@ -0,0 +1,88 @@
+# tests/unit/application/services/test_idempotency.py
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from fakeredis.aioredis import FakeRedis
+from redis.exceptions import ConnectionError
+
+from src.api.v1.schemas.payment import PaymentInDB
+from src.application.services.idempotency import IdempotencyService
+from src.infrastructure.cache import RedisCacheAdapter
+
+
+@pytest.fixture
+async def cache_adapter():
+    adapter = RedisCacheAdapter()
+    adapter.client = FakeRedis()
+    yield adapter
+    await adapter.client.aclose()
+
+
+@pytest.fixture
+def sample_payment():
+    return PaymentInDB(
+        id=1,
+        transaction_id="test123",
+        user_id=1,
+        account_id=1,
+        amount=Decimal("100.50"),
+        created_at=datetime(2025, 1, 1, 12, 0),
+    )
+
+
+@pytest.mark.asyncio
+async def test_claim_is_exclusive(cache_adapter):
+    # Arrange
+    service = IdempotencyService(cache_adapter)
+
+    # Act
+    first = await service.claim("test123")
+    second = await service.claim("test123")
+
+    # Assert
+    assert first is True
+    assert second is False
+    assert await service.get_result("test123") is None
+    assert await cache_adapter.client.ttl("idempotency:test123") > 0
+
+
+@pytest.mark.asyncio
+async def test_complete_stores_original_response(cache_adapter, sample_payment):
+    # Arrange
+    service = IdempotencyService(cache_adapter)
+    await service.claim("test123")
+
+    # Act
+    await service.complete("test123", sample_payment)
+
+    # Assert
+    assert await service.get_result("test123") == sample_payment
+    assert await service.claim("test123") is False
+
+
+@pytest.mark.asyncio
+async def test_release_allows_new_claim(cache_adapter):
+    # Arrange
+    service = IdempotencyService(cache_adapter)
+    await service.claim("test123")
+
+    # Act
+    await service.release("test123")
+
+    # Assert
+    assert await service.claim("test123") is True
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fall_back_to_database(mocker, sample_payment):
+    # Arrange
+    adapter = mocker.AsyncMock(spec=RedisCacheAdapter)
+    adapter.set_if_absent.side_effect = ConnectionError("redis down")
+    adapter.get.side_effect = ConnectionError("redis down")
+    adapter.set.side_effect = ConnectionError("redis down")
+    service = IdempotencyService(adapter)
+
+    # Act & Assert: ошибки Redis не пробрасываются
+    assert await service.claim("test123") is False
+    assert await service.get_result("test123") is None
+    await service.complete("test123", sample_payment)
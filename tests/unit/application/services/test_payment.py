@@ -3,11 +3,42 @@ import pytest
 from decimal import Decimal
 import hashlib
 from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from fakeredis.aioredis import FakeRedis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.application.services import payment as payment_module
+from src.application.services.cache import CacheBatch, CacheService
+from src.application.services.idempotency import IdempotencyService
 from src.application.services.payment import PaymentService
-from src.api.v1.schemas.payment import WebhookPayload, PaymentInDB
+from src.application.services.seen_transactions import SeenTransactionFilter
+from src.core.bloom import BloomFilter
+from src.infrastructure.cache import RedisCacheAdapter
+from src.infrastructure.local_cache import LocalCache
+from src.api.v1.schemas.pagination import Page, decode_cursor, encode_cursor
+from src.api.v1.schemas.payment import WebhookPayload, PaymentInDB, WebhookStatus
 from src.config.config import settings
 
 
+@pytest.fixture(autouse=True)
+async def idempotency_service(mocker):
+    # Хранилище идемпотентности на FakeRedis вместо настоящего Redis
+    mocker.patch.object(settings, "IDEMPOTENCY_ENABLED", True)
+    adapter = RedisCacheAdapter()
+    adapter.client = FakeRedis()
+    service = IdempotencyService(adapter)
+    mocker.patch.object(payment_module, "get_idempotency_service", return_value=service)
+    yield service
+    await adapter.client.aclose()
+
+
+@pytest.fixture
+def cache_service(idempotency_service):
+    # Кэш на том же FakeRedis, что и хранилище идемпотентности
+    return CacheService(idempotency_service.cache_adapter, LocalCache(100, 30))
+
+
 @pytest.fixture
 def sample_payment():
     return PaymentInDB(
@@ -45,7 +76,10 @@ async def test_verify_signature_valid(mocker, valid_webhook_payload):
     # Arrange
     mock_payment_repo = mocker.AsyncMock()
     mock_account_repo = mocker.AsyncMock()
-    payment_service = PaymentService(mock_payment_repo, mock_account_repo)
+    mock_user_repo = mocker.AsyncMock()
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
 
     # Act
     result = payment_service.verify_signature(valid_webhook_payload)
@@ -59,7 +93,10 @@ async def test_verify_signature_invalid(mocker, valid_webhook_payload):
     # Arrange
     mock_payment_repo = mocker.AsyncMock()
     mock_account_repo = mocker.AsyncMock()
-    payment_service = PaymentService(mock_payment_repo, mock_account_repo)
+    mock_user_repo = mocker.AsyncMock()
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
 
     # Изменяем подпись для невалидности
     valid_webhook_payload.signature = "invalid_signature"
@@ -72,11 +109,17 @@ async def test_verify_signature_invalid(mocker, valid_webhook_payload):
 
 
 @pytest.mark.asyncio
-async def test_process_payment_success(mocker, valid_webhook_payload, sample_payment):
+async def test_process_payment_success(
+    mocker, valid_webhook_payload, sample_payment, cache_service
+):
     # Arrange
     mock_payment_repo = mocker.AsyncMock()
     mock_account_repo = mocker.AsyncMock()
-    mock_cache_service = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+    adapter = cache_service.cache_adapter
+    payments = await cache_service.get_or_load(
+        "payments:user:1", mocker.AsyncMock(return_value=[]), tags=["user:1"]
+    )
 
     # Настраиваем моки
     mock_payment_repo.get_by_transaction_id.return_value = None
@@ -86,8 +129,12 @@ async def test_process_payment_success(mocker, valid_webhook_payload, sample_pay
     )
     mock_payment_repo.create.return_value = sample_payment
 
-    payment_service = PaymentService(mock_payment_repo, mock_account_repo)
-    payment_service.cache_service = mock_cache_service
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+    payment_service.cache_service = cache_service
+    pipeline = mocker.spy(adapter, "pipeline")
+    redis_set = mocker.spy(adapter.client, "setex")
 
     # Act
     result = await payment_service.process_payment(valid_webhook_payload)
@@ -106,8 +153,19 @@ async def test_process_payment_success(mocker, valid_webhook_payload, sample_pay
     mock_account_repo.update_balance.assert_called_once_with(
         valid_webhook_payload.account_id, valid_webhook_payload.amount
     )
-    mock_cache_service.set.assert_called_once()
-    mock_cache_service.delete.assert_called_once()
+    # Ответ для повторов, кэш платежа и инвалидация - одним pipeline
+    pipeline.assert_called_once()
+    redis_set.assert_not_called()
+    assert await adapter.get("payment:1") is not None
+    assert await adapter.get("idempotency:test123") == result.model_dump_json().encode()
+    # Список платежей не удалён, а устарел по тегу пользователя
+    assert payments == []
+    assert await adapter.get("tag:user:1") == b"1"
+    loader = mocker.AsyncMock(return_value=[{"id": 1}])
+    assert await cache_service.get_or_load(
+        "payments:user:1", loader, tags=["user:1"]
+    ) == [{"id": 1}]
+    loader.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -117,11 +175,14 @@ async def test_process_payment_duplicate_transaction(
     # Arrange
     mock_payment_repo = mocker.AsyncMock()
     mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
 
     # Настраиваем мок для имитации существующей транзакции
     mock_payment_repo.get_by_transaction_id.return_value = sample_payment
 
-    payment_service = PaymentService(mock_payment_repo, mock_account_repo)
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
 
     # Act & Assert
     with pytest.raises(ValueError, match="Transaction already processed"):
@@ -135,12 +196,18 @@ async def test_process_payment_duplicate_transaction(
     mock_payment_repo.create.assert_not_called()
 
 
+async def load_through(key, loader, **kwargs):
+    # Имитация промаха кэша в get_or_load
+    return await loader()
+
+
 @pytest.mark.asyncio
 async def test_get_payments_by_user_id_cache_hit(mocker):
     # Arrange
     user_id = 1
     mock_payment_repo = mocker.AsyncMock()
     mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
     mock_cache_service = mocker.AsyncMock()
 
     # Настраиваем мок кэша для имитации кэш-хита
@@ -154,9 +221,11 @@ async def test_get_payments_by_user_id_cache_hit(mocker):
             "created_at": "2023-01-01T12:00:00",
         }
     ]
-    mock_cache_service.get.return_value = cached_payments
+    mock_cache_service.get_or_load.return_value = cached_payments
 
-    payment_service = PaymentService(mock_payment_repo, mock_account_repo)
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
     payment_service.cache_service = mock_cache_service
 
     # Act
@@ -169,7 +238,10 @@ async def test_get_payments_by_user_id_cache_hit(mocker):
     assert result[0].amount == Decimal("100.50")
 
     # Проверяем, что кэш был запрошен, но репозиторий - нет
-    mock_cache_service.get.assert_called_once_with(f"payments:user:{user_id}")
+    mock_cache_service.get_or_load.assert_called_once()
+    assert (
+        mock_cache_service.get_or_load.call_args.args[0] == f"payments:user:{user_id}"
+    )
     mock_payment_repo.get_by_user_id.assert_not_called()
 
 
@@ -179,13 +251,16 @@ async def test_get_payments_by_user_id_cache_miss(mocker, sample_payment):
     user_id = 1
     mock_payment_repo = mocker.AsyncMock()
     mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
     mock_cache_service = mocker.AsyncMock()
 
-    # Настраиваем моки
-    mock_cache_service.get.return_value = None
+    # Настраиваем моки: промах кэша, значение загружает loader
+    mock_cache_service.get_or_load.side_effect = load_through
     mock_payment_repo.get_by_user_id.return_value = [sample_payment]
 
-    payment_service = PaymentService(mock_payment_repo, mock_account_repo)
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
     payment_service.cache_service = mock_cache_service
 
     # Act
@@ -197,6 +272,591 @@ async def test_get_payments_by_user_id_cache_miss(mocker, sample_payment):
     assert result[0].transaction_id == sample_payment.transaction_id
 
     # Проверяем, что был запрос к кэшу, а потом к репозиторию
-    mock_cache_service.get.assert_called_once_with(f"payments:user:{user_id}")
+    mock_cache_service.get_or_load.assert_called_once()
+    assert (
+        mock_cache_service.get_or_load.call_args.args[0] == f"payments:user:{user_id}"
+    )
     mock_payment_repo.get_by_user_id.assert_called_once_with(user_id)
-    mock_cache_service.set.assert_called_once()
+
+
+def make_payments(count, user_id=1):
+    return [
+        PaymentInDB(
+            id=count - index,
+            transaction_id=f"tx-{count - index}",
+            user_id=user_id,
+            account_id=1,
+            amount=Decimal("1.00"),
+            created_at=datetime(2024, 1, 1, 12, 0, count - index),
+        )
+        for index in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_payments_page_first_page(mocker):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_cache_service = mocker.AsyncMock()
+    mock_cache_service.get_or_load.side_effect = load_through
+    # Репозиторий возвращает на одну запись больше лимита - значит, есть следующая страница
+    mock_payment_repo.get_page_by_user_id.return_value = make_payments(3)
+
+    payment_service = PaymentService(
+        mock_payment_repo, mocker.AsyncMock(), mocker.AsyncMock()
+    )
+    payment_service.cache_service = mock_cache_service
+    mocker.patch.object(settings, "PAGE_SIZE_DEFAULT", 2)
+
+    # Act
+    page = await payment_service.get_payments_page(1)
+
+    # Assert
+    assert [item.id for item in page.items] == [3, 2]
+    assert decode_cursor(page.next_cursor) == {
+        "c": datetime(2024, 1, 1, 12, 0, 2).isoformat(),
+        "i": 2,
+    }
+    mock_payment_repo.get_page_by_user_id.assert_called_once_with(1, 3, None)
+    assert (
+        mock_cache_service.get_or_load.call_args.args[0] == "payments:user:1:page:first"
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_payments_page_after_cursor(mocker):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_cache_service = mocker.AsyncMock()
+    mock_cache_service.get_or_load.side_effect = load_through
+    mock_payment_repo.get_page_by_user_id.return_value = make_payments(1)
+    cursor = encode_cursor({"c": "2024-01-01T12:00:02", "i": 2})
+
+    payment_service = PaymentService(
+        mock_payment_repo, mocker.AsyncMock(), mocker.AsyncMock()
+    )
+    payment_service.cache_service = mock_cache_service
+
+    # Act
+    page = await payment_service.get_payments_page(1, cursor, 10)
+
+    # Assert
+    assert [item.id for item in page.items] == [1]
+    assert page.next_cursor is None
+    mock_payment_repo.get_page_by_user_id.assert_called_once_with(
+        1, 11, (datetime(2024, 1, 1, 12, 0, 2), 2)
+    )
+    assert (
+        mock_cache_service.get_or_load.call_args.args[0]
+        == f"payments:user:1:page:{cursor}:10"
+    )
+    # Поздно зафиксированный платёж может попасть и в эту страницу
+    assert mock_cache_service.get_or_load.call_args.kwargs["tags"] == ["user:1"]
+
+
+@pytest.mark.asyncio
+async def test_get_payments_page_cache_hit(mocker):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_cache_service = mocker.AsyncMock()
+    cached = Page[PaymentInDB](items=make_payments(2), next_cursor="abc")
+    mock_cache_service.get_or_load.return_value = cached.model_dump(mode="json")
+
+    payment_service = PaymentService(
+        mock_payment_repo, mocker.AsyncMock(), mocker.AsyncMock()
+    )
+    payment_service.cache_service = mock_cache_service
+
+    # Act
+    page = await payment_service.get_payments_page(1)
+
+    # Assert
+    assert page == cached
+    mock_payment_repo.get_page_by_user_id.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_payments_page_invalid_cursor(mocker):
+    # Arrange
+    payment_service = PaymentService(
+        mocker.AsyncMock(), mocker.AsyncMock(), mocker.AsyncMock()
+    )
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        await payment_service.get_payments_page(1, "not-a-cursor")
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        await payment_service.get_payments_page(1, encode_cursor({"i": 1}))
+
+
+@pytest.mark.asyncio
+async def test_process_payment_atomic_success(
+    mocker, valid_webhook_payload, sample_payment, cache_service
+):
+    # Arrange
+    mocker.patch.object(settings, "WEBHOOK_ATOMIC_PIPELINE", True)
+    mock_payment_repo = mocker.AsyncMock()
+    mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+
+    mock_account_repo.upsert_for_user.return_value = mocker.Mock(
+        id=valid_webhook_payload.account_id
+    )
+    mock_payment_repo.create_if_absent.return_value = sample_payment
+
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+    payment_service.cache_service = cache_service
+
+    # Act
+    result = await payment_service.process_payment(valid_webhook_payload)
+
+    # Assert
+    assert result.id == sample_payment.id
+    # Проверка дубликата делается через ON CONFLICT, без отдельного SELECT
+    mock_payment_repo.get_by_transaction_id.assert_not_called()
+    mock_account_repo.upsert_for_user.assert_called_once_with(
+        valid_webhook_payload.account_id, valid_webhook_payload.user_id
+    )
+    mock_account_repo.add_to_balance.assert_called_once_with(
+        valid_webhook_payload.account_id, valid_webhook_payload.amount
+    )
+    mock_payment_repo.commit.assert_called_once()
+    mock_payment_repo.rollback.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_process_payment_atomic_duplicate_rolls_back(
+    mocker, valid_webhook_payload
+):
+    # Arrange
+    mocker.patch.object(settings, "WEBHOOK_ATOMIC_PIPELINE", True)
+    mock_payment_repo = mocker.AsyncMock()
+    mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+
+    mock_account_repo.upsert_for_user.return_value = mocker.Mock(
+        id=valid_webhook_payload.account_id
+    )
+    mock_payment_repo.create_if_absent.return_value = None
+
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="Transaction already processed"):
+        await payment_service.process_payment(valid_webhook_payload)
+
+    mock_account_repo.add_to_balance.assert_not_called()
+    mock_payment_repo.commit.assert_not_called()
+    mock_payment_repo.rollback.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_process_payment_atomic_foreign_account(mocker, valid_webhook_payload):
+    # Arrange
+    mocker.patch.object(settings, "WEBHOOK_ATOMIC_PIPELINE", True)
+    mock_payment_repo = mocker.AsyncMock()
+    mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+
+    # Счёт существует, но принадлежит другому пользователю
+    mock_account_repo.upsert_for_user.return_value = None
+
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        await payment_service.process_payment(valid_webhook_payload)
+
+    assert exc_info.value.status_code == 403
+    mock_payment_repo.create_if_absent.assert_not_called()
+    mock_payment_repo.rollback.assert_called_once()
+
+
+def make_signed_payload(transaction_id, user_id=1, account_id=1, amount="10.00"):
+    amount = Decimal(amount)
+    data = f"{account_id}{amount}{transaction_id}{user_id}{settings.WEBHOOK_SECRET_KEY}"
+    return WebhookPayload(
+        transaction_id=transaction_id,
+        user_id=user_id,
+        account_id=account_id,
+        amount=amount,
+        signature=hashlib.sha256(data.encode()).hexdigest(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_process_payments_batch(mocker):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+    mock_cache_service = mocker.AsyncMock()
+
+    new_payload = make_signed_payload("tx-new", amount="10.00")
+    second_payload = make_signed_payload("tx-new-2", amount="5.50")
+    stored_payload = make_signed_payload("tx-stored")
+    bad_payload = make_signed_payload("tx-bad")
+    bad_payload.signature = "invalid_signature"
+    foreign_payload = make_signed_payload("tx-foreign", user_id=2, account_id=7)
+    unknown_user_payload = make_signed_payload("tx-ghost", user_id=99, account_id=9)
+
+    mock_payment_repo.get_existing_transaction_ids.return_value = {"tx-stored"}
+    mock_user_repo.get_existing_ids.return_value = {1, 2}
+    mock_account_repo.upsert_many_for_users.return_value = {1: 1, 7: 3}
+    mock_payment_repo.create_many_if_absent.side_effect = lambda rows: [
+        PaymentInDB(id=i, created_at=datetime.now(), **row)
+        for i, row in enumerate(rows, start=1)
+    ]
+
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+    payment_service.cache_service = mock_cache_service
+
+    # Act
+    results = await payment_service.process_payments_batch(
+        [
+            new_payload,
+            stored_payload,
+            bad_payload,
+            new_payload,
+            foreign_payload,
+            second_payload,
+            unknown_user_payload,
+        ]
+    )
+
+    # Assert
+    assert [result.status for result in results] == [
+        WebhookStatus.PROCESSED,
+        WebhookStatus.DUPLICATE,
+        WebhookStatus.INVALID_SIGNATURE,
+        WebhookStatus.DUPLICATE,
+        WebhookStatus.FORBIDDEN,
+        WebhookStatus.PROCESSED,
+        WebhookStatus.UNKNOWN_USER,
+    ]
+    # Один запрос на дубликаты, одна вставка, одно групповое обновление баланса
+    mock_payment_repo.get_existing_transaction_ids.assert_called_once()
+    mock_account_repo.upsert_many_for_users.assert_called_once_with({1: 1, 7: 2})
+    mock_payment_repo.create_many_if_absent.assert_called_once()
+    mock_account_repo.apply_balance_deltas.assert_called_once_with(
+        {1: Decimal("15.50")}
+    )
+    mock_payment_repo.commit.assert_called_once()
+    mock_user_repo.get_existing_ids.assert_called_once_with({1, 2, 99})
+    mock_cache_service.invalidate_tags.assert_called_once_with({"user:1"})
+
+
+@pytest.mark.asyncio
+async def test_process_payments_batch_rolls_back_on_error(mocker):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+    mock_payment_repo.get_existing_transaction_ids.return_value = set()
+    mock_user_repo.get_existing_ids.return_value = {1}
+    mock_account_repo.upsert_many_for_users.return_value = {1: 1}
+    mock_payment_repo.create_many_if_absent.side_effect = RuntimeError("db down")
+
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+
+    # Act & Assert
+    with pytest.raises(RuntimeError):
+        await payment_service.process_payments_batch([make_signed_payload("tx1")])
+
+    mock_payment_repo.commit.assert_not_called()
+    mock_payment_repo.rollback.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_process_payment_duplicate_answered_from_idempotency_store(
+    mocker, valid_webhook_payload, sample_payment, cache_service
+):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+    mock_payment_repo.get_by_transaction_id.return_value = None
+    mock_account_repo.get.return_value = None
+    mock_account_repo.create.return_value = mocker.Mock(
+        id=valid_webhook_payload.account_id
+    )
+    mock_payment_repo.create.return_value = sample_payment
+
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+    payment_service.cache_service = cache_service
+    first = await payment_service.process_payment(valid_webhook_payload)
+    mock_payment_repo.reset_mock()
+    mock_account_repo.reset_mock()
+
+    # Act
+    retry = await payment_service.process_payment(valid_webhook_payload)
+
+    # Assert
+    # Повтор получает тот же ответ, а БД не затрагивается
+    assert retry == first
+    mock_payment_repo.get_by_transaction_id.assert_not_called()
+    mock_payment_repo.create.assert_not_called()
+    mock_account_repo.update_balance.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_process_payment_retry_with_different_data_conflicts(
+    mocker, valid_webhook_payload, sample_payment, cache_service
+):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+    mock_payment_repo.get_by_transaction_id.return_value = None
+    mock_account_repo.get.return_value = None
+    mock_account_repo.create.return_value = mocker.Mock(
+        id=valid_webhook_payload.account_id
+    )
+    mock_payment_repo.create.return_value = sample_payment
+
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+    payment_service.cache_service = cache_service
+    await payment_service.process_payment(valid_webhook_payload)
+    retry = make_signed_payload(valid_webhook_payload.transaction_id, amount="999.00")
+
+    # Act & Assert
+    # Тот же transaction_id с другой суммой - не повтор, а ошибка отправителя
+    with pytest.raises(HTTPException) as exc_info:
+        await payment_service.process_payment(retry)
+    assert exc_info.value.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_process_payment_survives_redis_failure_after_commit(
+    mocker, valid_webhook_payload, sample_payment, cache_service, idempotency_service
+):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+    mock_payment_repo.get_by_transaction_id.return_value = None
+    mock_account_repo.get.return_value = None
+    mock_account_repo.create.return_value = mocker.Mock(
+        id=valid_webhook_payload.account_id
+    )
+    mock_payment_repo.create.return_value = sample_payment
+
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+    payment_service.cache_service = cache_service
+    mocker.patch.object(
+        CacheBatch,
+        "execute",
+        side_effect=RedisConnectionError("redis down"),
+    )
+
+    # Act
+    result = await payment_service.process_payment(valid_webhook_payload)
+
+    # Assert
+    # Платёж уже в БД: клиент получает его, а захват снят для повторов
+    assert result.id == sample_payment.id
+    assert await idempotency_service.claim(valid_webhook_payload.transaction_id)
+
+
+@pytest.mark.asyncio
+async def test_process_payment_failure_releases_claim(
+    mocker, valid_webhook_payload, idempotency_service
+):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+    mock_payment_repo.get_by_transaction_id.side_effect = RuntimeError("db down")
+
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+
+    # Act
+    with pytest.raises(RuntimeError):
+        await payment_service.process_payment(valid_webhook_payload)
+
+    # Assert
+    # Захват снят, поэтому повтор провайдера снова может обработать транзакцию
+    assert await idempotency_service.claim(valid_webhook_payload.transaction_id)
+
+
+@pytest.fixture
+def seeded_filter():
+    seen_filter = SeenTransactionFilter(capacity=1000, error_rate=0.01)
+    seen_filter.bloom = BloomFilter(1000, 0.01)
+    seen_filter.ready = True
+    return seen_filter
+
+
+@pytest.mark.asyncio
+async def test_process_payment_skips_duplicate_check_for_new_transaction(
+    mocker, valid_webhook_payload, sample_payment, seeded_filter, cache_service
+):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+    mock_account_repo.get.return_value = None
+    mock_account_repo.create.return_value = mocker.Mock(
+        id=valid_webhook_payload.account_id
+    )
+    mock_payment_repo.create.return_value = sample_payment
+
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+    payment_service.cache_service = cache_service
+    payment_service.seen_filter = seeded_filter
+
+    # Act
+    await payment_service.process_payment(valid_webhook_payload)
+
+    # Assert
+    mock_payment_repo.get_by_transaction_id.assert_not_called()
+    assert seeded_filter.might_contain(valid_webhook_payload.transaction_id)
+
+
+def unique_violation(constraint_name):
+    # Как у asyncpg: SQLAlchemy оборачивает исключение драйвера, имя индекса - в причине
+    driver_error = Exception("duplicate key value violates unique constraint")
+    driver_error.constraint_name = constraint_name
+    wrapped = Exception(str(driver_error))
+    wrapped.__cause__ = driver_error
+    return IntegrityError("INSERT", {}, wrapped)
+
+
+@pytest.mark.asyncio
+async def test_process_payment_unique_violation_is_duplicate(
+    mocker, valid_webhook_payload, seeded_filter
+):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+    mock_account_repo.get.return_value = None
+    mock_account_repo.create.return_value = mocker.Mock(
+        id=valid_webhook_payload.account_id
+    )
+    # Платёж записан другим воркером после заполнения фильтра
+    mock_payment_repo.create.side_effect = unique_violation(
+        "ix_payments_transaction_id"
+    )
+
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+    payment_service.seen_filter = seeded_filter
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="Transaction already processed"):
+        await payment_service.process_payment(valid_webhook_payload)
+
+    mock_payment_repo.rollback.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_process_payment_other_unique_violation_is_not_duplicate(
+    mocker, valid_webhook_payload, seeded_filter
+):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_account_repo = mocker.AsyncMock()
+    mock_user_repo = mocker.AsyncMock()
+    mock_account_repo.get.return_value = None
+    mock_account_repo.create.return_value = mocker.Mock(
+        id=valid_webhook_payload.account_id
+    )
+    # В тексте ошибки есть transaction_id, но нарушен другой индекс
+    mock_payment_repo.create.side_effect = unique_violation("ix_other_transaction_id")
+
+    payment_service = PaymentService(
+        mock_payment_repo, mock_account_repo, mock_user_repo
+    )
+    payment_service.seen_filter = seeded_filter
+
+    # Act & Assert
+    with pytest.raises(IntegrityError):
+        await payment_service.process_payment(valid_webhook_payload)
+
+
+@pytest.mark.asyncio
+async def test_get_payment_summary_reads_maintained_row(mocker):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    last_payment_at = datetime(2024, 1, 1, 12, 0)
+    mock_payment_repo.get_summary.return_value = mocker.Mock(
+        user_id=1,
+        payments_count=3,
+        total_amount=Decimal("30.00"),
+        last_payment_at=last_payment_at,
+    )
+    payment_service = PaymentService(
+        mock_payment_repo, mocker.AsyncMock(), mocker.AsyncMock()
+    )
+
+    # Act
+    summary = await payment_service.get_payment_summary(1)
+    total = await payment_service.get_total_payments_amount(1)
+
+    # Assert
+    assert summary.payments_count == 3
+    assert summary.last_payment_at == last_payment_at
+    assert total == Decimal("30.00")
+    # Список платежей для подсчета суммы больше не загружается
+    mock_payment_repo.get_by_user_id.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_payment_summary_without_payments(mocker):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_payment_repo.get_summary.return_value = None
+    payment_service = PaymentService(
+        mock_payment_repo, mocker.AsyncMock(), mocker.AsyncMock()
+    )
+
+    # Act
+    summary = await payment_service.get_payment_summary(1)
+
+    # Assert
+    assert summary.payments_count == 0
+    assert summary.total_amount == Decimal("0")
+    assert summary.last_payment_at is None
+
+
+@pytest.mark.asyncio
+async def test_compute_payment_summary_uses_sql_aggregate(mocker):
+    # Arrange
+    mock_payment_repo = mocker.AsyncMock()
+    mock_payment_repo.aggregate_summary.return_value = mocker.Mock(
+        payments_count=2, total_amount=Decimal("15.50"), last_payment_at=None
+    )
+    payment_service = PaymentService(
+        mock_payment_repo, mocker.AsyncMock(), mocker.AsyncMock()
+    )
+
+    # Act
+    summary = await payment_service.compute_payment_summary(1)
+
+    # Assert
+    assert summary.user_id == 1
+    assert summary.payments_count == 2
+    assert summary.total_amount == Decimal("15.50")
+    mock_payment_repo.aggregate_summary.assert_called_once_with(1)
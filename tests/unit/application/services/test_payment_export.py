@@ -0,0 +1,89 @@
+# tests/unit/application/services/test_payment_export.py
+import csv
+import io
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from src.api.v1.schemas.payment import ExportFormat
+from src.application.services import payment_export as export_module
+from src.application.services.payment_export import PaymentExportService
+
+
+def make_row(payment_id):
+    return SimpleNamespace(
+        id=payment_id,
+        transaction_id=f"tx-{payment_id}",
+        user_id=1,
+        account_id=1,
+        amount=Decimal("10.50"),
+        created_at=datetime(2024, 1, 1, 12, 0, payment_id),
+    )
+
+
+@pytest.fixture
+def export_service(mocker):
+    # Репозиторий отдает строки двумя пачками, как серверный курсор с yield_per
+    repository = mocker.Mock()
+
+    async def stream_for_export(user_id, date_from, date_to, batch_size):
+        yield [make_row(1), make_row(2)]
+        yield [make_row(3)]
+
+    repository.stream_for_export = mocker.Mock(side_effect=stream_for_export)
+    mocker.patch.object(export_module, "PaymentRepository", return_value=repository)
+
+    @asynccontextmanager
+    async def session_factory():
+        yield mocker.Mock()
+
+    service = PaymentExportService(session_factory, batch_size=2)
+    service.repository = repository
+    return service
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_streams_one_chunk_per_batch(export_service):
+    # Act
+    chunks = [chunk async for chunk in export_service.export(ExportFormat.NDJSON, 1)]
+
+    # Assert
+    assert len(chunks) == 2
+    lines = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [line["id"] for line in lines] == [1, 2, 3]
+    assert lines[0] == {
+        "id": 1,
+        "transaction_id": "tx-1",
+        "user_id": 1,
+        "account_id": 1,
+        "amount": "10.50",
+        "created_at": "2024-01-01T12:00:01",
+    }
+    export_service.repository.stream_for_export.assert_called_once_with(
+        1, None, None, 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_csv_starts_with_header(export_service):
+    # Arrange
+    date_from = datetime(2024, 1, 1)
+
+    # Act
+    chunks = [
+        chunk
+        async for chunk in export_service.export(ExportFormat.CSV, None, date_from)
+    ]
+
+    # Assert
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0] == export_module.EXPORT_COLUMNS
+    assert rows[1] == ["1", "tx-1", "1", "1", "10.50", "2024-01-01T12:00:01"]
+    assert len(rows) == 4
+    export_service.repository.stream_for_export.assert_called_once_with(
+        None, date_from, None, 2
+    )
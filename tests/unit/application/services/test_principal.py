@@ -0,0 +1,150 @@
+# tests/unit/application/services/test_principal.py
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from jose import JWTError
+from redis.exceptions import ConnectionError
+
+from src.api.v1.schemas.user import UserInDB
+from src.application.services import principal as principal_module
+from src.application.services.auth import AuthService
+from src.application.services.principal import PrincipalResolver
+from src.infrastructure.cache import RedisCacheAdapter
+
+USER = UserInDB(id=1, email="user@example.com", full_name="Test User", is_admin=True)
+
+
+@pytest.fixture
+async def make_resolver():
+    # Резолверы разных "экземпляров" приложения на общем FakeRedis
+    server = FakeServer()
+    adapters = []
+
+    def make(version_refresh=30.0):
+        adapter = RedisCacheAdapter()
+        adapter.client = FakeRedis(server=server)
+        adapters.append(adapter)
+        return PrincipalResolver(adapter, max_size=100, version_refresh=version_refresh)
+
+    yield make
+    for adapter in adapters:
+        await adapter.client.aclose()
+
+
+async def issue_token(resolver, user=USER):
+    return AuthService.create_access_token(await resolver.claims(user))
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_need_no_io(make_resolver, mocker):
+    # Arrange
+    resolver = make_resolver()
+    token = await issue_token(resolver)
+    redis_get = mocker.spy(resolver.cache_adapter.client, "get")
+    jwt_decode = mocker.spy(principal_module.jwt, "decode")
+
+    # Act
+    first = await resolver.resolve(token)
+    second = await resolver.resolve(token)
+
+    # Assert
+    assert first == second == USER
+    # Подпись проверяется один раз, версия токена уже известна с момента выдачи
+    jwt_decode.assert_called_once()
+    redis_get.assert_not_called()
+    assert resolver.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_token_without_claims_is_left_to_the_database(make_resolver):
+    # Arrange
+    resolver = make_resolver()
+    token = AuthService.create_access_token({"sub": "1"})
+
+    # Act
+    user = await resolver.resolve(token)
+
+    # Assert
+    assert user is None
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_rejected(make_resolver):
+    # Arrange
+    resolver = make_resolver()
+
+    # Act & Assert
+    with pytest.raises(JWTError):
+        await resolver.resolve("not-a-token")
+
+
+@pytest.mark.asyncio
+async def test_revoked_token_is_rejected_after_refresh(make_resolver):
+    # Arrange
+    resolver = make_resolver(version_refresh=0)
+    other_resolver = make_resolver(version_refresh=0)
+    old_token = await issue_token(resolver)
+    assert await other_resolver.resolve(old_token) == USER
+
+    # Act
+    await resolver.revoke(USER.id)
+    new_token = await issue_token(resolver)
+
+    # Assert
+    with pytest.raises(JWTError, match="revoked"):
+        await other_resolver.resolve(old_token)
+    assert await other_resolver.resolve(new_token) == USER
+
+
+@pytest.mark.asyncio
+async def test_token_issued_after_revocation_on_other_worker(make_resolver):
+    # Arrange
+    worker_1 = make_resolver()
+    worker_2 = make_resolver()
+    worker_3 = make_resolver()
+    # Версия 0 закэширована на втором и третьем воркере до отзыва
+    await issue_token(worker_2)
+    assert await worker_3.resolve(await issue_token(worker_3)) == USER
+    await worker_1.revoke(USER.id)
+
+    # Act
+    token = await issue_token(worker_2)
+
+    # Assert
+    # Новый токен несёт версию из Redis, а не устаревшую локальную копию
+    assert await worker_1.resolve(token) == USER
+    assert await worker_3.resolve(token) == USER
+
+
+@pytest.mark.asyncio
+async def test_token_ahead_of_lost_version_is_rejected(make_resolver):
+    # Arrange
+    resolver = make_resolver(version_refresh=0)
+    await resolver.revoke(USER.id)
+    token = await issue_token(resolver)
+
+    # Act
+    # Redis потерял счётчик версий (вытеснение или FLUSHALL)
+    await resolver.cache_adapter.client.flushall()
+
+    # Assert
+    with pytest.raises(JWTError, match="unknown"):
+        await resolver.resolve(token)
+
+
+@pytest.mark.asyncio
+async def test_unavailable_redis_falls_back_to_the_database(make_resolver, mocker):
+    # Arrange
+    resolver = make_resolver(version_refresh=0)
+    token = await issue_token(resolver)
+    mocker.patch.object(
+        resolver.cache_adapter.client, "get", side_effect=ConnectionError("down")
+    )
+
+    # Act
+    user = await resolver.resolve(token)
+    claims = await resolver.claims(USER)
+
+    # Assert
+    assert user is None
+    assert claims == {"sub": "1"}
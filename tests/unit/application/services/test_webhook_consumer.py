@@ -0,0 +1,210 @@
+# tests/unit/application/services/test_webhook_consumer.py
+import pytest
+from decimal import Decimal
+
+from src.api.v1.schemas.payment import WebhookPayload, WebhookResult, WebhookStatus
+from src.application.services import webhook_consumer
+from src.application.services.webhook_consumer import WebhookConsumerPool
+from src.infrastructure.queue import InMemoryWebhookQueue, QueuedMessage
+
+
+def make_payload(transaction_id: str) -> WebhookPayload:
+    return WebhookPayload(
+        transaction_id=transaction_id,
+        user_id=1,
+        account_id=1,
+        amount=Decimal("10.00"),
+        signature="signature",
+    )
+
+
+def make_message(message_id: str, transaction_id: str, deliveries: int = 1):
+    return QueuedMessage(
+        id=message_id,
+        data=make_payload(transaction_id).model_dump_json(),
+        deliveries=deliveries,
+    )
+
+
+@pytest.fixture
+def session_factory(mocker):
+    session = mocker.AsyncMock()
+    factory = mocker.MagicMock()
+    factory.return_value.__aenter__.return_value = session
+    return factory
+
+
+@pytest.fixture
+def mock_payment_service(mocker):
+    payment_service = mocker.AsyncMock()
+    payment_service.process_payments_batch.side_effect = lambda payloads: [
+        WebhookResult(transaction_id=p.transaction_id, status=WebhookStatus.PROCESSED)
+        for p in payloads
+    ]
+    service_factory = mocker.patch.object(webhook_consumer, "ServiceFactory")
+    service_factory.return_value.get_payment_service.return_value = payment_service
+    return payment_service
+
+
+@pytest.mark.asyncio
+async def test_collect_batch_respects_batch_size():
+    # Arrange
+    queue = InMemoryWebhookQueue()
+    for i in range(5):
+        await queue.put(make_payload(f"tx{i}").model_dump_json())
+    pool = WebhookConsumerPool(queue, session_factory=None, batch_size=3)
+
+    # Act
+    first = await pool.collect_batch("consumer")
+    second = await pool.collect_batch("consumer")
+
+    # Assert
+    assert len(first) == 3
+    assert len(second) == 2
+
+
+@pytest.mark.asyncio
+async def test_collect_batch_returns_empty_when_idle():
+    # Arrange
+    pool = WebhookConsumerPool(
+        InMemoryWebhookQueue(), session_factory=None, idle_block_ms=10
+    )
+
+    # Act
+    batch = await pool.collect_batch("consumer")
+
+    # Assert
+    assert batch == []
+
+
+@pytest.mark.asyncio
+async def test_collect_batch_claims_stale_messages_once_per_interval(mocker):
+    # Arrange
+    queue = mocker.AsyncMock()
+    queue.claim_stale.return_value = []
+    queue.read.return_value = []
+    pool = WebhookConsumerPool(queue, session_factory=None, claim_interval_ms=60000)
+
+    # Act
+    await pool.collect_batch("consumer")
+    await pool.collect_batch("consumer")
+
+    # Assert
+    queue.claim_stale.assert_called_once()
+    assert queue.read.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_process_batch_commits_and_acks(
+    mocker, session_factory, mock_payment_service
+):
+    # Arrange
+    queue = mocker.AsyncMock()
+    pool = WebhookConsumerPool(queue, session_factory)
+    batch = [make_message("1", "tx1"), make_message("2", "tx2")]
+
+    # Act
+    stored = await pool.process_batch(batch)
+
+    # Assert
+    assert stored is True
+    payloads = mock_payment_service.process_payments_batch.call_args.args[0]
+    assert [p.transaction_id for p in payloads] == ["tx1", "tx2"]
+    queue.ack.assert_called_once_with(["1", "2"])
+
+
+@pytest.mark.asyncio
+async def test_invalid_payload_is_dead_lettered_immediately(
+    mocker, session_factory, mock_payment_service
+):
+    # Arrange
+    queue = InMemoryWebhookQueue()
+    pool = WebhookConsumerPool(queue, session_factory)
+    corrupt = QueuedMessage(id="1", data="{not json")
+
+    # Act
+    stored = await pool.process_batch([corrupt, make_message("2", "tx2")])
+
+    # Assert
+    assert stored is True
+    assert [message for message, _ in queue.dead_letters] == [corrupt]
+    payloads = mock_payment_service.process_payments_batch.call_args.args[0]
+    assert [p.transaction_id for p in payloads] == ["tx2"]
+
+
+@pytest.mark.asyncio
+async def test_poison_message_does_not_block_batch(
+    mocker, session_factory, mock_payment_service
+):
+    # Arrange
+    def fail_on_poison(payloads):
+        if any(p.transaction_id == "poison" for p in payloads):
+            raise RuntimeError("foreign key violation")
+        return [
+            WebhookResult(
+                transaction_id=p.transaction_id, status=WebhookStatus.PROCESSED
+            )
+            for p in payloads
+        ]
+
+    mock_payment_service.process_payments_batch.side_effect = fail_on_poison
+    queue = mocker.AsyncMock()
+    pool = WebhookConsumerPool(queue, session_factory)
+    poison = make_message("2", "poison")
+
+    # Act
+    stored = await pool.process_batch(
+        [make_message("1", "tx1"), poison, make_message("3", "tx3")]
+    )
+
+    # Assert
+    # Исправные сообщения подтверждены, сбойное оставлено для повторной доставки
+    assert stored is False
+    assert [c.args[0] for c in queue.ack.call_args_list] == [["1"], ["3"]]
+    queue.release.assert_called_once_with([poison])
+    queue.dead_letter.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_message_is_dead_lettered_after_max_deliveries(
+    mocker, session_factory, mock_payment_service
+):
+    # Arrange
+    mock_payment_service.process_payments_batch.side_effect = RuntimeError("boom")
+    queue = mocker.AsyncMock()
+    pool = WebhookConsumerPool(queue, session_factory, max_deliveries=3)
+    message = make_message("1", "tx1", deliveries=3)
+
+    # Act
+    await pool.process_batch([message])
+
+    # Assert
+    queue.dead_letter.assert_called_once_with(message, "boom")
+    queue.release.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_failed_message_is_released_with_delivery_count(
+    mocker, session_factory, mock_payment_service
+):
+    # Arrange
+    queue = InMemoryWebhookQueue()
+    await queue.put(make_payload("tx1").model_dump_json())
+    mock_payment_service.process_payments_batch.side_effect = RuntimeError("db down")
+    pool = WebhookConsumerPool(queue, session_factory, workers=1, retry_backoff=0)
+
+    async def stop_after_failure(_):
+        pool._stopping.set()
+
+    mocker.patch.object(
+        webhook_consumer.asyncio, "sleep", side_effect=stop_after_failure
+    )
+
+    # Act
+    await pool.start()
+    await pool._tasks[0]
+
+    # Assert
+    # Сообщение вернулось в очередь и будет обработано повторно
+    messages = await queue.read("consumer", 10, 10)
+    assert [message.deliveries for message in messages] == [2]
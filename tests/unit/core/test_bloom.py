@@ -0,0 +1,67 @@
+# tests/unit/core/test_bloom.py
+import pytest
+
+from src.core.bloom import BloomFilter
+
+
+def test_bloom_has_no_false_negatives():
+    # Arrange
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    items = [f"tx-{i}" for i in range(10_000)]
+
+    # Act
+    for item in items:
+        bloom.add(item)
+
+    # Assert
+    assert all(item in bloom for item in items)
+    # Элементы, уже казавшиеся добавленными (ложные срабатывания), не считаются
+    assert len(bloom) == pytest.approx(10_000, rel=0.01)
+
+
+def test_bloom_counts_repeated_items_once():
+    # Arrange
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    bloom.add("tx-1")
+    bits_set = bloom.bits_set
+
+    # Act
+    bloom.add("tx-1")
+
+    # Assert
+    assert len(bloom) == 1
+    assert bloom.bits_set == bits_set
+
+
+def test_bloom_false_positive_rate_is_close_to_target():
+    # Arrange
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"tx-{i}")
+
+    # Act
+    false_positives = sum(f"other-{i}" in bloom for i in range(20_000))
+
+    # Assert
+    assert false_positives / 20_000 < 0.02
+    assert bloom.estimated_error_rate == pytest.approx(0.01, rel=0.3)
+
+
+def test_bloom_stats_report_memory():
+    # Arrange
+    bloom = BloomFilter(capacity=1_000_000, error_rate=0.01)
+
+    # Act
+    stats = bloom.stats()
+
+    # Assert
+    # ~9.6 бит на элемент при 1% ложных срабатываний
+    assert stats["memory_bytes"] == pytest.approx(1_198_133, rel=0.01)
+    assert stats["hashes"] == 7
+    assert stats["items"] == 0
+
+
+@pytest.mark.parametrize("capacity, error_rate", [(0, 0.01), (10, 0), (10, 1)])
+def test_bloom_rejects_invalid_parameters(capacity, error_rate):
+    with pytest.raises(ValueError):
+        BloomFilter(capacity, error_rate)
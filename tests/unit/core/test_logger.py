@@ -0,0 +1,76 @@
+# tests/unit/core/test_logger.py
+import io
+import json
+
+from loguru import logger
+
+from src.core import logger as logger_module
+from src.core.logger import (
+    QueueSink,
+    json_format,
+    parse_sample_rates,
+    sampling_filter,
+)
+
+
+def test_parse_sample_rates():
+    # Act
+    rates = parse_sample_rates("debug=0.1, INFO=1")
+
+    # Assert
+    assert rates == {"DEBUG": 0.1, "INFO": 1.0}
+    assert parse_sample_rates("") == {}
+
+
+def test_sampling_filter_keeps_share_of_sampled_level(mocker):
+    # Arrange
+    keep = sampling_filter({"DEBUG": 0.1})
+    mocker.patch.object(logger_module.random, "random", side_effect=[0.05, 0.5])
+    debug = {"level": mocker.Mock()}
+    debug["level"].name = "DEBUG"
+    info = {"level": mocker.Mock()}
+    info["level"].name = "INFO"
+
+    # Act & Assert
+    assert keep(debug) is True
+    assert keep(debug) is False
+    # Уровни без доли не сэмплируются
+    assert keep(info) is True
+
+
+def test_json_format_writes_call_arguments_as_fields():
+    # Arrange
+    stream = io.StringIO()
+    handler_id = logger.add(stream, format=json_format, level="INFO")
+
+    # Act
+    logger.info("Stored {transaction_id} in {}", "db", transaction_id="tx-{1}")
+    logger.remove(handler_id)
+
+    # Assert
+    entry = json.loads(stream.getvalue())
+    assert entry["level"] == "INFO"
+    assert entry["message"] == "Stored tx-{1} in db"
+    assert entry["extra"] == {"transaction_id": "tx-{1}"}
+
+
+def test_queue_sink_reports_write_failures_to_stderr(capfd):
+    # Arrange
+    class BrokenStream:
+        def write(self, message):
+            raise OSError("disk full")
+
+        def flush(self):
+            pass
+
+    sink = QueueSink(BrokenStream())
+    handler_id = logger.add(sink, format="{message}", level="INFO")
+
+    # Act
+    logger.info("lost")
+    sink.drain()
+    logger.remove(handler_id)
+
+    # Assert
+    # Сбой записи не роняет поток записи и виден в stderr процесса
+    assert "Log writer failed: disk full" in capfd.readouterr().err
@@ -0,0 +1,58 @@
+# tests/unit/core/test_metrics.py
+import pytest
+
+from src.core.metrics import Histogram, MetricsRegistry
+
+
+def test_histogram_snapshot_is_cumulative():
+    # Arrange
+    histogram = Histogram(buckets=(0.1, 1.0))
+
+    # Act
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value)
+
+    # Assert
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"0.1": 2, "1.0": 3, "+Inf": 4}
+    assert snapshot["count"] == 4 == histogram.count
+    assert snapshot["sum"] == 5.65
+
+
+def test_registry_renders_prometheus_text():
+    # Arrange
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ["route"])
+    duration = registry.histogram(
+        "duration_seconds", "Duration.", ["route"], buckets=(0.1, 1.0)
+    )
+
+    # Act
+    requests.labels('/a"b').inc()
+    requests.labels('/a"b').inc(2)
+    duration.labels("/a").observe(0.5)
+    text = registry.render()
+
+    # Assert
+    assert registry.counter("requests_total", "Requests.", ["route"]) is requests
+    assert text.splitlines() == [
+        "# HELP duration_seconds Duration.",
+        "# TYPE duration_seconds histogram",
+        'duration_seconds_bucket{route="/a",le="0.1"} 0',
+        'duration_seconds_bucket{route="/a",le="1.0"} 1',
+        'duration_seconds_bucket{route="/a",le="+Inf"} 1',
+        'duration_seconds_sum{route="/a"} 0.5',
+        'duration_seconds_count{route="/a"} 1',
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a\\"b"} 3.0',
+    ]
+
+
+def test_labels_must_match_label_names():
+    # Arrange
+    counter = MetricsRegistry().counter("errors_total", "Errors.", ["kind"])
+
+    # Act & Assert
+    with pytest.raises(ValueError):
+        counter.labels("a", "b")
@@ -0,0 +1,204 @@
+# tests/unit/core/test_profiling.py
+import asyncio
+import time
+
+import pytest
+
+from src.api import middleware as middleware_module
+from src.api.middleware import ProfilingMiddleware
+from src.api.v1.schemas.user import UserInDB
+from src.core.profiling import (
+    ProfileStore,
+    RequestProfile,
+    StackSampler,
+    current_profile,
+    timed,
+)
+
+ADMIN = UserInDB(id=1, email="admin@example.com", full_name="Admin", is_admin=True)
+SELECT_ACCOUNT = "SELECT accounts.id FROM accounts WHERE accounts.user_id = $1"
+
+
+class Route:
+    path = "/api/v1/payments"
+
+
+def make_app(statements=0, delay=0.0):
+    async def app(scope, receive, send):
+        scope["route"] = Route
+        profile = current_profile.get()
+        for _ in range(statements):
+            profile.add_statement(SELECT_ACCOUNT, 0.001)
+        with timed("redis"):
+            await asyncio.sleep(delay)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"[]"})
+
+    return app
+
+
+async def call(middleware, headers=()):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/payments",
+        "headers": [(name.lower(), value) for name, value in headers],
+    }
+    await middleware(scope, receive, send)
+    return dict(messages[0]["headers"])
+
+
+def test_repeated_statements_are_reported_as_n_plus_one():
+    # Arrange
+    profile = RequestProfile()
+    profile.add_statement("SELECT users.id FROM users", 0.002)
+    for _ in range(6):
+        profile.add_statement(SELECT_ACCOUNT, 0.001)
+
+    # Act
+    n_plus_one = profile.n_plus_one(threshold=5)
+
+    # Assert
+    assert n_plus_one == [{"sql": SELECT_ACCOUNT, "count": 6, "ms": 6.0}]
+    assert profile.counts["db"] == 7
+
+
+def test_timed_is_a_no_op_outside_a_profiled_request():
+    # Arrange
+    profile = RequestProfile()
+
+    # Act
+    with timed("redis"):
+        pass
+    token = current_profile.set(profile)
+    try:
+        with timed("redis"):
+            time.sleep(0.01)
+    finally:
+        current_profile.reset(token)
+
+    # Assert
+    assert profile.counts["redis"] == 1
+    assert profile.durations["redis"] >= 0.01
+
+
+def test_store_keeps_the_latest_traces():
+    # Arrange
+    store = ProfileStore(max_size=2)
+
+    # Act
+    for profile_id in ("a", "b", "c"):
+        store.add(
+            {
+                "id": profile_id,
+                "reason": "slow",
+                "started_at": "",
+                "method": "GET",
+                "path": "/",
+                "route": "/",
+                "status": 200,
+                "duration_ms": 1.0,
+                "breakdown_ms": {},
+                "n_plus_one": [],
+            }
+        )
+
+    # Assert
+    assert store.get("a") is None
+    assert [summary["id"] for summary in store.summaries()] == ["c", "b"]
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampler_records_the_stack_of_the_calling_thread():
+    # Arrange
+    sampler = StackSampler(interval=0.001)
+    other = StackSampler(interval=0.001)
+
+    # Act
+    assert sampler.start()
+    # Второй профилировщик не запускается, пока работает первый
+    assert not other.start()
+    busy_loop(0.1)
+    samples = sampler.stop()
+
+    # Assert
+    assert any(stack.endswith("test_profiling.py:busy_loop") for stack in samples)
+    assert other.start()
+    other.stop()
+
+
+@pytest.mark.asyncio
+async def test_admin_header_returns_server_timing_and_saves_trace(mocker):
+    # Arrange
+    store = ProfileStore(max_size=10)
+    resolver = mocker.Mock()
+    resolver.resolve = mocker.AsyncMock(return_value=ADMIN)
+    mocker.patch.object(
+        middleware_module, "get_principal_resolver", return_value=resolver
+    )
+    middleware = ProfilingMiddleware(make_app(statements=5), store, slow_seconds=0)
+
+    # Act
+    headers = await call(
+        middleware, [(b"X-Profile", b"1"), (b"Authorization", b"Bearer token")]
+    )
+
+    # Assert
+    assert headers[b"server-timing"].startswith(b'db;dur=5.00;desc="5 ops", redis;')
+    trace = store.get(headers[b"x-profile-id"].decode())
+    assert trace["reason"] == "requested"
+    assert trace["route"] == "/api/v1/payments"
+    assert trace["n_plus_one"][0]["count"] == 5
+    assert "stacks" in trace
+
+
+@pytest.mark.asyncio
+async def test_header_from_non_admin_is_ignored(mocker):
+    # Arrange
+    store = ProfileStore(max_size=10)
+    resolver = mocker.Mock()
+    resolver.resolve = mocker.AsyncMock(
+        return_value=ADMIN.model_copy(update={"is_admin": False})
+    )
+    mocker.patch.object(
+        middleware_module, "get_principal_resolver", return_value=resolver
+    )
+    middleware = ProfilingMiddleware(make_app(), store, slow_seconds=0)
+
+    # Act
+    headers = await call(
+        middleware, [(b"X-Profile", b"1"), (b"Authorization", b"Bearer token")]
+    )
+
+    # Assert
+    assert b"server-timing" not in headers
+    assert store.summaries() == []
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_saved_without_headers():
+    # Arrange
+    store = ProfileStore(max_size=10)
+    middleware = ProfilingMiddleware(make_app(delay=0.05), store, slow_seconds=0.02)
+
+    # Act
+    headers = await call(middleware)
+
+    # Assert
+    assert b"server-timing" not in headers
+    [summary] = store.summaries()
+    assert summary["reason"] == "slow"
+    assert summary["breakdown_ms"]["redis"] >= 50
@@ -0,0 +1,68 @@
+# tests/unit/infrastructure/repositories/test_base.py
+import pytest
+
+from src.domain.models import User
+from src.infrastructure.database import query_origin
+from src.infrastructure.repositories.base import BaseRepository, track_queries
+
+
+class ProbeRepository(BaseRepository[User]):
+    # Вместо запросов запоминает, какой метод был бы указан в метриках
+    def __init__(self):
+        super().__init__(User, None)
+        self.origins = []
+
+    @track_queries
+    async def get(self, id):
+        self.origins.append(query_origin.get())
+
+    @track_queries
+    async def find(self):
+        await self.get(1)
+
+    @track_queries
+    async def stream(self):
+        for i in range(2):
+            self.origins.append(query_origin.get())
+            yield i
+
+
+@pytest.mark.asyncio
+async def test_queries_are_labelled_with_outermost_repository_method():
+    # Arrange
+    repository = ProbeRepository()
+
+    # Act
+    await repository.get(1)
+    await repository.find()
+    await repository.delete(1)
+
+    # Assert
+    assert repository.origins == [
+        "ProbeRepository.get",
+        "ProbeRepository.find",
+        "ProbeRepository.delete",
+    ]
+    assert query_origin.get() == "other"
+
+
+@pytest.mark.asyncio
+async def test_stream_is_labelled_only_while_fetching():
+    # Arrange
+    repository = ProbeRepository()
+    seen_by_caller = []
+
+    # Act
+    async for _ in repository.stream():
+        seen_by_caller.append(query_origin.get())
+
+    # Assert
+    assert repository.origins == ["ProbeRepository.stream"] * 2
+    assert seen_by_caller == ["other", "other"]
+
+
+def test_transaction_control_is_not_labelled():
+    # Assert
+    assert not hasattr(BaseRepository.commit, "__wrapped__")
+    assert not hasattr(BaseRepository.rollback, "__wrapped__")
+    assert hasattr(BaseRepository.get_by_filter, "__wrapped__")
@@ -0,0 +1,61 @@
+# tests/unit/infrastructure/test_cache.py
+import pytest
+
+from src.infrastructure import cache as cache_module
+from src.infrastructure.cache import (
+    close_redis_pools,
+    get_redis_cache_adapter,
+    get_redis_pool,
+    get_redis_pool_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+async def clean_pools():
+    await close_redis_pools()
+    yield
+    await close_redis_pools()
+
+
+def test_pool_is_shared_and_sized_from_settings(mocker):
+    # Arrange
+    mocker.patch.object(cache_module.settings, "REDIS_MAX_CONNECTIONS", 7)
+
+    # Act
+    first = get_redis_pool()
+    second = get_redis_pool()
+    text_pool = get_redis_pool(decode_responses=True)
+
+    # Assert
+    assert first is second
+    assert text_pool is not first
+    assert first.max_connections == 7
+    assert get_redis_pool_stats()["binary"] == {
+        "max_connections": 7,
+        "in_use": 0,
+        "idle": 0,
+    }
+
+
+def test_adapter_is_a_process_singleton_on_the_shared_pool():
+    # Act
+    adapter = get_redis_cache_adapter()
+
+    # Assert
+    assert get_redis_cache_adapter() is adapter
+    assert adapter.client.connection_pool is get_redis_pool()
+
+
+async def test_close_disconnects_pools_and_forgets_adapter(mocker):
+    # Arrange
+    adapter = get_redis_cache_adapter()
+    pool = get_redis_pool()
+    disconnect = mocker.spy(pool, "disconnect")
+
+    # Act
+    await close_redis_pools()
+
+    # Assert
+    disconnect.assert_called_once()
+    assert get_redis_pool_stats() == {}
+    assert get_redis_cache_adapter() is not adapter
@@ -0,0 +1,91 @@
+# tests/unit/infrastructure/test_cache_codec.py
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from src.infrastructure.cache_codec import (
+    COMPRESSED,
+    CacheCodec,
+    CodecError,
+    JsonCodec,
+    available_codecs,
+    create_cache_codec,
+)
+
+VALUE = {
+    "id": 1,
+    "amount": Decimal("100.50"),
+    "created_at": datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc),
+    "items": [{"amount": Decimal("0.01")}, None, "text"],
+}
+
+
+# Decimal и datetime возвращаются строками, как в JSON-ответах API
+DECODED = {
+    "id": 1,
+    "amount": "100.50",
+    "created_at": "2026-10-17T12:00:00+00:00",
+    "items": [{"amount": "0.01"}, None, "text"],
+}
+
+
+@pytest.mark.parametrize("name", sorted(available_codecs()))
+def test_codec_round_trip(name):
+    # Arrange
+    codec = create_cache_codec(name)
+
+    # Act
+    value = codec.decode(codec.encode(VALUE))
+
+    # Assert
+    assert value == DECODED
+
+
+def test_large_values_are_compressed():
+    # Arrange
+    codec = CacheCodec(JsonCodec(), compress_min_bytes=1000)
+    value = [VALUE] * 50
+
+    # Act
+    small = codec.encode(VALUE)
+    large = codec.encode(value)
+
+    # Assert
+    assert not small[2] & COMPRESSED
+    assert large[2] & COMPRESSED
+    assert codec.decode(large) == [DECODED] * 50
+
+
+@pytest.mark.parametrize("name", sorted(available_codecs()))
+def test_value_is_read_with_the_codec_named_in_header(name):
+    # Arrange
+    # Экземпляры с разными CACHE_CODEC читают значения друг друга
+    writer = create_cache_codec(name)
+    reader = create_cache_codec("json")
+
+    # Act
+    value = reader.decode(writer.encode(VALUE))
+
+    # Assert
+    assert value == DECODED
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b'{"id": 1}', b"\xca\x02\x01{}", b"\xca\x01\x7f{}", b"\xca\x01\x01{broken"],
+    ids=["legacy-json", "other-version", "unknown-codec", "corrupt"],
+)
+def test_unreadable_values_raise_codec_error(data):
+    # Arrange
+    codec = create_cache_codec("json")
+
+    # Act & Assert
+    with pytest.raises(CodecError):
+        codec.decode(data)
+
+
+def test_unknown_codec_name_is_rejected():
+    # Act & Assert
+    with pytest.raises(ValueError, match="not installed"):
+        create_cache_codec("pickle")
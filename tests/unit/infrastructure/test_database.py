@@ -0,0 +1,131 @@
+# tests/unit/infrastructure/test_database.py
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.util import greenlet_spawn
+
+from src.infrastructure import database
+from src.infrastructure.database import InstrumentedQueuePool, ReplicaRouter
+
+
+@pytest.fixture
+def pool(mocker):
+    # Пул на фиктивных DBAPI-соединениях: один слот, без overflow
+    return InstrumentedQueuePool(
+        creator=mocker.Mock, pool_size=1, max_overflow=0, timeout=0.05
+    )
+
+
+@pytest.mark.asyncio
+async def test_pool_records_checkout_wait(pool):
+    # Act
+    connection = await greenlet_spawn(pool.connect)
+    stats = pool.stats()
+
+    # Assert
+    assert stats["checked_out"] == 1
+    assert stats["checkout_wait_seconds"]["count"] == 1
+    assert stats["checkout_timeouts"] == 0
+    await greenlet_spawn(connection.close)
+    assert pool.stats()["checked_out"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_counts_checkout_timeouts(pool):
+    # Arrange
+    connection = await greenlet_spawn(pool.connect)
+
+    # Act
+    with pytest.raises(PoolTimeoutError):
+        await greenlet_spawn(pool.connect)
+
+    # Assert
+    stats = pool.stats()
+    assert stats["checkout_timeouts"] == 1
+    assert stats["checkout_wait_seconds"]["count"] == 2
+    # Ожидание до таймаута (50 мс) не укладывается в корзину 25 мс
+    assert stats["checkout_wait_seconds"]["buckets"]["0.025"] == 1
+    await greenlet_spawn(connection.close)
+
+
+def make_replica_engine(mocker, lag=None, error=None):
+    # Движок, у которого проверка отставания возвращает lag или падает с error
+    conn = mocker.AsyncMock()
+    if error is not None:
+        conn.execute.side_effect = error
+    else:
+        conn.execute.return_value = mocker.Mock(scalar=mocker.Mock(return_value=lag))
+    engine = mocker.Mock()
+    engine.connect.return_value.__aenter__ = mocker.AsyncMock(return_value=conn)
+    engine.connect.return_value.__aexit__ = mocker.AsyncMock(return_value=False)
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_replica_router_skips_lagging_and_unreachable_replicas(mocker):
+    # Arrange
+    router = ReplicaRouter(
+        [
+            make_replica_engine(mocker, lag=0.5),
+            make_replica_engine(mocker, lag=60),
+            make_replica_engine(mocker, error=OSError("connection refused")),
+            make_replica_engine(mocker, lag=0),
+        ],
+        max_lag_seconds=5,
+        check_interval=1,
+    )
+    assert router.pick() is None
+
+    # Act
+    await router.check()
+
+    # Assert
+    assert router.healthy == [True, False, False, True]
+    picked = {router.pick() for _ in range(4)}
+    assert picked == {router.session_factories[0], router.session_factories[3]}
+    assert [replica["lag_seconds"] for replica in router.stats()] == [0.5, 60, None, 0]
+
+
+@pytest.mark.asyncio
+async def test_read_session_falls_back_to_primary(mocker):
+    # Arrange
+    router = ReplicaRouter([make_replica_engine(mocker, lag=0)], 5, 1)
+    await router.check()
+    replica = mocker.AsyncMock()
+    replica.connection.side_effect = OSError("connection refused")
+    primary = mocker.AsyncMock()
+
+    def session_factory(session):
+        context = mocker.AsyncMock()
+        context.__aenter__.return_value = session
+        return mocker.Mock(return_value=context)
+
+    router.session_factories = [session_factory(replica)]
+    mocker.patch.object(database, "replica_router", router)
+    mocker.patch.object(database, "async_session", session_factory(primary))
+
+    # Act
+    async with database.read_session() as session:
+        pass
+
+    # Assert
+    assert session is primary
+    assert router.healthy == [False]
+
+
+@pytest.mark.asyncio
+async def test_read_session_prefers_primary_when_asked(mocker):
+    # Arrange
+    router = mocker.Mock()
+    mocker.patch.object(database, "replica_router", router)
+    primary_context = mocker.AsyncMock()
+    mocker.patch.object(
+        database, "async_session", mocker.Mock(return_value=primary_context)
+    )
+
+    # Act
+    async with database.read_session(prefer_primary=True) as session:
+        pass
+
+    # Assert
+    assert session is primary_context.__aenter__.return_value
+    router.pick.assert_not_called()
@@ -0,0 +1,77 @@
+# tests/unit/infrastructure/test_local_cache.py
+from src.infrastructure import local_cache as local_cache_module
+from src.infrastructure.local_cache import LocalCache
+
+
+def make_cache(max_size=2, ttl=10):
+    cache = LocalCache(max_size=max_size, ttl=ttl)
+    cache.activate()
+    return cache
+
+
+def test_local_cache_evicts_least_recently_used():
+    # Arrange
+    cache = make_cache(max_size=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+
+    # Act
+    cache.set("c", "3")
+
+    # Assert
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_local_cache_expires_entries(mocker):
+    # Arrange
+    now = mocker.patch.object(local_cache_module.time, "monotonic", return_value=100)
+    cache = make_cache(ttl=10)
+    cache.set("a", "1")
+    # TTL записи не может превышать TTL кэша
+    cache.set("b", "2", ttl=300)
+
+    # Act
+    now.return_value = 111
+
+    # Assert
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.stats()["expirations"] == 2
+
+
+def test_inactive_local_cache_serves_nothing():
+    # Arrange
+    cache = make_cache()
+    cache.set("a", "1")
+
+    # Act
+    cache.deactivate()
+    cache.set("b", "2")
+
+    # Assert
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+    cache.activate()
+    assert cache.get("a") is None
+
+
+def test_local_cache_deletes_entries_by_tag():
+    # Arrange
+    cache = make_cache(max_size=10)
+    cache.set("accounts:user:1", "1", tags=("user:1",))
+    cache.set("payments:user:1", "2", tags=("user:1",))
+    cache.set("payments:user:2", "3", tags=("user:2",))
+    cache.delete_many(["payments:user:1"])
+
+    # Act
+    cache.delete_tags(["user:1"])
+
+    # Assert
+    assert cache.get("accounts:user:1") is None
+    assert cache.get("payments:user:2") == "3"
+    assert "user:1" not in cache._tag_keys
+    assert cache.stats()["size"] == 1
@@ -0,0 +1,73 @@
+# tests/unit/infrastructure/test_password_hasher.py
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from src.infrastructure.password_hasher import PasswordHasher
+
+# Минимальная стоимость bcrypt, чтобы тесты шли быстро
+FAST_CONTEXT = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+
+
+@pytest.fixture
+def make_hasher():
+    hashers = []
+
+    def make(max_workers=2):
+        hasher = PasswordHasher(max_workers, FAST_CONTEXT)
+        hashers.append(hasher)
+        return hasher
+
+    yield make
+    for hasher in hashers:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_run_outside_event_loop_thread(make_hasher, mocker):
+    # Arrange
+    hasher = make_hasher()
+    threads = []
+    original_hash = FAST_CONTEXT.hash
+
+    def record_thread(password):
+        threads.append(threading.current_thread().name)
+        return original_hash(password)
+
+    mocker.patch.object(hasher.context, "hash", side_effect=record_thread)
+
+    # Act
+    hashed = await hasher.hash("secret")
+
+    # Assert
+    assert threads[0].startswith("password-hash")
+    assert await hasher.verify("secret", hashed)
+    assert not await hasher.verify("wrong", hashed)
+
+
+@pytest.mark.asyncio
+async def test_calls_over_the_limit_wait_in_queue(make_hasher, mocker):
+    # Arrange
+    hasher = make_hasher(max_workers=1)
+    release = threading.Event()
+    mocker.patch.object(
+        hasher.context, "hash", side_effect=lambda password: release.wait(5)
+    )
+
+    # Act
+    tasks = [asyncio.create_task(hasher.hash("secret")) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    during = hasher.stats()
+    release.set()
+    await asyncio.gather(*tasks)
+
+    # Assert
+    assert during["running"] == 1
+    assert during["queued"] == 2
+    stats = hasher.stats()
+    assert stats["max_queued"] >= 2
+    assert stats["queued"] == stats["running"] == 0
+    assert stats["completed"] == 3
+    assert stats["queue_wait_seconds"]["count"] == 3
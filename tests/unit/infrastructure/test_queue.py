@@ -0,0 +1,70 @@
+# tests/unit/infrastructure/test_queue.py
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+from src.infrastructure.queue import RedisStreamWebhookQueue
+
+
+@pytest.fixture
+async def stream_queue():
+    client = FakeRedis(decode_responses=True)
+    queue = RedisStreamWebhookQueue(client, stream="test-webhooks", group="test-group")
+    await queue.setup()
+    yield queue
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stream_queue_read_and_ack(stream_queue):
+    # Arrange
+    await stream_queue.put('{"transaction_id": "tx1"}')
+    await stream_queue.put('{"transaction_id": "tx2"}')
+
+    # Act
+    messages = await stream_queue.read("consumer-1", count=10, block_ms=10)
+    await stream_queue.ack([message.id for message in messages])
+
+    # Assert
+    assert [message.data for message in messages] == [
+        '{"transaction_id": "tx1"}',
+        '{"transaction_id": "tx2"}',
+    ]
+    assert await stream_queue.read("consumer-1", count=10, block_ms=10) == []
+    assert await stream_queue.client.xlen("test-webhooks") == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_queue_setup_is_idempotent(stream_queue):
+    # Act & Assert: повторное создание группы не падает с BUSYGROUP
+    await stream_queue.setup()
+
+
+@pytest.mark.asyncio
+async def test_stream_queue_claims_unacked_messages_with_delivery_count(stream_queue):
+    # Arrange
+    stream_queue.claim_idle_ms = 0
+    await stream_queue.put('{"transaction_id": "tx1"}')
+    await stream_queue.read("crashed-consumer", count=10, block_ms=10)
+
+    # Act
+    messages = await stream_queue.claim_stale("consumer-2", count=10)
+
+    # Assert
+    assert [message.data for message in messages] == ['{"transaction_id": "tx1"}']
+    assert messages[0].deliveries == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_queue_dead_letter(stream_queue):
+    # Arrange
+    await stream_queue.put('{"transaction_id": "tx1"}')
+    [message] = await stream_queue.read("consumer-1", count=10, block_ms=10)
+
+    # Act
+    await stream_queue.dead_letter(message, "invalid payload")
+
+    # Assert
+    assert await stream_queue.client.xlen("test-webhooks") == 0
+    [(_, fields)] = await stream_queue.client.xrange("test-webhooks:dead")
+    assert fields["payload"] == '{"transaction_id": "tx1"}'
+    assert fields["reason"] == "invalid payload"